@@ -0,0 +1,206 @@
+r''' Headless bulk creation of GNT projects for many farms from one CLU layer and a CSV of admin attributes.
+
+Usage, from the ArcGIS Pro Python environment:
+    python Batch_Create_Projects.py C:\CLU\clu.gdb\clu_extract farms.csv --wkid 32615 [--root C:\GNT] [--workers 4]
+
+The CSV has a row per farm with the columns in ADMIN_CSV_FIELDS. The CLU layer is read once and split by its farm
+number field, then each farm's project folder and geodatabase are created in a process pool, like Create GNT Project
+does without the map. A manifest in the root folder records each project, so re-running the same inputs skips
+projects that are already complete, and a project is only rebuilt when --force is given.
+'''
+from argparse import ArgumentParser
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from csv import DictReader
+from datetime import datetime
+from getpass import getuser
+from hashlib import sha1
+from json import dump, dumps, load, loads
+from os import cpu_count, makedirs, path
+from shutil import rmtree
+from time import ctime, perf_counter
+
+from arcpy import AsShape, SpatialReference
+from arcpy.da import InsertCursor, SearchCursor
+
+from clu import insertCLURows, readFieldMap, sourceFields
+from fips import loadFipsIndex
+from gnt_core.spatial_ref import isWGS84UTM
+from gnt_project import ADMIN_TABLE_FIELDS, GNT_WORKSPACE, GNTProject, projectFolderName
+from project_seed import copyProjectSeed, projectSeed
+
+
+ADMIN_CSV_FIELDS = ['state_name', 'county_name', 'farm_number', 'operation_name', 'street', 'city', 'zip', 'contact_name',
+                    'office_phone', 'home_phone', 'email', 'notes', 'start_year', 'start_month', 'plan_years']
+MONTHS = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October', 'November', 'December']
+MANIFEST_NAME = 'project_scaffold_manifest.json'
+
+
+def readAdminCSV(csv_path):
+    ''' Return the admin CSV rows as dicts keyed by farm number. Start months may be names or numbers.'''
+    farms = {}
+    with open(csv_path, encoding='utf-8-sig', newline='') as f:
+        for row in DictReader(f):
+            admin = {field: (row.get(field) or '').strip() for field in ADMIN_CSV_FIELDS}
+            if admin['start_month'].title() in MONTHS:
+                admin['start_month'] = str(MONTHS.index(admin['start_month'].title()) + 1)
+            farms[admin['farm_number']] = admin
+    return farms
+
+
+def partitionCLU(clu_layer, farm_field, field_map, sr, farms):
+    ''' Read clu_layer once, projected to sr, and split its rows by farm number for the farms given.
+
+    Returns the source fields read and a dict of farm number: list of (esri JSON geometry dict, source values...) rows.
+    '''
+    fields = sourceFields(clu_layer, field_map)
+    partitions = {farm: [] for farm in farms}
+    farm_keys = {_farmKey(farm): farm for farm in farms}
+    with SearchCursor(clu_layer, ['SHAPE@', farm_field] + fields, spatial_reference=sr) as cursor:
+        for shape, farm, *values in cursor:
+            farm = farm_keys.get(_farmKey(farm))
+            if farm is not None:
+                # AsShape rebuilds geometry from an esri JSON dict, not the JSON text, in the worker
+                partitions[farm].append((loads(shape.JSON), *values))
+    return fields, partitions
+
+
+def _farmKey(farm):
+    # Farm numbers match whether or not they are zero padded
+    return str(farm).strip().lstrip('0')
+
+
+def _fingerprint(admin, rows):
+    return sha1(dumps([admin, sorted(dumps(row, default=str) for row in rows)]).encode()).hexdigest()
+
+
+def createProject(job):
+    ''' Create one project folder and geodatabase from a job built by createProjects. Returns a manifest entry.'''
+    start = perf_counter()
+    project_folder = job['folder']
+    project = GNTProject(path.join(project_folder, f"{path.basename(project_folder).replace(' ', '_')}_GNTData.gdb"))
+    result = {'farm': job['admin']['farm_number'], 'folder': project_folder, 'fingerprint': job['fingerprint'],
+              'fields': 0, 'errors': []}
+
+    try:
+        makedirs(project.reports_folder, exist_ok=True)
+        # A geodatabase left by an interrupted run is not in the manifest as complete, so it is rebuilt
+        if path.exists(project.gdb_path):
+            rmtree(project.gdb_path)
+        copyProjectSeed(project.gdb_path, SpatialReference(job['wkid']))
+
+        admin = job['admin']
+        with InsertCursor(project.admin_table, ADMIN_TABLE_FIELDS) as cursor:
+            cursor.insertRow([job['fips'][field] if field in job['fips'] else admin.get(field, '') for field in ADMIN_TABLE_FIELDS])
+
+        rows = ((AsShape(shape, True), *values) for shape, *values in job['rows'])
+        result['fields'] = insertCLURows(project.gnt_layer, rows, job['source_fields'], readFieldMap(), {'farm': admin['farm_number']})
+
+        with open(project.log_path, 'a+') as f:
+            f.write('\n######################################################################\n')
+            f.write('Executing Tool: Batch Create Projects\n')
+            f.write(f"User Name: {getuser()}\n")
+            f.write(f"Date Executed: {ctime()}\n")
+            f.write(f"\tAdmin State: {admin['state_name']}\n")
+            f.write(f"\tAdmin County: {admin['county_name']}\n")
+            f.write(f"\tFarm: {admin['farm_number']}\n")
+            f.write(f"\tFields Loaded: {result['fields']}\n")
+    except Exception as e:
+        result['errors'].append(str(e))
+    finally:
+        result['seconds'] = round(perf_counter() - start, 3)
+    return result
+
+
+def createProjects(clu_layer, admin_csv, wkid, root_folder=GNT_WORKSPACE, farm_field='farm_number', workers=None, force=False):
+    ''' Create projects for every farm in admin_csv in a process pool and write a JSON manifest to root_folder.
+    Raises ValueError if wkid is not a WGS 1984 UTM zone.'''
+    if not isWGS84UTM(wkid):
+        raise ValueError(f"--wkid {wkid} is not a WGS 1984 UTM zone, e.g. 32615 for Zone 15N")
+    start = perf_counter()
+    makedirs(root_folder, exist_ok=True)
+    manifest_path = path.join(root_folder, MANIFEST_NAME)
+    try:
+        with open(manifest_path) as f:
+            previous = {entry['farm']: entry for entry in load(f)['results']}
+    except (OSError, ValueError, KeyError):
+        previous = {}
+
+    farms = readAdminCSV(admin_csv)
+    field_map = readFieldMap()
+    source_fields, partitions = partitionCLU(clu_layer, farm_field, field_map, SpatialReference(wkid), farms)
+    fips_index = loadFipsIndex()
+    # Build the project seed once so workers only copy it
+    projectSeed(wkid)
+
+    results = []
+    jobs = []
+    for farm, admin in farms.items():
+        fips = fips_index.lookup(admin['state_name'], admin['county_name'])
+        if fips is None:
+            results.append({'farm': farm, 'folder': None, 'fields': 0, 'seconds': 0,
+                            'errors': [f"State and County FIPS codes could not be retrieved for {admin['state_name']}, {admin['county_name']}"]})
+            continue
+        if not partitions[farm]:
+            results.append({'farm': farm, 'folder': None, 'fields': 0, 'seconds': 0, 'errors': [f"No CLU fields found for farm {farm}"]})
+            continue
+
+        fingerprint = _fingerprint(admin, partitions[farm])
+        entry = previous.get(farm)
+        if entry and entry.get('folder') and path.exists(entry['folder']) and not entry['errors'] and not force:
+            # Keep the folder, and its year and month, from the earlier run
+            entry = dict(entry, skipped=True, seconds=0)
+            entry.pop('warning', None)
+            if entry['fingerprint'] != fingerprint:
+                entry['warning'] = 'Inputs changed since this project was created; use --force to rebuild it'
+            results.append(entry)
+            continue
+
+        folder = entry['folder'] if entry and entry.get('folder') else path.join(root_folder, projectFolderName(fips.stpostal, fips.countyfp, farm, datetime.now()))
+        jobs.append({'folder': folder, 'wkid': wkid, 'admin': admin, 'rows': partitions[farm], 'source_fields': source_fields,
+                     'fingerprint': fingerprint,
+                     'fips': {'state_code': fips.statefp, 'state': fips.stpostal.lower(), 'county_code': fips.countyfp}})
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers or min(len(jobs), cpu_count() or 1)) as executor:
+            futures = [executor.submit(createProject, job) for job in jobs]
+            for future in as_completed(futures):
+                results.append(future.result())
+
+    for result in sorted(results, key=lambda result: result['farm']):
+        status = 'SKIPPED' if result.get('skipped') else 'FAILED' if result['errors'] else 'OK'
+        print(f"{status:>7} {result['farm']} {result['folder'] or ''} ({result['fields']} fields, {result['seconds']}s)")
+        for message in result['errors'] + ([result['warning']] if result.get('warning') else []):
+            print(f"\t{message}")
+
+    manifest = {
+        'clu_layer': clu_layer,
+        'admin_csv': admin_csv,
+        'wkid': wkid,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'projects': len(results),
+        'created': sum(1 for result in results if not result['errors'] and not result.get('skipped')),
+        'skipped': sum(1 for result in results if result.get('skipped')),
+        'failed': sum(1 for result in results if result['errors']),
+        'seconds': round(perf_counter() - start, 3),
+        'results': sorted(results, key=lambda result: result['farm'])
+    }
+    with open(manifest_path, 'w') as f:
+        dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('clu_layer', help='CLU feature class with a farm number field')
+    parser.add_argument('admin_csv', help=f"CSV of admin attributes with columns: {', '.join(ADMIN_CSV_FIELDS)}")
+    parser.add_argument('--wkid', type=int, required=True, help='WGS 1984 UTM spatial reference for the projects, e.g. 32615')
+    parser.add_argument('--root', default=GNT_WORKSPACE, help='Folder to create project folders in (default C:\\GNT)')
+    parser.add_argument('--farm-field', default='farm_number', help='CLU farm number field (default farm_number)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default one per CPU)')
+    parser.add_argument('--force', action='store_true', help='Rebuild projects already created by an earlier run')
+    args = parser.parse_args()
+    if not isWGS84UTM(args.wkid):
+        parser.error(f"--wkid {args.wkid} is not a WGS 1984 UTM zone, e.g. 32615 for Zone 15N")
+
+    manifest = createProjects(args.clu_layer, args.admin_csv, args.wkid, args.root, args.farm_field, args.workers, args.force)
+    print(f"\nCreated {manifest['created']}, skipped {manifest['skipped']}, failed {manifest['failed']} of {manifest['projects']} projects in {manifest['seconds']}s")
@@ -0,0 +1,127 @@
+r''' Headless bulk export of MMP files for every GNT project geodatabase under a root folder.
+
+Usage, from the ArcGIS Pro Python environment:
+    python Batch_Export_MMP.py C:\GNT [--workers 4] [--manifest C:\GNT\mmp_export_manifest.json]
+
+Each *_GNTData.gdb has its Admin_Table and GNTFieldLayer read directly, so no ArcGIS Pro project needs to be
+open, and its .mmp is written to the project CNMP_Reports folder without launching MMP. An existing .mmp only has
+its GNT data patched, so edits made in MMP are kept, and projects whose .mmp MMP would refuse are reported as failed.
+'''
+from argparse import ArgumentParser
+from concurrent.futures import as_completed, ProcessPoolExecutor
+from datetime import datetime
+from json import dump
+from os import cpu_count, makedirs, path, walk
+from time import perf_counter
+
+from arcpy import Exists
+
+from gnt_project import GNTProject
+from gnt_core.mmp import ADMIN_FIELDS, adminData, expectFields, FIELD_RECORD_FIELDS, fieldRecords, getTemplate, loadMMPIndex, \
+    mergeMMPFile, MMP_INSTALL_FOLDER, mmpStateInfo, validateMMPFile
+
+
+GDB_SUFFIX = '_GNTData.gdb'
+
+
+def findProjectGDBs(root_folder):
+    ''' Return the GNT project geodatabases under root_folder, sorted by path.'''
+    gdbs = []
+    for folder, sub_folders, _ in walk(root_folder):
+        for sub_folder in list(sub_folders):
+            if sub_folder.endswith(GDB_SUFFIX):
+                gdbs.append(path.join(folder, sub_folder))
+                sub_folders.remove(sub_folder) # don't descend into the geodatabase
+    return sorted(gdbs)
+
+
+def _countRows(rows, result):
+    for row in rows:
+        result['fields'] += 1
+        yield row
+
+
+def exportProject(gntdataGDB_path):
+    ''' Write the MMP file for one project geodatabase. Returns a manifest entry for the project.'''
+    start = perf_counter()
+    project = GNTProject(gntdataGDB_path)
+    outputMMPFile = path.join(project.reports_folder, f"{project.name}.mmp")
+    result = {'project': project.name, 'gdb': gntdataGDB_path, 'output': outputMMPFile, 'fields': 0, 'errors': []}
+
+    try:
+        for required in (project.admin_table, project.gnt_layer):
+            if not Exists(required):
+                result['errors'].append(f"Missing {path.basename(required)}")
+        if result['errors']:
+            return result
+
+        admin_data = adminData(project.admin(ADMIN_FIELDS))
+
+        state_info = mmpStateInfo(admin_data['State'])
+        if state_info.mmp_version is None:
+            result['errors'].append(f"Failed to locate MMP software install location. Expected to be in {MMP_INSTALL_FOLDER}")
+        elif state_info.mmi_file is None or state_info.mms_file is None:
+            result['errors'].append(f"Failed to locate the mmi or mms files for state '{admin_data['State']}'")
+        elif state_info.mmi_RevDate is None or state_info.mms_RevDate is None:
+            result['errors'].append('Failed to retrieve RevDate from state mmi or mms files')
+        if result['errors']:
+            return result
+
+        makedirs(project.reports_folder, exist_ok=True)
+        now = datetime.today()
+        expected_fields = {}
+        records = expectFields(fieldRecords(_countRows(project.iterFieldRows(FIELD_RECORD_FIELDS), result)), expected_fields)
+        result['changes'] = mergeMMPFile(getTemplate(), outputMMPFile, lambda mmp_path: validateMMPFile(mmp_path, expected_fields),
+                                         mmp_version=state_info.mmp_version, run_date=now.strftime('%Y-%m-%d'),
+                                         run_time=now.strftime('%H:%M:%S'), mmi_RevDate=state_info.mmi_RevDate,
+                                         mms_RevDate=state_info.mms_RevDate, admin_data=admin_data, gnt_fields=records)
+    except Exception as e:
+        result['errors'].append(str(e))
+    finally:
+        result['seconds'] = round(perf_counter() - start, 3)
+    return result
+
+
+def exportProjects(root_folder, workers=None, manifest_path=None):
+    ''' Export MMP files for all projects under root_folder in a process pool and write a JSON manifest.'''
+    start = perf_counter()
+    gdbs = findProjectGDBs(root_folder)
+    # Warm the MMP install index once so workers only read it
+    loadMMPIndex()
+
+    results = []
+    if gdbs:
+        with ProcessPoolExecutor(max_workers=workers or min(len(gdbs), cpu_count() or 1)) as executor:
+            futures = [executor.submit(exportProject, gdb) for gdb in gdbs]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                status = 'FAILED' if result['errors'] else 'OK'
+                print(f"{status:>6} {result['project']} ({result['fields']} fields, {result['seconds']}s)")
+                for error in result['errors']:
+                    print(f"\t{error}")
+
+    manifest = {
+        'root_folder': root_folder,
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'projects': len(results),
+        'exported': sum(1 for result in results if not result['errors']),
+        'failed': sum(1 for result in results if result['errors']),
+        'seconds': round(perf_counter() - start, 3),
+        'results': sorted(results, key=lambda result: result['gdb'])
+    }
+    manifest_path = manifest_path or path.join(root_folder, 'mmp_export_manifest.json')
+    with open(manifest_path, 'w') as f:
+        dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('root_folder', help='Folder containing GNT project folders, e.g. C:\\GNT')
+    parser.add_argument('--workers', type=int, help='Worker processes (default one per CPU)')
+    parser.add_argument('--manifest', help='Manifest JSON path (default <root_folder>\\mmp_export_manifest.json)')
+    args = parser.parse_args()
+
+    manifest = exportProjects(args.root_folder, args.workers, args.manifest)
+    print(f"\nExported {manifest['exported']} of {manifest['projects']} projects in {manifest['seconds']}s")
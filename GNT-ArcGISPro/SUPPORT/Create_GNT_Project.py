@@ -4,14 +4,19 @@ from os import mkdir, path
 from sys import argv, exit
 from time import ctime
 
-from arcpy import AddFieldDelimiters, env, Exists, GetParameterAsText, SetProgressorLabel, SpatialReference
+from arcpy import env, Exists, GetParameterAsText, SetProgressorLabel
 from arcpy.conversion import FeatureClassToFeatureClass
-from arcpy.da import InsertCursor, SearchCursor, UpdateCursor
-from arcpy.management import Append, Compact, CreateFeatureDataset, CreateFileGDB, CreateTable, \
+from arcpy.da import InsertCursor
+from arcpy.management import Compact, CreateFeatureDataset, CreateTable, \
     DeleteRows, GetCount, ImportContingentValues
-from arcpy.mp import ArcGISProject, LayerFile
+from arcpy.mp import ArcGISProject
 
-from utils import addLyrxByConnectionProperties, AddMsgAndPrint, errorMsg
+from clu import ingestCLU
+from fips import loadFipsIndex
+from gnt_core.spatial_ref import isWGS84UTM
+from gnt_project import ADMIN_TABLE_FIELDS, GNT_WORKSPACE, projectFolderName
+from project_seed import copyProjectSeed
+from utils import AddMsgAndPrint, errorMsg, lyrxLayer, MapLayers, spatialReference
 
 
 textFilePath = ''
@@ -52,7 +57,7 @@ if mapSR.type != 'Projected':
     AddMsgAndPrint('\nExiting...', 2)
     exit()
 
-if 'WGS' not in mapSR.name or '1984' not in mapSR.name or 'UTM' not in mapSR.name:
+if not isWGS84UTM(mapSR.factoryCode):
     AddMsgAndPrint('\nThe Determinations map is not using a UTM coordinate system tied to WGS 1984.', 2)
     AddMsgAndPrint('\nPlease assign a WGS 1984 UTM coordinate system to the Determinations map that is appropriate for your site.', 2)
     AddMsgAndPrint('\nThese systems are found in the Determinations Map Properties under: Coordinate Systems -> Projected Coordinate System -> UTM -> WGS 1984.', 2)
@@ -62,7 +67,7 @@ if 'WGS' not in mapSR.name or '1984' not in mapSR.name or 'UTM' not in mapSR.nam
 
 
 ### ESRI Environment Settings ###
-mapSR = SpatialReference(mapSR.factoryCode)
+mapSR = spatialReference(mapSR.factoryCode)
 env.outputCoordinateSystem = mapSR
 env.overwriteOutput = True
 
@@ -93,59 +98,27 @@ start_month = str(months[start_month])
 
 
 try:
-    workspacePath = 'C:\GNT'
+    workspacePath = GNT_WORKSPACE
     # Check Inputs for existence and create FIPS code variables
-    # Search for FIPS codes to give to the Extract CLU Tool/Function. Break after the first row (should only find one row in any case).
-    # Temporarily adjust source county to handle apostrophes in relation to searching
-    county = county.replace("'", "''")
-    stfip, cofip = '', ''
-    fields = ['STATEFP','COUNTYFP','NAME','STATE','STPOSTAL']
-    expression = "{} = '{}'".format(AddFieldDelimiters(lut,fields[3]), state) + " AND " + "{} = '{}'".format(AddFieldDelimiters(lut,fields[2]), county)
-    with SearchCursor(lut, fields, where_clause = expression) as cursor:
-        for row in cursor:
-            stfip = row[0]
-            cofip = row[1]
-            adStatePostal = row[4]
-            break
-
-    if len(stfip) != 2 and len(cofip) != 3:
+    # Look up FIPS codes from the cached lut_census_fips index, which matches names regardless of case and apostrophes
+    fips = loadFipsIndex(lut).lookup(state, county)
+    if fips is None or (len(fips.statefp) != 2 and len(fips.countyfp) != 3):
         AddMsgAndPrint('State and County FIPS codes could not be retrieved! Exiting...', 2)
         exit()
+    stfip, cofip, adStatePostal = fips
 
     if adStatePostal == '':
         AddMsgAndPrint('State postal code could not be retrieved! Exiting...', 2)
         exit()
 
-    # Change sourceCounty back to handle apostrophes
-    sourceCounty = county.replace("''", "'")
-        
     # Transfer found values to variables to use for project creation
     adminState = stfip
     adminCounty = cofip
     postal = adStatePostal.lower()
 
-    # Get the current year and month for use in project naming
-    year = str(datetime.now().year)
-    month = str(datetime.now().month)
-
-    # Refine the tract number and month number to be padded with zeros to create uniform length of project name
-    source_farm = str(farm)
-    farm_length = len(source_farm)
-    if farm_length < 7:
-        addzeros = 7 - farm_length
-        farm_name = '0'*addzeros + str(source_farm)
-    else:
-        farm_name = source_farm
-
-    monthlength = len(month)
-    if monthlength < 2:
-        finalmonth = '0' + month
-    else:
-        finalmonth = month
-
-    # Build project folder path
+    # Build project folder path, named by county, zero padded farm number and the current year and month
     # if project_type == 'New':
-    projectFolder = path.join(workspacePath, f"{postal}{adminCounty}_{farm_name}_{year}_{finalmonth}")
+    projectFolder = path.join(workspacePath, projectFolderName(postal, adminCounty, farm, datetime.now()))
     # else:
     #     # Get project folder path from user input. Validation was done during script validations on the input
     #     if existing_folder != '':
@@ -180,11 +153,6 @@ try:
     setback_polygon_name = 'Setback_Polygon'
     setback_polygon_path = path.join(basedataFD, setback_polygon_name)
 
-    gntfield_lyrx = LayerFile(path.join(path.join(path.dirname(argv[0]), 'LayerFiles'), 'GNTFieldLayer.lyrx')).listLayers()[0]
-    setback_point_lyrx = LayerFile(path.join(path.join(path.dirname(argv[0]), 'LayerFiles'), 'Setback_Point.lyrx')).listLayers()[0]
-    setback_line_lyrx = LayerFile(path.join(path.join(path.dirname(argv[0]), 'LayerFiles'), 'Setback_Line.lyrx')).listLayers()[0]
-    setback_polygon_lyrx = LayerFile(path.join(path.join(path.dirname(argv[0]), 'LayerFiles'), 'Setback_Polygon.lyrx')).listLayers()[0]
-
     point_FG_CSV = path.join(path.join(path.dirname(argv[0]), 'SetbackFeatureTypes'), 'Point_FieldGroup.csv')
     point_CV_CSV = path.join(path.join(path.dirname(argv[0]), 'SetbackFeatureTypes'), 'Point_ContingentValue.csv')
     line_FG_CSV = path.join(path.join(path.dirname(argv[0]), 'SetbackFeatureTypes'), 'Line_FieldGroup.csv')
@@ -215,7 +183,7 @@ try:
             exit()
 
     # Start logging to text file after project folder exists
-    logBasicSettings(textFilePath, state, sourceCounty, farm)
+    logBasicSettings(textFilePath, state, county, farm)
 
     SetProgressorLabel('Creating project contents...')
     if not path.exists(reports_folder):
@@ -227,10 +195,14 @@ try:
             AddMsgAndPrint('\nCould not access C:\GNT. Check your permissions for C:\GNT. Exiting...\n', 2, textFilePath)
             exit()
 
+    # A new project geodatabase is copied from the project seed, which already has the Layers dataset, empty layers
+    # with contingent values and Admin_Table. An existing one is updated item by item to keep its other contents.
+    seeded = False
     if not Exists(gntdataGDB_path):
-        AddMsgAndPrint('\nCreating Base Data geodatabase...', textFilePath=textFilePath)
-        SetProgressorLabel('Creating Base Data geodatabase...')
-        CreateFileGDB(projectFolder, gntdataGDB_name)
+        AddMsgAndPrint('\nCreating Base Data geodatabase from project seed...', textFilePath=textFilePath)
+        SetProgressorLabel('Creating Base Data geodatabase from project seed...')
+        copyProjectSeed(gntdataGDB_path, mapSR)
+        seeded = True
 
     if not Exists(basedataFD):
         AddMsgAndPrint('\nCreating Base Data feature dataset...', textFilePath=textFilePath)
@@ -239,80 +211,77 @@ try:
 
 
     ### Create Admin Table ###
-    if Exists(admin_table):
-        SetProgressorLabel('Located project Admin Table...')
-        recordsCount = int(GetCount(admin_table)[0])
-        if recordsCount > 0:
-            DeleteRows(admin_table)
-            AddMsgAndPrint('\nCleared existing rows from project Admin Table...', textFilePath=textFilePath)
-    else:
-        SetProgressorLabel('Creating Admin Table...')
-        CreateTable(gntdataGDB_path, 'Admin_Table', template_table)
-        AddMsgAndPrint('\nCreated Admin Table...', textFilePath=textFilePath)
+    # The seeded Admin_Table is already empty
+    if not seeded:
+        if Exists(admin_table):
+            SetProgressorLabel('Located project Admin Table...')
+            recordsCount = int(GetCount(admin_table)[0])
+            if recordsCount > 0:
+                DeleteRows(admin_table)
+                AddMsgAndPrint('\nCleared existing rows from project Admin Table...', textFilePath=textFilePath)
+        else:
+            SetProgressorLabel('Creating Admin Table...')
+            CreateTable(gntdataGDB_path, 'Admin_Table', template_table)
+            AddMsgAndPrint('\nCreated Admin Table...', textFilePath=textFilePath)
 
 
     ### Populate Admin Table Row ###
     AddMsgAndPrint('\nUpdating Admin Table...', textFilePath=textFilePath)
     SetProgressorLabel('Updating Admin Table...')
-    field_names = ['state_code','state','state_name','county_code','county_name','farm_number','operation_name','street','city',
-                   'zip','contact_name','office_phone','home_phone','email','notes','start_year','start_month','plan_years']
     row = (stfip, postal, state, cofip, county, farm, op_name, street, city, zipcode, contact_name, office_phone, home_phone,
            email, notes, start_year, start_month, plan_years)
-    with InsertCursor(admin_table, field_names) as cursor:
+    with InsertCursor(admin_table, ADMIN_TABLE_FIELDS) as cursor:
         cursor.insertRow(row)
 
 
     ### Create Setbacks and GNT Layers in Project GDB ###
-    AddMsgAndPrint('\nCreating Setback Layers in project geodatabase...', textFilePath=textFilePath)
-    SetProgressorLabel('Creating Setback Layers in project geodatabase...')
-    FeatureClassToFeatureClass(template_point, basedataFD, setback_point_name)
-    FeatureClassToFeatureClass(template_line, basedataFD, setback_line_name)
-    FeatureClassToFeatureClass(template_polygon, basedataFD, setback_polygon_name)
-
-    AddMsgAndPrint('\nCreating GNT Field Layer in project geodatabase...', textFilePath=textFilePath)
-    SetProgressorLabel('Creating GNT Field Layer in project geodatabase...')
-    FeatureClassToFeatureClass(template_gnt, basedataFD, 'GNTFieldLayer')
-    Append(crop_layer, gntfield_path, 'NO_TEST', field_mapping=
-           r'LandIDGUID "LandIDGUID" true true false 40 Text 0 0,First,#,case_plus,plu_id,-1,-1;' +
-           r'ID "ID" true true false 15 Text 0 0,First,#,case_plus,tract,-1,-1;' +
-           r'SubID "SubID" true true false 5 Text 0 0,First,#,case_plus,plu_number,0,254;' +
-           r'Size "Size" true true false 8 Double 0 0,First,#,case_plus,calc_acres,-1,-1;' +
-           r'FSATract "FSATract" true true false 4 Long 0 0,First,#,case_plus,tract,-1,-1;' +
-           r'FSAField "FSAField" true true false 4 Long 0 0,First,#,case_plus,plu_number,0,254;' +
-           r'LandUseIdText "LandUseIdText" true true false 35 Text 0 0,First,#,case_plus,land_use,0,254')
-
-    # Add FarmID value to GNTFieldLayer
-    with UpdateCursor(gntfield_path, ['FarmID']) as cur:
-        for row in cur:
-            row[0] = farm
-            cur.updateRow(row)
+    if not seeded:
+        AddMsgAndPrint('\nCreating Setback Layers in project geodatabase...', textFilePath=textFilePath)
+        SetProgressorLabel('Creating Setback Layers in project geodatabase...')
+        FeatureClassToFeatureClass(template_point, basedataFD, setback_point_name)
+        FeatureClassToFeatureClass(template_line, basedataFD, setback_line_name)
+        FeatureClassToFeatureClass(template_polygon, basedataFD, setback_polygon_name)
+
+        AddMsgAndPrint('\nCreating GNT Field Layer in project geodatabase...', textFilePath=textFilePath)
+        SetProgressorLabel('Creating GNT Field Layer in project geodatabase...')
+        FeatureClassToFeatureClass(template_gnt, basedataFD, 'GNTFieldLayer')
+
+    AddMsgAndPrint('\nLoading CLU fields into GNT Field Layer...', textFilePath=textFilePath)
+    SetProgressorLabel('Loading CLU fields into GNT Field Layer...')
+    # One read of crop_layer and one write to GNTFieldLayer, with fields mapped by CLU_FieldMap.csv
+    ingestCLU(crop_layer, gntfield_path, {'farm': farm})
 
 
     ### Import Contingent Values to Project GDB ###
-    ImportContingentValues(setback_point_path, point_FG_CSV, point_CV_CSV, 'REPLACE')
-    ImportContingentValues(setback_line_path, line_FG_CSV, line_CV_CSV, 'REPLACE')
-    ImportContingentValues(setback_polygon_path, polygon_FG_CSV, polygon_CV_CSV, 'REPLACE')
+    if not seeded:
+        ImportContingentValues(setback_point_path, point_FG_CSV, point_CV_CSV, 'REPLACE')
+        ImportContingentValues(setback_line_path, line_FG_CSV, line_CV_CSV, 'REPLACE')
+        ImportContingentValues(setback_polygon_path, polygon_FG_CSV, polygon_CV_CSV, 'REPLACE')
 
 
     ### Remove Existing CLU Layers From Map ###
     AddMsgAndPrint('\nRemoving GNT Field and Setback layers from project map, if present...', textFilePath=textFilePath)
     SetProgressorLabel('Removing GNT Field and Setback layers from project map, if present...')
     mapLayersToRemove = [gntfield_name, setback_point_name, setback_line_name, setback_polygon_name]
+    map_layers = MapLayers(map)
+    for name in mapLayersToRemove:
+        map_layers.remove(name)
     try:
         for maps in aprx.listMaps():
-            for lyr in maps.listLayers():
-                if lyr.longName in mapLayersToRemove:
-                    maps.removeLayer(lyr)
+            if maps.name != map.name:
+                other_layers = MapLayers(maps)
+                for name in mapLayersToRemove:
+                    other_layers.remove(name)
+                other_layers.apply()
     except:
         pass
 
 
     ### Add GNTFieldLayer and Setback Layers to Map ###
-    lyr_name_list = [lyr.longName for lyr in map.listLayers()]
-    addLyrxByConnectionProperties(map, lyr_name_list, gntfield_lyrx, gntdataGDB_path)
-    addLyrxByConnectionProperties(map, lyr_name_list, setback_point_lyrx, gntdataGDB_path)
-    addLyrxByConnectionProperties(map, lyr_name_list, setback_line_lyrx, gntdataGDB_path)
-    addLyrxByConnectionProperties(map, lyr_name_list, setback_polygon_lyrx, gntdataGDB_path)
+    # Removes and adds on the GNT map are applied together; layer files are only read here, when they are needed
+    for name in mapLayersToRemove:
+        map_layers.addLyrx(lyrxLayer(f"{name}.lyrx"), gntdataGDB_path)
+    map_layers.apply()
 
     # Close and Reopen Map - BUG: Pro says setback layers are not editable
     aprx.closeViews()
@@ -3,13 +3,14 @@ from os import path
 from sys import exit
 from time import ctime
 
-from arcpy import AddFieldDelimiters, Describe, env, GetParameterAsText, SetProgressorLabel, SpatialReference
-from arcpy.analysis import Buffer, Erase, Union
-from arcpy.da import SearchCursor, UpdateCursor
-from arcpy.management import CalculateGeometryAttributes, Compact, Dissolve, MakeFeatureLayer
-from arcpy.mp import ArcGISProject, LayerFile
+from arcpy import env, GetParameterAsText, SetProgressorLabel
+from arcpy.management import Compact
+from arcpy.mp import ArcGISProject
 
-from utils import addLyrxByConnectionProperties, AddMsgAndPrint, deleteLayers, errorMsg
+from gnt_project import GNTProject
+from setbacks import bufferSetbackFeatures, bufferSetbackLines, calculateSpreadableAcres, eraseSetbackBuffers, \
+    mergeSetbackBuffers, writeSpreadableAcres
+from utils import AddMsgAndPrint, deleteLayers, errorMsg, lyrxLayer, MapLayers, spatialReference
 
 
 textFilePath = ''
@@ -33,7 +34,7 @@ except:
 
 
 ### ESRI Environment Settings ###
-mapSR = SpatialReference(map.spatialReference.factoryCode)
+mapSR = spatialReference(map.spatialReference.factoryCode)
 env.outputCoordinateSystem = mapSR
 env.overwriteOutput = True
 
@@ -42,10 +43,10 @@ env.overwriteOutput = True
 gnt_layer = GetParameterAsText(0)
 
 # Get the basedataGDB_path from the input GNT layer
-gnt_layer_path = Describe(gnt_layer).CatalogPath
-if gnt_layer_path.find('.gdb') > 0 and gnt_layer_path.find('GNT') > 0 and gnt_layer_path.find('GNTFieldLayer') > 0:
-    gntdataGDB_path = gnt_layer_path[:gnt_layer_path.find('.gdb')+4]
-else:
+try:
+    project = GNTProject.fromLayer(gnt_layer)
+    gntdataGDB_path = project.gdb_path
+except ValueError:
     AddMsgAndPrint('\nSelected GNT Field layer is not from a GNT project folder. Exiting...', 2)
     exit()
 
@@ -55,12 +56,11 @@ base_dir = path.abspath(path.dirname(__file__)) #\SUPPORT
 support_gdb = path.join(base_dir, 'SUPPORT.gdb')
 scratch_gdb = path.join(base_dir, 'scratch.gdb')
 
-gntdataGDB_name = path.basename(gntdataGDB_path)
-gntdataFD_name = 'Layers'
-gntdataFD = path.join(gntdataGDB_path, gntdataFD_name)
-userWorkspace = path.dirname(gntdataGDB_path)
-projectName = path.basename(userWorkspace).replace(' ', '_')
-textFilePath = path.join(userWorkspace, f"{projectName}_log.txt")
+gntdataGDB_name = project.gdb_name
+gntdataFD = project.fd_path
+userWorkspace = project.folder
+projectName = project.name
+textFilePath = project.log_path
 
 setback_point = path.join(gntdataFD, 'Setback_Point')
 setback_line = path.join(gntdataFD, 'Setback_Line')
@@ -69,120 +69,68 @@ setback_buffer = path.join(gntdataFD, 'Setback_Buffer')
 erased_fields = path.join(gntdataFD, 'GNTField_Erase')
 
 point_buffer_temp = path.join(scratch_gdb, 'point_buffer_temp')
-line_left_temp = path.join(scratch_gdb, 'line_left_buffer')
-line_right_temp = path.join(scratch_gdb, 'line_right_buffer')
-line_both_temp = path.join(scratch_gdb, 'line_both_buffer')
+line_parts_temp = path.join(scratch_gdb, 'line_buffer_parts')
+line_buffer_temp = path.join(scratch_gdb, 'line_buffer_temp')
 polygon_buffer_temp = path.join(scratch_gdb, 'polygon_buffer_temp')
 final_buffer_temp = path.join(scratch_gdb, 'final_buffer_temp')
 
-deleteLayers([point_buffer_temp, line_left_temp, line_right_temp, line_both_temp, polygon_buffer_temp, final_buffer_temp])
-
-setback_buffer_lyrx = LayerFile(path.join(path.join(base_dir, 'LayerFiles'), 'Setback_Buffer.lyrx')).listLayers()[0]
-gntfield_final_lyrx = LayerFile(path.join(path.join(base_dir, 'LayerFiles'), 'GNTFieldLayer_Final.lyrx')).listLayers()[0]
-
 
 try:
     logBasicSettings(textFilePath, gnt_layer)
 
+    # Clear temp layers left by an earlier run
+    SetProgressorLabel('Preparing temp layers...')
+    deleteLayers([point_buffer_temp, line_parts_temp, line_buffer_temp, polygon_buffer_temp, final_buffer_temp])
+
     ### Setback Points ###
     SetProgressorLabel('Buffering Setback Point features...')
-    # Update Text BufferField with Feet
-    with UpdateCursor(setback_point, ['BufferDistance', 'BufferField']) as cursor:
-        for row in cursor:
-            row[1] = f"{row[0]} Feet"
-            cursor.updateRow(row)
-
-    Buffer(setback_point, point_buffer_temp, 'BufferField', dissolve_option='ALL')
+    bufferSetbackFeatures(setback_point, point_buffer_temp)
     AddMsgAndPrint('\nCreated Setback Point buffer...', textFilePath=textFilePath)
 
 
     ### Setback Lines ###
     SetProgressorLabel('Buffering Setback Line features...')
-    # Update Text BufferField with Feet
-    with UpdateCursor(setback_line, ['BufferDistance', 'BufferField']) as cursor:
-        for row in cursor:
-            row[1] = f"{row[0]} Feet"
-            cursor.updateRow(row)
-    
-    # Buffer Line Subsets by Side
-    where_left = """{0}='{1}'""".format(AddFieldDelimiters(gntdataGDB_path, 'BufferSides'), 'Left Side')
-    MakeFeatureLayer(setback_line, 'line_left', where_left)
-    Buffer('line_left', line_left_temp, 'BufferField', 'LEFT', dissolve_option='ALL')
-    AddMsgAndPrint('\nCreated Setback Line Left buffer...', textFilePath=textFilePath)
-
-    where_right = """{0}='{1}'""".format(AddFieldDelimiters(gntdataGDB_path, 'BufferSides'), 'Right Side')
-    MakeFeatureLayer(setback_line, 'line_right', where_right)
-    Buffer('line_right', line_right_temp, 'BufferField', 'RIGHT', dissolve_option='ALL')
-    AddMsgAndPrint('\nCreated Setback Line Right buffer...', textFilePath=textFilePath)
-
-    where_both = """{0}='{1}'""".format(AddFieldDelimiters(gntdataGDB_path, 'BufferSides'), 'Both Sides')
-    MakeFeatureLayer(setback_line, 'line_both', where_both)
-    Buffer('line_both', line_both_temp, 'BufferField', dissolve_option='ALL')
-    AddMsgAndPrint('\nCreated Setback Line Both buffer...', textFilePath=textFilePath)
+    skipped_sides = []
+    bufferSetbackLines(setback_line, line_parts_temp, line_buffer_temp, mapSR, skipped_sides)
+    if skipped_sides:
+        AddMsgAndPrint(f"\nSkipped {len(skipped_sides)} Setback Line feature(s) with a missing or unknown BufferSides value: "
+                       f"{', '.join(sorted({str(side) for side in skipped_sides}))}", 1, textFilePath)
+    AddMsgAndPrint('\nCreated Setback Line Left, Right and Both buffers...', textFilePath=textFilePath)
 
 
     ### Setback Polygons ###
     SetProgressorLabel('Buffering Setback Polygon features...')
-    # Update Text BufferField with Feet
-    with UpdateCursor(setback_polygon, ['BufferDistance', 'BufferField']) as cursor:
-        for row in cursor:
-            row[1] = f"{row[0]} Feet"
-            cursor.updateRow(row)
-
-    Buffer(setback_polygon, polygon_buffer_temp, 'BufferField', dissolve_option='ALL')
+    bufferSetbackFeatures(setback_polygon, polygon_buffer_temp)
     AddMsgAndPrint('\nCreated Setback Polygon buffer...', textFilePath=textFilePath)
 
 
     ### Union and Dissolve Buffers to Create Final Setback Layer ###
     SetProgressorLabel('Creating final Setback Buffer layer...')
-    Union([point_buffer_temp, line_left_temp, line_right_temp, line_both_temp, polygon_buffer_temp], final_buffer_temp)
-    Dissolve(final_buffer_temp, setback_buffer)
+    mergeSetbackBuffers([point_buffer_temp, line_buffer_temp, polygon_buffer_temp], final_buffer_temp, setback_buffer)
     AddMsgAndPrint('\nCreated Final Setback buffer...', textFilePath=textFilePath)
 
 
     ### Erase Setback Buffers from GNT Fields and Calculate Spreadable Acres ###
     SetProgressorLabel('Calculating Spreadable Acres...')
-    Erase(gnt_layer, setback_buffer, erased_fields)
-    CalculateGeometryAttributes(erased_fields, [['SpreadSize', 'AREA_GEODESIC']], area_unit='ACRES')
-
-    spreadable = {}
-    fields = ['LandIDGUID', 'SpreadSize']
-    
-    with SearchCursor(erased_fields, fields) as cursor:
-        for row in cursor:
-            spreadable[row[0]] = row[1] #round(row[1], 1)
-
-    with UpdateCursor(gnt_layer, fields) as cursor:
-        for row in cursor:
-            try:
-                row[1] = spreadable[row[0]]
-            except KeyError:
-                row[1] = 0.0
-            cursor.updateRow(row)
+    eraseSetbackBuffers(gnt_layer, setback_buffer, erased_fields)
+    spreadable = calculateSpreadableAcres(erased_fields)
+    writeSpreadableAcres(gnt_layer, spreadable)
 
     AddMsgAndPrint('\nCalculated Spreadable Acres...', textFilePath=textFilePath)
 
 
     ### Adjust Final Map Layers ###
-    for lyr in map.listLayers():
-        if lyr.longName == 'GNTFieldLayer':
-            map.removeLayer(lyr)
-
-    lyr_name_list = [lyr.longName for lyr in map.listLayers()]
-    addLyrxByConnectionProperties(map, lyr_name_list, gntfield_final_lyrx, gntdataGDB_path)
-    addLyrxByConnectionProperties(map, lyr_name_list, setback_buffer_lyrx, gntdataGDB_path)
-
-    for lyr in map.listLayers():
-        if lyr.longName == 'Setback_Point':
-            lyr.visible = False
-        if lyr.longName == 'Setback_Line':
-            lyr.visible = False
-        if lyr.longName == 'Setback_Polygon':
-            lyr.visible = False
+    map_layers = MapLayers(map)
+    map_layers.remove('GNTFieldLayer')
+    map_layers.addLyrx(lyrxLayer('GNTFieldLayer_Final.lyrx'), gntdataGDB_path)
+    map_layers.addLyrx(lyrxLayer('Setback_Buffer.lyrx'), gntdataGDB_path)
+    for name in ['Setback_Point', 'Setback_Line', 'Setback_Polygon']:
+        map_layers.setVisible(name, False)
+    map_layers.apply()
 
 
     SetProgressorLabel('Cleaning up temp layers...')
-    deleteLayers([point_buffer_temp, line_left_temp, line_right_temp, line_both_temp, polygon_buffer_temp, final_buffer_temp])
+    deleteLayers([point_buffer_temp, line_parts_temp, line_buffer_temp, polygon_buffer_temp, final_buffer_temp])
 
     ### Compact Geodatabase ###
     try:
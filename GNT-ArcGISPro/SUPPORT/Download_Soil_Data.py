@@ -1,22 +1,22 @@
-from datetime import datetime
 from getpass import getuser
-from json import dumps, loads
+from json import loads
 from os import path
-from requests import ConnectionError, ReadTimeout, request
 from time import ctime
 
-from arcpy import Describe, env, Exists, GetParameterAsText, FromWKT, SetProgressorLabel, SpatialReference
-from arcpy.analysis import SummarizeWithin
-from arcpy.da import InsertCursor, SearchCursor, UpdateCursor
-from arcpy.management import AddField, CreateFeatureclass, CreateTable, Dissolve
+from arcpy import Describe, env, Exists, GetParameterAsText, SetProgressorLabel
+from arcpy.da import SearchCursor
 from arcpy.mp import ArcGISProject
 
-from utils import AddMsgAndPrint, deleteLayers, errorMsg
-
-SDA_URL = r"https://sdmdataaccess.nrcs.usda.gov"
+from gnt_core.backends.arcpy_backend import ArcpyBackend
+from gnt_core.sda import ATTRIBUTE_TABLE_NAMES, attributeQuery, describeResponse, FIELD_SOILS_TABLE, fieldSoilsQuery, \
+    geometryQuery, LANDUNIT_LENGTH, readQuerySettings, requestBody, SDA_TABLE_NAMES, SDA_TIMEOUT, SDA_URL, sdaTables
+from gnt_core.soils import fieldSoilKeys, writeSDATable
+from gnt_core.spatial_ref import WGS84_WKID
+from gnt_project import GNTProject
+from utils import AddMsgAndPrint, errorMsg, MapLayers, spatialReference
 
 textFilePath = ''
-def logBasicSettings(textFilePath, gnt_layer):
+def logBasicSettings(textFilePath, gnt_layer, soil_map, settings):
     with open(textFilePath, 'a+') as f:
         f.write('\n######################################################################\n')
         f.write('Executing Tool: Download Soil Data\n')
@@ -24,211 +24,42 @@ def logBasicSettings(textFilePath, gnt_layer):
         f.write(f"Date Executed: {ctime()}\n")
         f.write('User Parameters:\n')
         f.write(f"\tGNTFieldLayer: {gnt_layer}\n")
+        f.write(f"\tDownload Soil Map: {soil_map}\n")
+        f.write(f"\tSDA Query: {settings.query_file}, {settings.geometry} geometry\n")
 
 
-def AddNewFields(new_table, column_names, column_info):
-    '''
-    Create the empty output table using Soil Data Access table metadata.
-    ColumnNames and columnInfo come from the Attribute query JSON string.
-    MUKEY would normally be included in the list, but should already exist in the output featureclass.
-    '''
-    try:
-        # Dictionary: SQL Server to FGDB
-        dType = dict()
-        dType['int'] = 'long'
-        dType['bigint'] = 'long'
-        dType['smallint'] = 'short'
-        dType['tinyint'] = 'short'
-        dType['bit'] = 'short'
-        dType['varbinary'] = 'blob'
-        dType['nvarchar'] = 'text'
-        dType['varchar'] = 'text'
-        dType['char'] = 'text'
-        dType['datetime'] = 'date'
-        dType['datetime2'] = 'date'
-        dType['smalldatetime'] = 'date'
-        dType['decimal'] = 'double'
-        dType['numeric'] = 'double'
-        dType['float'] = 'double'
-        dType['udt'] = 'text'  # probably geometry or geography data
-        dType['xml'] = 'text'
-        dType['numeric'] = 'float'  # 4 bytes
-        dType['real'] = 'double' # 8 bytes
-
-        # Option for field aliases, Use uppercase physical name as key
-        dAliases = dict()
-        dAliases['MU_KFACTOR'] = 'Kw'
-        dAliases['SOIL_SLP_LGTH_FCTR'] = 'LS'
-        dAliases['MU_TFACTOR'] = 'T'
-        dAliases['NA1'] = 'C'
-        dAliases['MU_IFACTOR'] = 'WEI'
-        dAliases['SOIL_LCH_IND'] = 'LCH'
-        dAliases['LONG_LEAF_SUIT_IND'] = 'LLP'
-        dAliases['WESL_IND'] = 'WESL'
-        dAliases['NA2'] = 'Water EI'
-        dAliases['MUKEY'] = 'mukey'
-        dAliases['NA3'] = 'Wind EI'
-        dAliases['NCCPI'] = 'NCCPI'
-        dAliases['NA4'] = 'RKLS'
-        dAliases['CFACTOR'] = 'CFactor'
-        dAliases['RFACTOR'] = 'RFactor'
-        dAliases['NIRRCAPCLASS'] = 'NIrrCapClass'
-        dAliases['POLY_ACRES'] = 'PolyAcres'
-
-        # Iterate through list of field names and add them to the output table
-        i = 0
-        joinFields = list()
-        existingFlds = [fld.name.upper() for fld in Describe(new_table).fields]
-
-        for i, fldName in enumerate(column_names):
-            if fldName is None or fldName == '':
-                AddMsgAndPrint(f"Query for {path.basenaame(new_table)} returned an empty fieldname ({str(column_names)})", 2)
-                exit()
-
-            vals = column_info[i].split(',')
-            length = int(vals[1].split('=')[1])
-            precision = int(vals[2].split('=')[1])
-            scale = int(vals[3].split('=')[1])
-            dataType = dType[vals[4].lower().split('=')[1]]
-
-            if fldName.upper() in dAliases:
-                alias = dAliases[fldName.upper()]
-
-            else:
-                alias = fldName
-
-            if fldName.upper() == 'MUKEY':
-                # switch to SSURGO standard TEXT 30 chars
-                dataType = 'text'
-                length = 30
-                precision = ''
-                scale = ''
-
-            if fldName.upper() == 'MU_IFACTOR':
-                # switch to integer so that map legend sorts numerically instead of alphabetically
-                dataType = 'short'
-                length = 0
-                precision = ''
-                scale = ''
-
-            if not fldName.upper() in existingFlds and not dataType == 'udt' and not fldName.upper() in ['WKTGEOM', 'WKBGEOG', 'SOILGEOG']:
-                AddField(new_table, fldName, dataType, precision, scale, length, alias)
-                joinFields.append(fldName)
-
-        if Exists(new_table):
-            return joinFields
-        else:
-            return []
-
-    except:
-        errorMsg('Download Soil Data')
-        return []
-
-
-def FormSDA_Geom_Query(aoi):
+def FormSDA_Geom_Query(aoi, skipped=None):
     '''
     This is the spatial part of the query for GNT. Some mapunit and landunit attributes are returned
     Other queries can be appended, but they will need to reference the temporary table names used:
     AoiTable, AoiAcres, AoiSoils, AoiSoils2, AoiSoils3
+    Each field of aoi becomes its own AOI, with its SubID as the landunit. SubIDs too long to be a landunit are
+    appended to skipped.
     '''
     try:
-        # get spatial reference from aoiDiss, need to make sure appropriate datum transformation is applied
-        gcs = SpatialReference(4326)
-        wkt = ''
-        landunit = ''
-        now = datetime.now().strftime('%Y-%m-%d T%H:%M:%S')
-
-        # sQuery is the query string that will be incorporated into the SDA request
-        header = """/** SDA Query application="CRP" rule="GNT Soil Map" version="0.1" **/"""
-        sQuery =  header + "\n-- " + now
-        sQuery += """\n-- Declare all variables here
-~DeclareVarchar(@dateStamp,20)~
-~DeclareGeometry(@aoiGeom)~
-~DeclareGeometry(@aoiGeomFixed)~
-
--- Create AOI table with polygon geometry. Coordinate system must be WGS1984 (EPSG 4326)
-CREATE TABLE #AoiTable
-    ( aoiid INT IDENTITY (1,1),
-    landunit VARCHAR(20),
-    aoigeom GEOMETRY )
-;
-
--- Insert identifier string and WKT geometry for each AOI polygon after this...
-"""
+        # get spatial reference from aoi, need to make sure appropriate datum transformation is applied
+        gcs = spatialReference(WGS84_WKID)
 
         # Project geometry from AOI
-        with SearchCursor(aoi, ['landunit', 'SHAPE@']) as cur:
-            for rec in cur:
-                landunit = str(rec[0]).replace('\n', ' ')
-                polygon = rec[1]                                  # original geometry
-                outputPolygon = polygon.projectAs(gcs, '')        # simplified geometry, projected to WGS 1984
-                wkt = outputPolygon.WKT
-                sQuery += " \nINSERT INTO #AoiTable ( landunit, aoigeom ) "
-                sQuery += " \nVALUES ('" + landunit + "', geometry::STGeomFromText('" + wkt + "', 4326));"
-
-        sQuery += """
-
--- End of AOI geometry section
-
--- #AoiAcres table to contain summary acres for each landunit
-CREATE TABLE #AoiAcres
-    ( aoiid INT,
-    landunit VARCHAR(20),
-    landunit_acres FLOAT )
-;
-
--- #AoiSoils table contains intersected soil polygon table with geometry
-CREATE TABLE #AoiSoils
-    ( polyid INT IDENTITY (1,1),
-    aoiid INT,
-    landunit VARCHAR(20),
-    musym VARCHAR(6),
-    mukey INT,
-    soilgeom GEOMETRY )
-;
-
--- #AoiSoils2 table contains Soil geometry with landunits
-CREATE TABLE #AoiSoils2
-    ( aoiid INT,
-    landunit VARCHAR(20),
-    musym VARCHAR(6),
-    mukey INT,
-    soilgeom GEOMETRY )
-;
-
--- #AoiSoils3 table contains Soil geometry with landunits
-CREATE TABLE #AoiSoils3
-    ( aoiid INT,
-    landunit VARCHAR(20),
-    musym VARCHAR(6),
-    mukey INT,
-    poly_acres FLOAT,
-    soilgeog GEOGRAPHY )
-;
-
---  #LuMuAcres table contains Soil map unit acres, aggregated by mukey (merges polygons together)
-CREATE TABLE  #LuMuAcres
-    ( aoiid INT,
-    landunit VARCHAR(20),
-    musym VARCHAR(6),
-    mukey INT,
-    mapunit_acres FLOAT )
-;
-
-"""
+        with SearchCursor(aoi, ['SubID', 'SHAPE@']) as cur:
+            aois = [(landunit, polygon.projectAs(gcs, '').WKT) for landunit, polygon in cur]
+
         # Return Soil Data Access query string
-        return sQuery
+        return geometryQuery(aois, skipped=skipped)
 
     except:
         errorMsg('Download Soil Data')
         return ''
 
 
-def RunSDA_Queries(sda_url, sQuery, gdb, fd, utmCS, textFilePath):
+def RunSDA_Queries(sda_url, sQuery, gdb, utmCS, textFilePath, table_names=SDA_TABLE_NAMES):
     '''
     POST spatial query to SDA Tabular service using requests library.
     Format JSON table containing records with MUKEY and WKT Polygons to a polygon featureclass.
+    Returns the SDATables written to gdb.
     '''
+    # requests is only imported once a query is sent, keeping tool startup fast
+    from requests import ConnectionError, ReadTimeout, request
     try:
         AddMsgAndPrint('\nSubmitting request to Soil Data Access...', textFilePath=textFilePath)
         SetProgressorLabel('Submitting request to Soil Data Access...')
@@ -236,16 +67,9 @@ def RunSDA_Queries(sda_url, sQuery, gdb, fd, utmCS, textFilePath):
 
         # Tabular service to append to SDA URL
         url = f"{sda_url}/Tabular/post.rest"
-        dRequest = dict()
-        dRequest['format'] = 'JSON+COLUMNNAME+METADATA'
-        dRequest['query'] = sQuery
-
-        # Create SDM connection to service using HTTP
-        sData = dumps(dRequest)
-        timeOut = 120  # seconds which is really long. Before metrics it used to be 30 seconds.
 
         try:
-            resp = request(method='POST', url=url, data=sData, timeout=timeOut, verify=True)
+            resp = request(method='POST', url=url, data=requestBody(sQuery), timeout=SDA_TIMEOUT, verify=True)
 
         except AttributeError:
             AddMsgAndPrint('\nSDA AttributeError', 2)
@@ -265,111 +89,24 @@ def RunSDA_Queries(sda_url, sQuery, gdb, fd, utmCS, textFilePath):
             AddMsgAndPrint(f"\nSDA query request returned status: {status}", 2, textFilePath)
             exit()
 
-        if 'Table' not in data:
-            AddMsgAndPrint('\nNo soils data returned for this AOI request', 2, textFilePath)
+        try:
+            tables = sdaTables(data, table_names)
+        except ValueError as e:
+            AddMsgAndPrint(f"\n{e}", 2, textFilePath)
             exit()
-        else:
-            SetProgressorLabel('Successfully retrieved data from Soil Data Access')
-            AddMsgAndPrint('\nSuccessfully retrieved data from Soil Data Access...', textFilePath=textFilePath)
-            
-            # Define table names based upon sequence
-            dTableNames = dict()
-            dTableNames['TABLE'] = 'SoilMap_by_Landunit'
-            dTableNames['TABLE1'] = 'MapunitAcres'
-            dTableNames['TABLE2'] = 'DominantSoils'
-
-            keyList = sorted(data.keys())
-            for key in keyList:
-                dataList = data[key] # Data as a list of lists. Service returns everything as string.
-
-                # Get sequence number for table
-                if key.upper() == 'TABLE':
-                    tableNum = 1
-                else:
-                    tableNum = int(key.upper().replace('TABLE', '')) + 1
-
-                if key.upper() in dTableNames:
-                    newTableName = dTableNames[key.upper()]
-                else:
-                    newTableName = f"UnknownTable{str(tableNum)}"
-
-                # Get column names and column metadata from first two list objects
-                columnList = dataList.pop(0)
-                columnInfo = dataList.pop(0)
-                # Hack to increase field length of 'musym' in output feature class
-                columnInfo[3] = columnInfo[3].replace('ColumnSize=6', 'ColumnSize=12')
-                # columnNames = [fld.encode('ascii') for fld in columnList] NOTE: This throws error from Pro
-                columnNames = [fld for fld in columnList]
-
-                if 'wktgeom' in columnNames:
-                    # geometry present, create feature class
-                    newTable = path.join(fd, newTableName)
-                    AddMsgAndPrint(f"\nCreating new featureclass: {newTableName}", textFilePath=textFilePath)
-                    SetProgressorLabel(f"Creating new featureclass: {newTableName}")
-                    CreateFeatureclass(fd, newTableName, 'POLYGON', '', 'DISABLED', 'DISABLED', utmCS)
-
-                    if not Exists(path.join(fd, newTableName)):
-                        AddMsgAndPrint(f"Failed to create new featureclass: {path.join(fd, newTableName)}", 2, textFilePath)
-
-                    tableList.append(newTableName)
-
-                else:
-                    # no geometry present, create standalone table
-                    newTable = path.join(gdb, newTableName)
-                    AddMsgAndPrint(f"\nCreating new table: {newTableName}", textFilePath=textFilePath)
-                    SetProgressorLabel(f"Creating new table: {newTableName}")
-                    CreateTable(gdb, newTableName)
-                    tableList.append(newTableName)
-                # AddMsgAndPrint(columnNames)
-                # AddMsgAndPrint(columnInfo)
-                newFields = AddNewFields(newTable, columnNames, columnInfo)
-
-                # Output UTM geometry from geographic WKT
-                if 'wktgeom' in columnNames:
-                    # include geometry column in cursor fields
-                    if not utmCS is None:
-                        newFields.append('SHAPE@')
-                    else:
-                        newFields.append('SHAPE@WKT')
-
-                if 'musym' in columnNames:
-                    # Need to be able to handle uppercase field names!!!!
-                    musymIndx = columnNames.index('musym')
-                else:
-                    musymIndx = -1
-
-                with InsertCursor(newTable, newFields) as cur:
-                    if 'wktgeom' in columnNames:
-                        AddMsgAndPrint(f"\tImporting spatial data into {newTableName}", textFilePath=textFilePath)
-                        # This is a spatial dataset
-                        geoSR = SpatialReference(4326)
-
-                        # output needs to be projected to UTM
-                        # Note to self. If a transformation isn't needed, I should not specify one or make it an empty string.
-                        # If an inappropriate method is specified, it will fail.
-                        for rec in dataList:
-                            # add a new polygon record
-                            wkt = rec[-1]
-                            gcsPoly = FromWKT(wkt, geoSR)
-                            utmPoly = gcsPoly.projectAs(utmCS, '')
-                            rec[-1] = utmPoly
-                            cur.insertRow(rec)
-
-                    else:
-                        # Tabular-only dataset, track number of records
-                        AddMsgAndPrint(f"\tImporting tabular data into {newTableName}", textFilePath=textFilePath)
-                        recNum = 0
-
-                        for rec in dataList:
-                            recNum += 1
-                            cur.insertRow(rec)
-                            if musymIndx >= 0:
-                                musym = rec[musymIndx]
-
-                        if newTableName == 'Soils_Detailed':
-                            if recNum == 1 and str(musym) == 'NOTCOM':
-                                AddMsgAndPrint('\nThe soils data for this area consists solely of NOTCOM.', 2, textFilePath)
-                                exit()
+
+        SetProgressorLabel('Successfully retrieved data from Soil Data Access')
+        AddMsgAndPrint('\nSuccessfully retrieved data from Soil Data Access...', textFilePath=textFilePath)
+        AddMsgAndPrint(f"\tResponse size {describeResponse(len(resp.content), tables)}", textFilePath=textFilePath)
+
+        # Spatial tables are projected to UTM and written to the Layers feature dataset
+        backend = ArcpyBackend()
+        for table in tables:
+            kind = 'featureclass' if table.spatial else 'table'
+            AddMsgAndPrint(f"\nCreating new {kind}: {table.name}", textFilePath=textFilePath)
+            SetProgressorLabel(f"Creating new {kind}: {table.name}")
+            writeSDATable(backend, gdb, table, utmCS.factoryCode)
+            tableList.append(table)
 
         return tableList
 
@@ -377,6 +114,7 @@ def RunSDA_Queries(sda_url, sQuery, gdb, fd, utmCS, textFilePath):
         errorMsg('Download Soil Data')
         return []
 
+
 ##################################################################################################################################
 
 ### Initial Tool Validation ###
@@ -390,12 +128,14 @@ except:
 
 ### Input Parameters ###
 gnt_layer = GetParameterAsText(0)
+# Without the soil map only tables come back from SDA
+soil_map = GetParameterAsText(1).lower() != 'false'
 
 # Get the basedataGDB_path from the input GNT layer
-gnt_layer_path = Describe(gnt_layer).CatalogPath
-if gnt_layer_path.find('.gdb') > 0 and gnt_layer_path.find('GNT') > 0 and gnt_layer_path.find('GNTFieldLayer') > 0:
-    gntdataGDB_path = gnt_layer_path[:gnt_layer_path.find('.gdb')+4]
-else:
+try:
+    project = GNTProject.fromLayer(gnt_layer)
+    gntdataGDB_path = project.gdb_path
+except ValueError:
     AddMsgAndPrint('\nSelected GNT Field layer is not from a GNT project folder. Exiting...', 2)
     exit()
 
@@ -408,89 +148,76 @@ env.overwriteOutput = True
 
 ### Define Local Variables ###
 base_dir = path.abspath(path.dirname(__file__)) #\SUPPORT
-gntdataGDB_name = path.basename(gntdataGDB_path)
-gntdataFD_name = 'Layers'
-gntdataFD = path.join(gntdataGDB_path, gntdataFD_name)
-admin_table_path = path.join(gntdataGDB_path, 'Admin_Table')
-landunits_path = path.join(gntdataFD, 'Landunits')
+gntdataGDB_name = project.gdb_name
+gntdataFD = project.fd_path
 soilunits_path = path.join(gntdataFD, 'SoilMap_by_Landunit')
-soilunits_summarize_path = path.join(gntdataFD, 'Soil_Summarize')
 
-summary_table = path.join(gntdataGDB_path, 'Summary_Table')
-userWorkspace = path.dirname(gntdataGDB_path)
-projectName = path.basename(userWorkspace).replace(' ', '_')
-textFilePath = path.join(userWorkspace, f"{projectName}_log.txt")
+userWorkspace = project.folder
+projectName = project.name
+textFilePath = project.log_path
 
-sql_path = path.join(base_dir, 'GNT_Query.txt')
+# Attribute query file and soil map geometry mode for this tool, from SDA_QuerySettings.csv
+try:
+    query_settings = readQuerySettings('Download_Soil_Data')
+except ValueError as e:
+    AddMsgAndPrint(f"{e}. Exiting...", 2)
+    exit()
+sql_path = path.join(base_dir, query_settings.query_file)
 if not Exists(sql_path):
     AddMsgAndPrint('Missing SQL file in SUPPORT folder. Exiting...', 2)
     exit()
 
 
 try:
-    logBasicSettings(textFilePath, gnt_layer)
-
-    ### Create AOI from GNTFieldLayer ###
-    SetProgressorLabel('Creating area of interest layer...')
-    AddMsgAndPrint('\nCreating area of interest layer...', textFilePath=textFilePath)
-    Dissolve(gnt_layer, landunits_path)
-    AddField(landunits_path, 'landunit', 'TEXT', '', '', 16)
-    with SearchCursor(gnt_layer, ['fsatract', 'fsafarm']) as cur:
-        row = cur.next()
-        landunit_value = f"T{str(row[0])} F{str(row[1])}"
-    with UpdateCursor(landunits_path, ['landunit']) as cur:
-        for row in cur:
-            row[0] = landunit_value
-            cur.updateRow(row)
-
+    logBasicSettings(textFilePath, gnt_layer, soil_map, query_settings)
 
     ### Build Soil Data Access Query and Run ###
     SetProgressorLabel('Building geometry query...')
     AddMsgAndPrint('\nBuilding geometry query...', textFilePath=textFilePath)
-    geomQuery = FormSDA_Geom_Query(landunits_path)
+    # Each field is its own AOI, so SDA returns the predominant soil of each field and no local overlay is needed
+    long_sub_ids = []
+    geomQuery = FormSDA_Geom_Query(gnt_layer, long_sub_ids)
     if geomQuery == '':
         AddMsgAndPrint('\nEmpty geometry query. Exiting...', 2, textFilePath)
         exit()
+    if long_sub_ids:
+        AddMsgAndPrint(f"\tFields with a SubID longer than {LANDUNIT_LENGTH} characters were not sent to Soil Data Access "
+                       f"and get no SoilKey: {', '.join(str(sub_id) for sub_id in long_sub_ids)}", 1, textFilePath)
 
-    with open(sql_path, 'r') as f:
-        attQuery = f.read()
+    attQuery = fieldSoilsQuery(attributeQuery(query_settings), soil_map)
+    if not soil_map:
+        AddMsgAndPrint('\tOnly soil tables are requested, without the soil map', textFilePath=textFilePath)
+    elif query_settings.geometry == 'reduced':
+        AddMsgAndPrint(f"\tSoil polygons are reduced to {query_settings.reduce_tolerance:g} m by Soil Data Access", textFilePath=textFilePath)
 
     sQuery = f"{geomQuery}\n{attQuery}"
     # AddMsgAndPrint(f"\nQuery: {sQuery}", textFilePath=textFilePath)
 
     SetProgressorLabel('Reaching out to SDA...')
-    tableList = RunSDA_Queries(SDA_URL, sQuery, gntdataGDB_path, gntdataFD, output_coordinate_system, textFilePath)
-    AddMsgAndPrint(f"\nCreated: {tableList}", textFilePath=textFilePath)
-
-    with UpdateCursor(soilunits_path, ['areasymbol', 'musym']) as cur:
-        for row in cur:
-            prefix = str(int(row[0][2:]))
-            row[1] = f"{prefix}_{row[1]}"
-            cur.updateRow(row)
+    table_names = SDA_TABLE_NAMES if soil_map else ATTRIBUTE_TABLE_NAMES
+    tables = RunSDA_Queries(SDA_URL, sQuery, gntdataGDB_path, output_coordinate_system, textFilePath, table_names)
+    AddMsgAndPrint(f"\nCreated: {[table.name for table in tables]}", textFilePath=textFilePath)
 
     ### Determine Predominant Soil Type by Field ###
     SetProgressorLabel('Determining predominant soil types...')
     AddMsgAndPrint('\nDetermining predominant soil types...', textFilePath=textFilePath)
-    SummarizeWithin(gnt_layer, soilunits_path, soilunits_summarize_path, 'KEEP_ALL', '', 'ADD_SHAPE_SUM', 'ACRES', 'musym', 'ADD_MIN_MAJ', '', summary_table)
-
-    # Transfer predominant soil type to GNTField Layer
-    soil_types = {}
-    with SearchCursor(soilunits_summarize_path, ['SubID', 'Majority_musym']) as cur:
-        for row in cur:
-            soil_types[row[0]] = row[1]
-
-    with UpdateCursor(gnt_layer, ['SubID', 'SoilKey']) as cur:
-        for row in cur:
-            row[1] = soil_types[row[0]]
-            cur.updateRow(row)
+    # SDA returned the musym covering most of each field, which becomes its SoilKey
+    field_soils = [table for table in tables if table.name == FIELD_SOILS_TABLE]
+    if not field_soils:
+        AddMsgAndPrint('\nNo field soils returned from Soil Data Access. Exiting...', 2, textFilePath)
+        exit()
+    # Fields SDA returned no soil for have their SoilKey cleared rather than keep one from an earlier download
+    backend = ArcpyBackend()
+    sub_ids = [sub_id for sub_id, in backend.readRows(gnt_layer, ['SubID'])]
+    backend.updateRows(gnt_layer, 'SubID', 'SoilKey', fieldSoilKeys(field_soils[0], sub_ids))
 
     # Add soil layer to map
-    SetProgressorLabel('Adding soil layer to map...')
-    AddMsgAndPrint('\nAdding soil layer to map...', textFilePath=textFilePath)
-    map.addDataFromPath(soilunits_path)
-    for lyr in map.listLayers():
-        if lyr.longName == 'SoilMap_by_Landunit':
-            lyr.visible = False
+    if soil_map:
+        SetProgressorLabel('Adding soil layer to map...')
+        AddMsgAndPrint('\nAdding soil layer to map...', textFilePath=textFilePath)
+        map_layers = MapLayers(map)
+        map_layers.addData(soilunits_path, visible=False)
+        map_layers.apply()
 
 
 except SystemExit:
@@ -503,9 +230,6 @@ except:
         AddMsgAndPrint(errorMsg('Download Soil Data'), 2)
 
 finally:
-    SetProgressorLabel('Cleaning up scratch layers...')
-    AddMsgAndPrint('\nCleaning up scratch layers...', textFilePath=textFilePath)
-    deleteLayers([soilunits_summarize_path, summary_table, landunits_path])
     # Close and Reopen Map - BUG: Pro says setback layers are not editable
     aprx.closeViews()
     map.openView()
@@ -9,10 +9,13 @@
 import sys, os, arcpy, requests, json, time, datetime, math
 
 from arcpy import env
-from arcpy.mp import ArcGISProject, LayerFile
-from random import randint
+from arcpy.mp import ArcGISProject
 
-from utils import AddMsgAndPrint, errorMsg
+from gnt_core.renderers import simpleRenderer, uniqueValuesRenderer, waterRenderer
+from gnt_core.sda import describeResponse, readQuerySettings, reduceGeometry, sdaTables
+from gnt_core.spatial_ref import extentUTMWKID
+from gnt_core.values import chunks, inQuery, uniqueValues
+from utils import AddMsgAndPrint, errorMsg, layerExtent, spatialReference, utmSpatialReference
 
 class MyError(Exception):
     pass
@@ -145,27 +148,8 @@ def CreateAOILayer(inputAOI, aoiShp):
         # Calculate field acres here
         arcpy.AddField_management(aoiShp, "acres", "DOUBLE")
 
-        # Get centroid of aoiShp which has a CS of Geographic WGS1984
-        aoiDesc = arcpy.Describe(aoiShp)
-        extent = aoiDesc.extent
-        xCntr = (extent.XMax + extent.XMin) / 2.0
-        yCntr = (extent.YMax + extent.YMin) / 2.0
-        utmZone = int( (31 + (xCntr / 6.0) ) )
-
-        # Calculate hemisphere and UTM Zone
-        if yCntr > 0:  # Not sure if this is the best way to handle hemisphere
-            zone = str(utmZone) + "N"
-        else:
-            zone = str(utmZone) + "S"
-
-        # Central Meridian
-        cm = ((utmZone * 6.0) - 183.0)
-
-        # Get string version of UTM coordinate system
-        utmBase = "PROJCS['WGS_1984_UTM_Zone_xxx',GEOGCS['GCS_WGS_1984',DATUM['D_WGS_1984',SPHEROID['WGS_1984',6378137.0,298.257223563]],PRIMEM['Greenwich',0.0],UNIT['Degree',0.0174532925199433]],PROJECTION['Transverse_Mercator'],PARAMETER['False_Easting',500000.0],PARAMETER['False_Northing',0.0],PARAMETER['Central_Meridian',zzz],PARAMETER['Scale_Factor',0.9996],PARAMETER['Latitude_Of_Origin',0.0],UNIT['Meter',1.0]];-5120900 -9998100 10000;-100000 10000;-100000 10000;0.001;0.001;0.001;IsHighPrecision"
-        wkt = utmBase.replace("xxx", zone).replace("zzz", str(cm))
-        utmCS = arcpy.SpatialReference()
-        utmCS.loadFromString(wkt)
+        # Get WGS 1984 UTM zone at the center of aoiShp which has a CS of Geographic WGS1984
+        utmCS = utmSpatialReference(aoiShp)
 
         acitve_map.spatialReference = utmCS
 
@@ -309,20 +293,17 @@ def AddNewFields(newTable, columnNames, columnInfo):
         return []
 
 
-def IdentifyWater(soilsDetailed):
+def IdentifyWater(soilsDetailed, chunkSize=0):
     # Using Soils_Detailed table, identify mukeys for water
     # Need to convert mukeys from integer to text EVERYWHERE
+    # Returns mukeys as text in the order found, or lists of at most chunkSize mukeys for IN lists
     try:
         wc = "musym = 'W' OR muname = 'Water' OR muname LIKE 'Water %' OR muname LIKE 'Water, %'"
-        waterMukeys = list()
 
-        with arcpy.da.SearchCursor(soilsDetailed, ["musym", "muname", "mukey"], where_clause=wc) as cur:
-            for rec in cur:
-                mukey = rec[2]
-                if not mukey in waterMukeys:
-                    waterMukeys.append(str(mukey))
+        with arcpy.da.SearchCursor(soilsDetailed, ["mukey"], where_clause=wc) as cur:
+            waterMukeys = uniqueValues(rec[0] for rec in cur)
 
-        return waterMukeys
+        return chunks(waterMukeys, chunkSize) if chunkSize else waterMukeys
 
     except MyError as e:
         AddMsgAndPrint(str(e), 2)
@@ -333,40 +314,17 @@ def IdentifyWater(soilsDetailed):
         return []
 
 
-def GetUniqueValues(theInput, fieldName):
-    # Create bracketed list of MUKEY values from spatial layer for use in query
+def GetUniqueValues(theInput, fieldName, chunkSize=0):
+    # Create sorted list of unique values as text from spatial layer for use in query
+    # Returns lists of at most chunkSize values if chunkSize is given, for building IN lists
     try:
-        # Tell user how many features are being processed
-        theDesc = arcpy.Describe(theInput)
-        theDataType = theDesc.dataType
         AddMsgAndPrint("", 0)
+        sqlClause = ("DISTINCT " + fieldName, "ORDER BY " + fieldName)
 
-        # Get Featureclass and total count
-        if theDataType.lower() == "featurelayer":
-            theFC = theDesc.featureClass.catalogPath
-            theResult = arcpy.GetCount_management(theFC)
-
-        elif theDataType.lower() in ["table", "featureclass", "shapefile"]:
-            theResult = arcpy.GetCount_management(theInput)
-
-        else:
-            raise MyError("Unknown data type: " + theDataType.lower())
-
-        iTotal = int(theResult.getOutput(0))
+        with arcpy.da.SearchCursor(theInput, [fieldName], sql_clause=sqlClause) as cur:
+            valList = uniqueValues(rec[0] for rec in cur)
 
-        if iTotal > 0:
-            sqlClause = ("DISTINCT " + fieldName, "ORDER BY " + fieldName)
-            valList = list()
-            with arcpy.da.SearchCursor(theInput, [fieldName], sql_clause=sqlClause) as cur:
-                for rec in cur:
-                    val = str(rec[0]).encode('ascii')
-                    if not val == '' and not val in valList:
-                        valList.append(val)
-
-            return valList
-
-        else:
-            return []
+        return chunks(valList, chunkSize) if chunkSize else valList
 
     except MyError as e:
         AddMsgAndPrint(str(e), 2)
@@ -388,7 +346,7 @@ def FormSDA_Geom_Query(aoiDiss):
     # #AoiSoils3
     try:
         # get spatial reference from aoiDiss, need to make sure appropriate datum transformation is applied
-        gcs = arcpy.SpatialReference(epsgWGS84)
+        gcs = spatialReference(epsgWGS84)
         wkt = ""
         landunit = ""
         now = datetime.datetime.now()
@@ -483,7 +441,7 @@ CREATE TABLE  #LuMuAcres
         return ""
 
 
-def GetSDA_Attribute_Query(geomQuery, sqlPath):
+def GetSDA_Attribute_Query(geomQuery, sqlPath, querySettings):
     # This is the soil attribute part of the query for GNT. Some mapunit and landunit attributes are returned
     # This part of the query will need to reference the temporary table names used in the initial geometry query:
     # #AoiTable
@@ -505,6 +463,10 @@ def GetSDA_Attribute_Query(geomQuery, sqlPath):
         if attQuery == "":
             raise MyError("Attribute query is an empty string")
 
+        if querySettings.geometry == "reduced":
+            attQuery = reduceGeometry(attQuery, querySettings.reduce_tolerance)
+            AddMsgAndPrint(" \nSoil polygons are reduced to " + str(querySettings.reduce_tolerance) + " meters by Soil Data Access", 0)
+
         sQuery = geomQuery + "\n" + attQuery
 
         return sQuery
@@ -578,6 +540,8 @@ def RunSDA_Queries(theURL, sQuery, gdb, utmCS):
             raise MyError("No soils data returned for this AOI request")
 
         else:
+            AddMsgAndPrint(" \nResponse size " + describeResponse(len(sJSON), sdaTables(data)), 0)
+
             # Define table names based upon sequence
             dTableNames = dict()
             dTableNames['TABLE'] = "SoilMap_by_Landunit"
@@ -650,7 +614,7 @@ def RunSDA_Queries(theURL, sQuery, gdb, utmCS):
                     if "wktgeom" in columnNames:
                         AddMsgAndPrint("\tImporting spatial data into " + newTableName, 0)
                         # This is a spatial dataset
-                        geoSR = arcpy.SpatialReference(4326)
+                        geoSR = spatialReference(4326)
 
                         # output needs to be projected to UTM
                         # Note to self. If a transformation isn't needed, I should not specify one or make it an empty string.
@@ -688,14 +652,11 @@ def RunSDA_Queries(theURL, sQuery, gdb, utmCS):
                         # Originally I was dropping those columns in the spreadsheet function, but I'm skipping
                         # that for CRP. Move it back after spreadsheets export is working again. I don't want those columns displayed in Identify.
                         tmpFL = "TempSoilsLayer"
-                        tmpLayerFile = os.path.join(env.scratchFolder, "xxSoilsLayer.lyr")
-                        arcpy.MakeFeatureLayer_management(newTable, tmpFL)
-                        arcpy.SaveToLayerFile_management(tmpFL, tmpLayerFile)
-                        soilsLayer = LayerFile(tmpLayerFile)
+                        soilsLayer = arcpy.MakeFeatureLayer_management(newTable, tmpFL).getOutput(0)
                         arcpy.SetProgressorLabel("Updating soil mapunit symbology to simple outline")
                         AddMsgAndPrint(" \nUpdating soil mapunit symbology to simple outline", 1)
-                        dLayerDefinition = SimpleFeaturesJSON(0.1, "black")
-                        soilsLayer.updateLayerFromJSON(dLayerDefinition)
+                        sLayerDefinition = SimpleFeaturesJSON(0.1, "black")
+                        soilsLayer.updateLayerFromJSON(sLayerDefinition)
                         soilsLayer.name = newTableName
                         # mapping.AddLayer(df, soilsLayer)
                         acitve_map.addLayer(soilsLayer)
@@ -719,25 +680,22 @@ def RunSDA_Queries(theURL, sQuery, gdb, utmCS):
         return []
 
 
-def AddFirstSoilMap(gdb, outputFC, thisLayerFile, labelField, thisLayerName, fieldInfo):
-    # TODO: Use MakeFeatureLayer like I did in AddSoilMap. This allows for use of field_info
-    # Test to see if starting with a layer file prevents the layer already exists error.
+def AddFirstSoilMap(gdb, outputFC, labelField, thisLayerName, fieldInfo):
     # Create the top soil polygon layer which will be simple black outline, no fill but with MUSYM labels, visible
     # Run SDA query to add NATMUSYM and MAPUNIT NAME to featureclass
     try:
         arcpy.SetProgressorLabel("Preparing basic soil map layer...")
-        newLayer = arcpy.MakeFeatureLayer_management(soilsFC, thisLayerName, "", "", fieldInfo)
+        # Symbolize the in-memory layer directly rather than saving and reloading a layer file
+        newLayer = arcpy.MakeFeatureLayer_management(outputFC, thisLayerName, "", "", fieldInfo).getOutput(0)
         newLayer.name = thisLayerName
-        arcpy.SaveToLayerFile_management(newLayer, thisLayerFile, "RELATIVE", "10.3")
-        newLayer = LayerFile(thisLayerFile)
 
         newLayer.visible = True
         newLayer.transparency = 50
         valList = GetUniqueValues(newLayer, labelField)
 
-        # Update soilmap layer symbology using JSON dictionary
-        dLayerDefinition = UniqueValuesJSON(valList, True, "musym", True)
-        newLayer.updateLayerFromJSON(dLayerDefinition)
+        # Update soilmap layer symbology using a layer definition JSON string
+        sLayerDefinition = UniqueValuesJSON(valList, True, "musym", True)
+        newLayer.updateLayerFromJSON(sLayerDefinition)
 
         if arcpy.Exists("Soils_Detailed"):
             # Create relate to outputFC
@@ -767,30 +725,25 @@ def AddWaterMap(detailedSoilsLayer, waterLayerName, waterMukeys):
     try:
         arcpy.SetProgressorLabel("Preparing water layer...")
 
-        detailedLayerFile = os.path.join(env.scratchFolder, "xxDetailedSoils.lyr")
-        detailedSoilsLayer.saveACopy(detailedLayerFile)
-        waterLayer = LayerFile(detailedLayerFile)
-        waterLayer.name = waterLayerName
-
-        desc = arcpy.Describe(waterLayer)
+        desc = arcpy.Describe(detailedSoilsLayer)
         waterFlds = [fld.name.lower() for fld in desc.fields]
 
         if not "mukey" in waterFlds:
             raise MyError("Missing mukey field in water layer")
 
-        if len(waterMukeys) > 1:
-            waterDef = "mukey IN " + str(tuple(waterMukeys))
-
-        elif len(waterMukeys) == 1:
-            waterDef = "mukey = '" + str(waterMukeys[0]) + "'"
+        if len(waterMukeys) > 0:
+            # Split into IN lists that stay under SQL length limits
+            waterDef = inQuery("mukey", waterMukeys)
 
         else:
             # No water mapunits specified
             return True
 
-        dLayerDefinition = WaterFeaturesJSON(1.0)
-        waterLayer.definitionQuery = waterDef
-        waterLayer.updateLayerFromJSON(dLayerDefinition)
+        # In-memory layer of the water mapunits, symbolized without a layer file round trip
+        waterLayer = arcpy.MakeFeatureLayer_management(detailedSoilsLayer, waterLayerName, waterDef).getOutput(0)
+        waterLayer.name = waterLayerName
+        sLayerDefinition = WaterFeaturesJSON(1.0)
+        waterLayer.updateLayerFromJSON(sLayerDefinition)
         waterLayer.visible = True
         waterLayer.transparency = 0
 
@@ -820,7 +773,7 @@ def ZoomAndRotateMap(df, utmCS):
 
         # Create same point but as Geographic WGS1984
         # Designed to handle dataframe coordinate system datums: NAD1983 or WGS1984.
-        outputSR = arcpy.SpatialReference(4326)        # GCS WGS 1984
+        outputSR = spatialReference(4326)        # GCS WGS 1984
         env.geographicTransformations = "WGS_1984_(ITRF00)_To_NAD_1983"
         pointGM = pointGeometry.projectAs(outputSR, "")
         pointGM1 = pointGM.firstPoint
@@ -921,168 +874,19 @@ def AddLabels(mapLayer, labelField, fontSize, fontColor='black'):
 
 def SimpleFeaturesJSON(width, color):
     # returns JSON string for soil lines and labels layer, given the width of the outline
-    try:
-        fill = [255,255,255,255]       # transparent polygon fill
-
-        if color == "black":
-            outlineColor = [255, 255, 255, 255]
-
-        elif color == "yellow":
-            outlineColor = [230, 230, 0, 255]
-
-        elif color == "red":
-            outlineColor = [255, 0, 0, 255]
-
-        elif color == "white":
-            outlineColor = [0, 0, 0, 255]
-
-        else:
-            # default to black
-            outlineColor = [255, 255, 255, 255]
-
-        d = dict()
-        r = dict()
-
-        r["type"] = "simple"
-        s = {"type": "esriSFS", "style": "esriSFSNull", "color": fill, "outline": { "type": "esriSLS", "style": "esriSLSSolid", "color": outlineColor, "width": width }}
-        r["symbol"] = s
-        d["drawingInfo"]= dict()
-        d["drawingInfo"]["renderer"] = r
-        return d
-
-    except MyError as e:
-        AddMsgAndPrint(str(e), 2)
-        return dict()
-
-    except:
-        errorMsg()
-        return dict()
+    return simpleRenderer(width, color)
 
 
 def WaterFeaturesJSON(width):
-    # returns JSON string for soil lines and labels layer, given the width of the outline
-    try:
-        outLineColor = [64, 101, 235, 255]  # dark blue polygon outline
-        fill = [151,219,255,125]            # cyan polygon fill
-
-        d = dict()
-        r = dict()
-
-        r["type"] = "simple"
-        s = {"type": "esriSFS", "style": "esriSFSSolid", "color": fill, "outline": { "type": "esriSLS", "style": "esriSLSSolid", "color": outLineColor, "width": width }}
-        r["symbol"] = s
-        d["drawingInfo"]= dict()
-        d["drawingInfo"]["renderer"] = r
-        return d
-
-    except MyError as e:
-        AddMsgAndPrint(str(e), 2)
-        return dict()
-
-    except:
-        errorMsg()
-        return dict()
+    # returns JSON string for water polygons, given the width of the outline
+    return waterRenderer(width)
 
 
 def UniqueValuesJSON(legendList, drawOutlines, ratingField, bSort):
-    # returns Python dictionary for unique values template. Use this for text, choice, vtext.
+    # returns JSON string for unique values template, built once per field, value set and outline style.
     # Problem: Feature layer does not display the field name in the table of contents just below
     # the layer name. Possible bug in UpdateLayerFromJSON method?
-    try:
-        d = dict() # initialize return value
-
-        # Over ride outlines and turn them off since I've created a separate outline layer.
-        waterColor = [64, 101, 235, 255]
-        gray = [178, 178, 178, 255]
-        black = [0, 0, 0, 255]
-
-        outLineColor = black
-        if drawOutlines == False:
-            outLineColor = [0, 0, 0, 0]
-
-        if bSort:
-            legendList.sort()  # this was messing up my ordered legend for interps
-
-        d = dict()
-        d["drawingInfo"] = dict()
-        d["drawingInfo"]["renderer"] = dict()
-        d["fields"] = list()
-        d["displayField"] = ratingField  # This doesn't seem to work
-
-        d["drawingInfo"]["renderer"]["fieldDelimiter"] = ", "
-        d["drawingInfo"]["renderer"]["defaultSymbol"] = None
-        d["drawingInfo"]["renderer"]["defaultLabel"] = None
-
-        d["drawingInfo"]["renderer"]["type"] = "uniqueValue"
-        d["drawingInfo"]["renderer"]["field1"] = ratingField
-        d["drawingInfo"]["renderer"]["field2"] = None
-        d["drawingInfo"]["renderer"]["field3"] = None
-        d["displayField"] = ratingField       # This doesn't seem to work
-
-        # Add new rating field to list of layer fields
-        dAtt = dict()
-        dAtt["name"] = ratingField
-        dAtt["alias"] = ratingField + " alias"
-        dAtt["type"] = "esriFieldTypeString"
-        d["fields"].append(dAtt)              # This doesn't seem to work
-
-        # Add each legend item to the list that will go in the uniqueValueInfos item
-        cnt = 0
-        legendItems = list()
-        uniqueValueInfos = list()
-
-        for cnt in range(0, len(legendList)):
-            rating = legendList[cnt]  # For some reason this is not just the rating value. This is a list containing [label, value, [r,g,b]]
-
-            if rating == 'W':
-                # Water symbol
-                rgb = [151,219,242,255]
-                legendItems = dict()
-                legendItems["value"] = rating
-                legendItems["description"] = ""  # This isn't really used unless I want to pull in a description of this individual rating
-                legendItems["label"] = rating
-                symbol = {"type" : "esriSFS", "style" : "esriSFSSolid", "color" : rgb, "outline" : {"color": waterColor, "width": 1.5, "style": "esriSLSSolid", "type": "esriSLS"}}
-                legendItems["symbol"] = symbol
-                uniqueValueInfos.append(legendItems)
-
-            if rating == 'Not rated':
-                # Gray shade
-                rgb = gray
-                legendItems = dict()
-                legendItems["value"] = rating
-                legendItems["description"] = ""  # This isn't really used unless I want to pull in a description of this individual rating
-                legendItems["label"] = rating
-                symbol = {"type" : "esriSFS", "style" : "esriSFSSolid", "color" : rgb, "outline" : {"color": outLineColor, "width": 0, "style": "esriSLSSolid", "type": "esriSLS"}}
-                legendItems["symbol"] = symbol
-                uniqueValueInfos.append(legendItems)
-
-            else:
-                # calculate rgb colors
-                if ratingField.lower() == "musym":
-                    rgb = [randint(0, 255), randint(0, 255), randint(0, 255), 255]  # for random colors
-
-                else:
-                    rgb = rating[2]
-
-                legendItems = dict()
-                legendItems["value"] = rating
-                legendItems["description"] = ""  # This isn't really used unless I want to pull in a description of this individual rating
-                legendItems["label"] = rating
-                symbol = {"type" : "esriSFS", "style" : "esriSFSSolid", "color" : rgb, "outline" : {"color": outLineColor, "width": 0.4, "style": "esriSLSSolid", "type": "esriSLS"}}
-                legendItems["symbol"] = symbol
-                uniqueValueInfos.append(legendItems)
-
-        d["drawingInfo"]["renderer"]["uniqueValueInfos"] = uniqueValueInfos
-
-        return d
-
-    except MyError as e:
-        AddMsgAndPrint(str(e), 2)
-        return d
-
-    except:
-        errorMsg()
-        return d
+    return uniqueValuesRenderer(ratingField, legendList, drawOutlines, bSort)
 
 
 def AddFieldMap(aoiPolys, gdb, landunitName):
@@ -1099,22 +903,13 @@ def AddFieldMap(aoiPolys, gdb, landunitName):
             if arcpy.Exists(boundaryLayerFile):
                 arcpy.Delete_management(boundaryLayerFile)
 
-            arcpy.MakeFeatureLayer_management(aoiPolys, tmpLandunitLayer)
-            arcpy.SaveToLayerFile_management(tmpLandunitLayer, boundaryLayerFile, "ABSOLUTE")
-            arcpy.Delete_management(tmpLandunitLayer, "FEATURELAYER")
-
-            aoiLayer = LayerFile(boundaryLayerFile)
-            dLayerDefinition = SimpleFeaturesJSON(1.0, "yellow")
-            aoiLayer.updateLayerFromJSON(dLayerDefinition)
+            aoiLayer = arcpy.MakeFeatureLayer_management(aoiPolys, tmpLandunitLayer).getOutput(0)
+            sLayerDefinition = SimpleFeaturesJSON(1.0, "yellow")
+            aoiLayer.updateLayerFromJSON(sLayerDefinition)
             aoiLayer.name = landunitName
 
-            arcpy.Delete_management(aoiShp, "FEATURELAYER")
-
-            if arcpy.Exists(boundaryLayerFile):
-                arcpy.Delete_management(boundaryLayerFile)
-
+            # Keep a copy of the symbolized layer with the project; the in-memory layer is the one added to the map
             arcpy.SaveToLayerFile_management(aoiLayer, boundaryLayerFile, "RELATIVE", "10.3")
-            aoiLayer = LayerFile(boundaryLayerFile)
 
         else:
             raise MyError("Failed to create landunit layer (" + aoiShp + ")")
@@ -1167,80 +962,31 @@ def GetLayerDescriptions(gdb):
 
 
 def GetUTM_CS(aoiShp):
-    # Return UTM coordinate system at centroid of AOI
+    # Return WGS 1984 UTM coordinate system at center of AOI
     try:
-        # Copied from Zoom to County validation code
-        newExtent = ""
-
         # Use GCS WGS1984 to calculate new extent and data frame rotation
-        gcsSR = arcpy.SpatialReference(4326)        # GCS WGS 1984
+        gcsSR = spatialReference(4326)        # GCS WGS 1984
         env.geographicTransformations = "WGS_1984_(ITRF00)_To_NAD_1983"
         acitve_map.spatialReference = gcsSR
 
-        # This method assumes that the input county boundary featureclass is multi-part.
-        # Please Note! As written this will not handle multiple polygons for the same county.
-        xminList = list()
-        yminList = list()
-        xmaxList = list()
-        ymaxList = list()
-
-        with arcpy.da.SearchCursor(aoiShp, ["SHAPE@"], spatial_reference=gcsSR) as cur:
-          for rec in cur:
-            # written as a single iteration
-            shape = rec[0]  # shape fails when dataframe CSR is not appropriate for new location
-            newExtent = shape.extent
-            xminList.append(newExtent.XMin)
-            yminList.append(newExtent.YMin)
-            xmaxList.append(newExtent.XMax)
-            ymaxList.append(newExtent.YMax)
-
-        xmin = min(xminList)
-        ymin = min(yminList)
-        xmax = max(xmaxList)
-        ymax = max(ymaxList)
-
-        if not shape is None:
-          # Get extent of the AOI in decimal degrees, then expand 10%
-          newExtent.XMin = xmin
-          newExtent.YMin = ymin
-          newExtent.XMax = xmax
-          newExtent.YMax = ymax
-
-          xOffset = (xmax - xmin) * 0.05
-          yOffset = (ymax - ymin) * 0.05
-          newExtent.XMin = xmin - xOffset
-          newExtent.XMax = xmax + xOffset
-          newExtent.YMin = ymin - yOffset
-          newExtent.YMax = ymax + yOffset
-          acitve_map.extent = newExtent  # newExtent based on geographic coordinate system
-
-          # Calculate center of display in geographic
-          xCntr = ( xmin + xmax ) / 2.0
-          yCntr = ( ymin + ymax ) / 2.0
-
-          # Get UTM coordinate system for new extent
-          utmZone = int( (31 + (xCntr / 6.0) ) )
-
-          # Calculate hemisphere and UTM Zone
-          if yCntr > 0:  # Not sure if this is the best way to handle hemisphere
-              zone = str(utmZone) + "N"
-
-          else:
-              zone = str(utmZone) + "S"
-
-          # calculate Central Meridian for this UTM Zone
-          cm = ((utmZone * 6.0) - 183.0)
-
-          # Get coordinate reference string based upon UTM NAD 1983
-          utmBase = 'PROJCS["NAD_1983_UTM_Zone_xxx",GEOGCS["GCS_North_American_1983",DATUM["D_North_American_1983",SPHEROID["GRS_1980",6378137.0,298.257222101]],PRIMEM["Greenwich",0.0],UNIT["Degree",0.0174532925199433]],PROJECTION["Transverse_Mercator"],PARAMETER["False_Easting",500000.0],PARAMETER["False_Northing",0.0],PARAMETER["Central_Meridian",-93.0],PARAMETER["Scale_Factor",0.9996],PARAMETER["Latitude_Of_Origin",0.0],UNIT["Meter",1.0]]'
-          wkt = utmBase.replace("xxx", zone).replace("zzz", str(cm))
-          utmPRJ = arcpy.SpatialReference()
-          utmPRJ.loadFromString(wkt)
-
-          # Set correct data frame rotation for this UTM Zone and specific location
-          acitve_map.spatialReference = utmPRJ
-          AddMsgAndPrint(" \nCreated new spatial reference based upon " + utmPRJ.PCSName, 1)
-          return utmPRJ
+        # Extent of the AOI in decimal degrees, from the layer description without reading features
+        xmin, ymin, xmax, ymax = layerExtent(aoiShp)
+
+        if math.isnan(xmin):
+            raise MyError("No polygon features in " + aoiShp)
+
+        # Expand extent 10%
+        xOffset = (xmax - xmin) * 0.05
+        yOffset = (ymax - ymin) * 0.05
+        acitve_map.extent = arcpy.Extent(xmin - xOffset, ymin - yOffset, xmax + xOffset, ymax + yOffset, spatial_reference=gcsSR)
+
+        # UTM zone and hemisphere at the center of the extent
+        utmPRJ = spatialReference(extentUTMWKID((xmin, ymin, xmax, ymax)))
+
+        # Set correct data frame rotation for this UTM Zone and specific location
+        acitve_map.spatialReference = utmPRJ
+        AddMsgAndPrint(" \nUsing spatial reference " + utmPRJ.PCSName, 1)
+        return utmPRJ
 
     except MyError as e:
         AddMsgAndPrint(str(e), 2)
@@ -1301,7 +1047,8 @@ try:
     sys.path.append(scriptPath) # set path for scripts and modules.
     sdaURL = r"https://sdmdataaccess.nrcs.usda.gov"  # manually tested this on 2019-09-13 and it worked.
 
-    sqlPath = os.path.join(scriptPath, "GNT_Query.txt")  # attribute query
+    querySettings = readQuerySettings("SDA_CreateGNT_SoilMaps3_py3")  # attribute query and geometry mode from SDA_QuerySettings.csv
+    sqlPath = os.path.join(scriptPath, querySettings.query_file)  # attribute query
 
     if not arcpy.Exists(sqlPath):
         raise MyError("Missing SQL file: " + sqlPath)
@@ -1330,7 +1077,7 @@ try:
 
     # Get geographic coordinate system information for input and output layers
     validDatums = ["D_WGS_1984", "D_North_American_1983"]
-    sdaCS = arcpy.SpatialReference(epsgWGS84)
+    sdaCS = spatialReference(epsgWGS84)
     desc = arcpy.Describe(inputAOI)
 
     arcpy.SelectLayerByAttribute_management(inputAOI, "CLEAR_SELECTION")
@@ -1484,7 +1231,7 @@ try:
 
     # bZoomed = ZoomAndRotateMap(df, utmCS)
     geomQuery = FormSDA_Geom_Query(aoiPolys)
-    sQuery = GetSDA_Attribute_Query(geomQuery, sqlPath)
+    sQuery = GetSDA_Attribute_Query(geomQuery, sqlPath, querySettings)
 
     if sQuery != "":
         # Send spatial query and use results to populate outputShp featureclass
@@ -1497,22 +1244,12 @@ try:
             raise MyError("Failed to get data from Soil Data Access")
 
         if bSpatial:
-            # Try creating a temporary soils featurelayer that will be used to create the initial layer file and then immediately removed afterwards
-            tmpSoils = "tmpSoilsFC"
             soilFCName = "SoilMap_by_Landunit"
-            soilsLayerFile = os.path.join(env.scratchFolder, "SoilMap_Layer.lyrx")  # Base soils layer
+            soilsLayerFile = os.path.join(os.path.dirname(gdb), "SoilMap_Layer.lyrx")  # Symbolized copy of the soils layer
 
         if bSpatial and soilFCName in tableList:
             soilsFC = os.path.join(gdb, soilFCName)
 
-            if arcpy.Exists(tmpSoils):
-                arcpy.Delete_management(tmpSoils, "FEATURELAYER")
-
-            time.sleep(1)
-            tmpSoilsLayer = arcpy.MakeFeatureLayer_management(soilsFC, tmpSoils)
-            arcpy.SaveToLayerFile_management(tmpSoilsLayer, soilsLayerFile, "ABSOLUTE")
-            arcpy.Delete_management(tmpSoilsLayer, "FEATURELAYER")
-
             if not arcpy.Exists(soilsFC):
                 raise MyError("Missing soils featureclass: " + soilsFC)
 
@@ -1535,18 +1272,16 @@ try:
             dLayerDescriptions = GetLayerDescriptions(gdb)
 
             # Soil Mapunit Map
-            if arcpy.Exists(soilsFC) and arcpy.Exists(soilsLayerFile):
+            if arcpy.Exists(soilsFC):
                 # Add soil mapunit layer (with relate to component information)
                 # The mapextent, map scale and dataframe rotation are set here.
-                soilPolygonLayer = AddFirstSoilMap(gdb, soilsFC, soilsLayerFile, "musym", soilLayerName, fieldInfo)  # Try using soilsLayerFile to fix layer already exists error
+                soilPolygonLayer = AddFirstSoilMap(gdb, soilsFC, "musym", soilLayerName, fieldInfo)
 
-                # Try updating the soilsLayerFile to a version that has symbology and labels.
+                # Keep a copy of the symbolized layer with the project; the in-memory layer is the one added to the map
                 if arcpy.Exists(soilsLayerFile):
                     arcpy.Delete_management(soilsLayerFile)
 
-                soilsLayerFile = os.path.join(os.path.dirname(gdb), os.path.basename(soilsLayerFile))  # switch to permanent layer location
                 arcpy.SaveToLayerFile_management(soilPolygonLayer, soilsLayerFile, "RELATIVE", "10.3")
-                soilPolygonLayer = LayerFile(soilsLayerFile)
 
                 if not soilPolygonLayer is None:
                     dInterpLayers["soilslayer"] = soilPolygonLayer
@@ -1557,22 +1292,20 @@ try:
             waterMukeys = IdentifyWater(soilPolygonLayer)
 
             if len(waterMukeys) > 0:
-                waterTmpFile =  os.path.join(os.path.dirname(sys.argv[0]), "Water_Polygon.lyr")
                 waterLayerFile =  os.path.join(os.path.dirname(gdb), "Water_Polygon.lyr")
-                waterLayer = AddWaterMap(soilPolygonLayer, waterTmpFile, waterLayerName, waterMukeys)
+                waterLayer = AddWaterMap(soilPolygonLayer, waterLayerName, waterMukeys)
 
-                # Try updating the soilsLayerFile to a version that has symbology and labels.
+                # Keep a copy of the symbolized layer with the project; the in-memory layer is the one added to the map
                 if arcpy.Exists(waterLayerFile):
                     arcpy.Delete_management(waterLayerFile)
 
                 arcpy.SaveToLayerFile_management(waterLayer, waterLayerFile, "RELATIVE", "10.3")
-                waterLayer = LayerFile(waterLayerFile)
 
             # Create aoi boundary map layer using the input aoi polygon featureclass
             if arcpy.Exists(aoiPolys):
                 # new AOI layer
                 arcpy.SetProgressorLabel("Preparing landunit map layer")
-                landunitLayer = AddFieldMap(aoiPolys, gdb, "landunit", aprx, acitve_map, landunitName)
+                landunitLayer = AddFieldMap(aoiPolys, gdb, landunitName)
 
                 if not landunitLayer is None:
                     dInterpLayers["landunitlayer"] = landunitLayer
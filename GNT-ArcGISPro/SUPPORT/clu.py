@@ -0,0 +1,91 @@
+from collections import namedtuple
+from csv import DictReader
+from os import path
+
+from arcpy import Describe, ListFields
+from arcpy.da import InsertCursor, SearchCursor
+
+
+# Declares how CLU / crop layer fields load into GNTFieldLayer. A SOURCE_FIELD in braces, e.g. {farm}, is a value
+# given to ingestCLU rather than a field of the source layer.
+CLU_FIELD_MAP = path.join(path.dirname(path.abspath(__file__)), 'CLU_FieldMap.csv')
+
+FieldMapping = namedtuple('FieldMapping', ['target', 'source', 'type', 'length'])
+
+
+def readFieldMap(csv_path=CLU_FIELD_MAP):
+    ''' Return the FieldMappings declared in a field map CSV.'''
+    with open(csv_path, encoding='utf-8-sig', newline='') as f:
+        return [FieldMapping(row['TARGET_FIELD'], row['SOURCE_FIELD'], row['FIELD_TYPE'],
+                             int(row['FIELD_LENGTH']) if row['FIELD_LENGTH'] else None) for row in DictReader(f)]
+
+
+def _converter(mapping):
+    ''' Return a function converting a source value to the target field type, like Append does.'''
+    if mapping.type == 'Text':
+        return lambda value: None if value is None else str(value)[:mapping.length]
+    number = int if mapping.type in ('Long', 'Short', 'BigInteger') else float
+    def convert(value):
+        try:
+            return None if value is None or value == '' else number(value)
+        except (TypeError, ValueError):
+            return None
+    return convert
+
+
+def sourceFields(source_layer, field_map):
+    ''' Return the source_layer field names read by field_map, each once, matched regardless of case.
+
+    Source fields missing from source_layer are left out and load as null.
+    '''
+    layer_fields = {field.name.lower(): field.name for field in ListFields(source_layer)}
+    fields = []
+    for mapping in field_map:
+        source = layer_fields.get(mapping.source.lower())
+        if source and source not in fields:
+            fields.append(source)
+    return fields
+
+
+def rowMapper(source_fields, field_map, values=None):
+    ''' Return a function mapping a row read with source_fields to a list of field_map target values.
+
+    values supplies the {name} sources in field_map.
+    '''
+    values = values or {}
+    positions = {field.lower(): i for i, field in enumerate(source_fields)}
+    getters = []
+    for mapping in field_map:
+        convert = _converter(mapping)
+        if mapping.source.startswith('{') and mapping.source.endswith('}'):
+            value = convert(values[mapping.source[1:-1]])
+            getters.append(lambda row, value=value: value)
+        elif mapping.source.lower() in positions:
+            getters.append(lambda row, i=positions[mapping.source.lower()], convert=convert: convert(row[i]))
+        else:
+            getters.append(lambda row: None)
+    return lambda row: [getter(row) for getter in getters]
+
+
+def insertCLURows(gnt_path, rows, source_fields, field_map=None, values=None):
+    ''' Insert (geometry, source values) rows into gnt_path with one InsertCursor. Returns the number of rows.'''
+    field_map = field_map or readFieldMap()
+    mapRow = rowMapper(source_fields, field_map, values)
+    count = 0
+    with InsertCursor(gnt_path, ['SHAPE@'] + [mapping.target for mapping in field_map]) as cursor:
+        for shape, *source_values in rows:
+            cursor.insertRow([shape] + mapRow(source_values))
+            count += 1
+    return count
+
+
+def ingestCLU(crop_layer, gnt_path, values=None, field_map=None):
+    ''' Load crop_layer features into gnt_path in a single read and write, mapping fields with field_map.
+
+    Geometry is projected to the spatial reference of gnt_path on read. Returns the number of features loaded.
+    '''
+    field_map = field_map or readFieldMap()
+    fields = sourceFields(crop_layer, field_map)
+    sr = Describe(gnt_path).spatialReference
+    with SearchCursor(crop_layer, ['SHAPE@'] + fields, spatial_reference=sr) as cursor:
+        return insertCLURows(gnt_path, cursor, fields, field_map, values)
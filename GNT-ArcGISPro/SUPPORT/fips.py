@@ -0,0 +1,88 @@
+from collections import namedtuple
+from json import dump, load
+from os import getenv, listdir, makedirs, path, replace, stat
+from tempfile import gettempdir, mkstemp
+
+from arcpy.da import SearchCursor
+
+
+FIPS_LUT = path.join(path.dirname(path.abspath(__file__)), 'SUPPORT.gdb', 'lut_census_fips')
+FIPS_INDEX_PATH = path.join(getenv('LOCALAPPDATA', gettempdir()), 'GNT', 'fips_index.json')
+FIPS_FIELDS = ['STATE', 'NAME', 'STATEFP', 'COUNTYFP', 'STPOSTAL']
+
+FipsRecord = namedtuple('FipsRecord', ['statefp', 'countyfp', 'stpostal'])
+
+
+def normalizeName(name):
+    ''' Normalize a state or county name for lookup: case, surrounding and repeated spaces, and curly apostrophes.'''
+    return ' '.join(str(name).replace('’', "'").split()).casefold()
+
+
+class FipsIndex:
+    ''' State and county names from lut_census_fips, indexed to their FIPS codes and state postal code.'''
+
+    def __init__(self, rows):
+        self._records = {}
+        self._states = {}
+        self._counties = {}
+        for state, county, statefp, countyfp, stpostal in rows:
+            state_key = normalizeName(state)
+            self._records.setdefault((state_key, normalizeName(county)), FipsRecord(statefp or '', countyfp or '', stpostal or ''))
+            self._states.setdefault(state_key, state)
+            self._counties.setdefault(state_key, set()).add(county)
+
+    def lookup(self, state, county):
+        ''' Return the FipsRecord for a state and county name, or None if not found.'''
+        return self._records.get((normalizeName(state), normalizeName(county)))
+
+    def states(self):
+        ''' Return the sorted state names.'''
+        return sorted(self._states.values())
+
+    def counties(self, state):
+        ''' Return the sorted county names for a state name.'''
+        return sorted(self._counties.get(normalizeName(state), []))
+
+
+_loaded = {}
+
+def _gdbStamp(lut):
+    gdb = path.dirname(lut)
+    stamp = []
+    for file_name in sorted(listdir(gdb)):
+        if not file_name.endswith('.lock'):
+            file_stat = stat(path.join(gdb, file_name))
+            stamp.append([file_name, file_stat.st_mtime, file_stat.st_size])
+    return stamp
+
+
+def loadFipsIndex(lut=FIPS_LUT, index_path=FIPS_INDEX_PATH):
+    ''' Return the FipsIndex for lut, held in memory and cached as JSON at index_path.
+
+    The table is only read again when the files of its geodatabase change.
+    '''
+    stamp = _gdbStamp(lut)
+    if lut in _loaded and _loaded[lut][0] == stamp:
+        return _loaded[lut][1]
+
+    try:
+        with open(index_path) as f:
+            cached = load(f)
+        rows = cached['rows'] if cached['lut'] == lut and cached['stamp'] == stamp else None
+    except (OSError, ValueError, KeyError):
+        rows = None
+
+    if rows is None:
+        with SearchCursor(lut, FIPS_FIELDS) as cursor:
+            rows = [list(row) for row in cursor]
+        try:
+            makedirs(path.dirname(index_path), exist_ok=True)
+            fd, temp_path = mkstemp(suffix='.tmp', dir=path.dirname(index_path))
+            with open(fd, 'w') as f:
+                dump({'lut': lut, 'stamp': stamp, 'rows': rows}, f)
+            replace(temp_path, index_path)
+        except OSError:
+            pass
+
+    _loaded[lut] = (stamp, FipsIndex(rows))
+    return _loaded[lut][1]
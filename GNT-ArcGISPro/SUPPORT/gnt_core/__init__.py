@@ -0,0 +1,18 @@
+r''' GNT engines in plain Python, with no arcpy or map dependency, so they can run and be profiled outside ArcGIS Pro.
+
+    sda         query settings, the SDA geometry and per-field soil queries, and SDA response tables and field definitions
+    soils       writing SDA tables and each field's predominant SoilKey, and the whole download
+    spatial_ref WGS 1984 UTM zones and their EPSG codes
+    values      unique values and chunked IN list where clauses
+    renderers   cached soil map renderer JSON with deterministic map unit colors
+    buffers     setback buffer distances and the Setback_Line buffer plan
+    line_buffer side buffers of Setback_Line vertices (numpy)
+    mmp         rendering, merging and validating MMP files (jinja2)
+    backends    the GISBackend interface, with an arcpy backend for ArcGIS Pro and a shapely, pyproj and GeoPackage
+                backend for servers without it
+
+The toolbox scripts run the engines with backends.arcpy_backend.ArcpyBackend. Elsewhere, e.g. on a Linux batch server:
+    from gnt_core.backends import getBackend
+    from gnt_core.soils import downloadSoilData
+    downloadSoilData(getBackend('geo'), 'farm.gpkg/GNTFieldLayer', 'farm.gpkg', open('GNT_Query.txt').read())
+'''
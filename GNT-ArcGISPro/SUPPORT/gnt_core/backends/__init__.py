@@ -0,0 +1,53 @@
+''' GIS backends the gnt_core engines run against.
+
+Engines only pass datasets (a path to a table inside a workspace), field names, rows and WKT geometry to a backend,
+so the same engine runs in ArcGIS Pro or on a server without it. The SHAPE@WKT field name reads and writes the
+geometry of a row as WKT in the spatial reference of its dataset, as it does with arcpy cursors.
+'''
+from abc import ABC, abstractmethod
+
+
+BACKENDS = {
+    'arcpy': ('gnt_core.backends.arcpy_backend', 'ArcpyBackend'),
+    'geo': ('gnt_core.backends.geo_backend', 'GeoBackend')
+}
+
+
+class GISBackend(ABC):
+    ''' Operations the gnt_core engines need from a GIS.'''
+
+    @abstractmethod
+    def spatialReference(self, dataset):
+        ''' Return the WKID of the spatial reference of dataset.'''
+
+    @abstractmethod
+    def readRows(self, dataset, fields):
+        ''' Yield each row of dataset as a list of values for fields.'''
+
+    @abstractmethod
+    def createTable(self, workspace, name, fields, wkid=None):
+        ''' Create an empty table of SDAFields in workspace, or a polygon feature class when wkid is given, replacing
+        any existing one. Returns the path to the new dataset.'''
+
+    @abstractmethod
+    def insertRows(self, dataset, fields, rows):
+        ''' Insert rows of values for fields into dataset. Returns the number of rows inserted.'''
+
+    @abstractmethod
+    def updateRows(self, dataset, key_field, field, values):
+        ''' Set field from a dict of key_field value: new value, leaving rows whose key is not in values as they are.
+        Returns the number of rows updated.'''
+
+    @abstractmethod
+    def projectWKT(self, wkt, from_wkid, to_wkid):
+        ''' Return a WKT geometry projected from one spatial reference to another.'''
+
+
+def getBackend(name='arcpy'):
+    ''' Return a new backend by name, importing only its own GIS packages.'''
+    from importlib import import_module
+    try:
+        module_name, class_name = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown GIS backend {name}. Choose from: {', '.join(BACKENDS)}")
+    return getattr(import_module(module_name), class_name)()
@@ -0,0 +1,67 @@
+from functools import lru_cache
+from os import path
+
+from arcpy import Describe, Exists, FromWKT, SpatialReference
+from arcpy.da import InsertCursor, SearchCursor, UpdateCursor
+from arcpy.management import AddField, CreateFeatureclass, CreateTable, Delete
+
+from gnt_core.backends import GISBackend
+
+
+@lru_cache(maxsize=None)
+def _spatialReference(wkid):
+    return SpatialReference(wkid)
+
+
+class ArcpyBackend(GISBackend):
+    ''' Backend for ArcGIS Pro: file geodatabase datasets read and written with arcpy.da cursors.
+
+    Feature classes created in a GNT project geodatabase go in its Layers feature dataset.
+    '''
+
+    def spatialReference(self, dataset):
+        return Describe(dataset).spatialReference.factoryCode
+
+    def readRows(self, dataset, fields):
+        with SearchCursor(dataset, fields) as cursor:
+            for row in cursor:
+                yield list(row)
+
+    def createTable(self, workspace, name, fields, wkid=None):
+        if wkid is not None and Exists(path.join(workspace, 'Layers')):
+            workspace = path.join(workspace, 'Layers')
+        dataset = path.join(workspace, name)
+        if Exists(dataset):
+            Delete(dataset)
+
+        if wkid is None:
+            CreateTable(workspace, name)
+        else:
+            CreateFeatureclass(workspace, name, 'POLYGON', '', 'DISABLED', 'DISABLED', _spatialReference(wkid))
+        existing = [field.name.upper() for field in Describe(dataset).fields]
+        for field in fields:
+            if field.name.upper() not in existing:
+                AddField(dataset, field.name, field.type, field.precision, field.scale, field.length, field.alias)
+        return dataset
+
+    def insertRows(self, dataset, fields, rows):
+        count = 0
+        with InsertCursor(dataset, fields) as cursor:
+            for row in rows:
+                cursor.insertRow(row)
+                count += 1
+        return count
+
+    def updateRows(self, dataset, key_field, field, values):
+        updated = 0
+        with UpdateCursor(dataset, [key_field, field]) as cursor:
+            for row in cursor:
+                if row[0] in values:
+                    row[1] = values[row[0]]
+                    cursor.updateRow(row)
+                    updated += 1
+        return updated
+
+    def projectWKT(self, wkt, from_wkid, to_wkid):
+        # If a transformation isn't needed, none is specified; an inappropriate method would fail
+        return FromWKT(wkt, _spatialReference(from_wkid)).projectAs(_spatialReference(to_wkid), '').WKT
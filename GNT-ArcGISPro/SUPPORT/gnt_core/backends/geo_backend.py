@@ -0,0 +1,147 @@
+from functools import lru_cache
+from os import path
+from sqlite3 import connect
+from struct import pack
+
+try:
+    import shapely
+    from pyproj import CRS, Transformer
+except ImportError as e:
+    raise ImportError(f"The geo backend needs shapely 2.1+ and pyproj: pip install shapely pyproj ({e})")
+
+from gnt_core.backends import GISBackend
+
+
+# SQLite column types for SDAField types
+GPKG_FIELD_TYPES = {'text': 'TEXT', 'long': 'INTEGER', 'short': 'INTEGER', 'double': 'REAL', 'float': 'REAL',
+                    'date': 'DATETIME', 'blob': 'BLOB'}
+GPKG_APPLICATION_ID = 0x47504B47  # GPKG
+GPKG_USER_VERSION = 10300
+GEOMETRY_COLUMN = 'geom'
+
+# Bytes of envelope after the GeoPackage geometry header, by envelope indicator
+ENVELOPE_SIZES = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+GPKG_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+    srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY, organization TEXT NOT NULL,
+    organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL, description TEXT);
+CREATE TABLE IF NOT EXISTS gpkg_contents (
+    table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, identifier TEXT UNIQUE, description TEXT DEFAULT '',
+    last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, srs_id INTEGER);
+CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+    table_name TEXT NOT NULL, column_name TEXT NOT NULL, geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL,
+    z TINYINT NOT NULL, m TINYINT NOT NULL, PRIMARY KEY (table_name, column_name));
+INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES
+    ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', NULL),
+    ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', NULL);
+"""
+
+
+def gpkgGeometry(geometry, srs_id):
+    ''' Encode a shapely geometry as a GeoPackage geometry blob: little endian header with an XY envelope, then WKB.'''
+    if geometry.is_empty:
+        return b'GP' + pack('<BBi', 0, 0b00010001, srs_id) + shapely.to_wkb(geometry, byte_order=1)
+    min_x, min_y, max_x, max_y = geometry.bounds
+    return b'GP' + pack('<BBi4d', 0, 0b00000011, srs_id, min_x, max_x, min_y, max_y) + shapely.to_wkb(geometry, byte_order=1)
+
+
+def readGpkgGeometry(blob):
+    ''' Decode a GeoPackage geometry blob as a shapely geometry.'''
+    flags = blob[3]
+    return shapely.from_wkb(bytes(blob[8 + ENVELOPE_SIZES[(flags >> 1) & 0b111]:]))
+
+
+@lru_cache(maxsize=None)
+def _transformer(from_wkid, to_wkid):
+    return Transformer.from_crs(from_wkid, to_wkid, always_xy=True)
+
+
+class GeoBackend(GISBackend):
+    ''' Backend for servers without ArcGIS Pro: GeoPackage tables read and written with sqlite3, and geometry
+    handled by shapely and pyproj.
+
+    A dataset is the path of the table inside its GeoPackage, e.g. farm.gpkg/GNTFieldLayer, and the GeoPackage
+    is the workspace.
+    '''
+
+    def _connect(self, gpkg):
+        connection = connect(gpkg)
+        connection.executescript(GPKG_SCHEMA)
+        connection.execute(f"PRAGMA application_id = {GPKG_APPLICATION_ID}")
+        connection.execute(f"PRAGMA user_version = {GPKG_USER_VERSION}")
+        return connection
+
+    def _columns(self, fields):
+        return ', '.join(GEOMETRY_COLUMN if field == 'SHAPE@WKT' else f'"{field}"' for field in fields)
+
+    def spatialReference(self, dataset):
+        with self._connect(path.dirname(dataset)) as connection:
+            row = connection.execute('SELECT srs_id FROM gpkg_geometry_columns WHERE table_name = ?',
+                                     [path.basename(dataset)]).fetchone()
+        if row is None:
+            raise ValueError(f"{path.basename(dataset)} is not a feature table")
+        return row[0]
+
+    def readRows(self, dataset, fields):
+        connection = self._connect(path.dirname(dataset))
+        try:
+            geometry_index = fields.index('SHAPE@WKT') if 'SHAPE@WKT' in fields else None
+            for row in connection.execute(f'SELECT {self._columns(fields)} FROM "{path.basename(dataset)}"'):
+                row = list(row)
+                if geometry_index is not None and row[geometry_index] is not None:
+                    row[geometry_index] = readGpkgGeometry(row[geometry_index]).wkt
+                yield row
+        finally:
+            connection.close()
+
+    def createTable(self, workspace, name, fields, wkid=None):
+        columns = ['fid INTEGER PRIMARY KEY AUTOINCREMENT']
+        if wkid is not None:
+            columns.append(f"{GEOMETRY_COLUMN} GEOMETRY")
+        columns += [f'"{field.name}" {GPKG_FIELD_TYPES[field.type]}' for field in fields]
+
+        with self._connect(workspace) as connection:
+            connection.execute(f'DROP TABLE IF EXISTS "{name}"')
+            connection.execute('DELETE FROM gpkg_contents WHERE table_name = ?', [name])
+            connection.execute('DELETE FROM gpkg_geometry_columns WHERE table_name = ?', [name])
+            connection.execute(f'CREATE TABLE "{name}" ({", ".join(columns)})')
+            if wkid is None:
+                connection.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier) VALUES (?, 'attributes', ?)", [name, name])
+            else:
+                crs = CRS.from_epsg(wkid)
+                connection.execute("INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES (?, ?, 'EPSG', ?, ?, NULL)",
+                                   [crs.name, wkid, wkid, crs.to_wkt('WKT1_GDAL')])
+                connection.execute("INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, ?)",
+                                   [name, name, wkid])
+                connection.execute('INSERT INTO gpkg_geometry_columns VALUES (?, ?, ?, ?, 0, 0)', [name, GEOMETRY_COLUMN, 'GEOMETRY', wkid])
+        connection.close()
+        return path.join(workspace, name)
+
+    def insertRows(self, dataset, fields, rows):
+        geometry_index = fields.index('SHAPE@WKT') if 'SHAPE@WKT' in fields else None
+        srs_id = self.spatialReference(dataset) if geometry_index is not None else None
+        def encode(row):
+            row = list(row)
+            if geometry_index is not None and row[geometry_index] is not None:
+                row[geometry_index] = gpkgGeometry(shapely.from_wkt(row[geometry_index]), srs_id)
+            return row
+
+        with self._connect(path.dirname(dataset)) as connection:
+            cursor = connection.executemany(f'INSERT INTO "{path.basename(dataset)}" ({self._columns(fields)}) '
+                                            f'VALUES ({", ".join("?" * len(fields))})', map(encode, rows))
+            count = cursor.rowcount
+        connection.close()
+        return count
+
+    def updateRows(self, dataset, key_field, field, values):
+        with self._connect(path.dirname(dataset)) as connection:
+            cursor = connection.executemany(f'UPDATE "{path.basename(dataset)}" SET "{field}" = ? WHERE "{key_field}" = ?',
+                                            [(value, key) for key, value in values.items()])
+            count = cursor.rowcount
+        connection.close()
+        return count
+
+    def projectWKT(self, wkt, from_wkid, to_wkid):
+        return shapely.transform(shapely.from_wkt(wkt), _transformer(from_wkid, to_wkid).transform, interleaved=False).wkt
@@ -0,0 +1,21 @@
+# Setback BufferDistance values are always entered in feet
+BUFFER_UNIT = 'Feet'
+BUFFER_UNIT_SR_NAMES = ['Foot']
+METERS_PER_FOOT = 0.3048
+
+
+def bufferText(distance):
+    ''' Return the BufferField text for a BufferDistance, e.g. 100 Feet.'''
+    return f"{distance} {BUFFER_UNIT}"
+
+
+def planLineBuffers(lines, meters_per_unit):
+    ''' Yield (vertex arrays, distance in spatial reference units, BufferSides) for each Setback_Line row to buffer.
+
+    lines are (vertex arrays, BufferDistance in feet, BufferSides) rows, and rows without a shape or distance are
+    skipped. Rows without a BufferSides value are passed on, so line_buffer.bufferLineSides reports them as skipped.
+    '''
+    feet_to_units = METERS_PER_FOOT / meters_per_unit
+    for parts, distance, buffer_sides in lines:
+        if parts and distance:
+            yield parts, distance * feet_to_units, buffer_sides
@@ -0,0 +1,260 @@
+import numpy as np
+
+
+# BufferSides values from the Setback_Line template
+LEFT_SIDE = 'Left Side'
+RIGHT_SIDE = 'Right Side'
+BOTH_SIDES = 'Both Sides'
+BUFFER_SIDES = [LEFT_SIDE, RIGHT_SIDE, BOTH_SIDES]
+
+# Number of chords used to approximate a full circle (Buffer densifies round joins similarly)
+CIRCLE_CHORDS = 64
+
+
+def _cleanVertices(vertices):
+    ''' Return an (n, 2) float array with consecutive duplicate vertices removed.'''
+    vertices = np.asarray(vertices, dtype=float)[:, :2]
+    if len(vertices) < 2:
+        return vertices
+    keep = np.ones(len(vertices), dtype=bool)
+    keep[1:] = np.any(vertices[1:] != vertices[:-1], axis=1)
+    return vertices[keep]
+
+
+def _clockwise(rings):
+    ''' Reverse any counterclockwise rings in a (k, n, 2) array so all are ESRI exterior rings.'''
+    x, y = rings[..., 0], rings[..., 1]
+    signed_area = np.sum(x * np.roll(y, -1, axis=1) - np.roll(x, -1, axis=1) * y, axis=1)
+    rings[signed_area > 0] = rings[signed_area > 0, ::-1]
+    return rings
+
+
+def _fans(centers, start_angles, sweeps, distance):
+    ''' Build circular sector polygons as a (k, m, 2) array of rings: the center followed by the arc.'''
+    chords = max(int(np.ceil(CIRCLE_CHORDS * np.max(np.abs(sweeps)) / (2 * np.pi))), 1)
+    angles = start_angles[:, None] + sweeps[:, None] * np.linspace(0.0, 1.0, chords + 1)[None, :]
+    arcs = centers[:, None, :] + distance * np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+    return np.concatenate([centers[:, None, :], arcs], axis=1)
+
+
+def _clipSegments(a, b, low, high):
+    ''' Clip segments from a to b, (k, 2) arrays, each to its own box from low to high. Returns the clipped ends and
+    a mask of the segments that cross the inside of their box.'''
+    delta = b - a
+    t0, t1 = np.zeros(len(a)), np.ones(len(a))
+    inside = np.ones(len(a), dtype=bool)
+    for axis in range(2):
+        for bound, sign in ((low[:, axis], -1.0), (high[:, axis], 1.0)):
+            # Inside where sign * (a + t * delta - bound) <= 0, i.e. p * t <= q
+            p, q = sign * delta[:, axis], sign * (bound - a[:, axis])
+            ratio = q / np.where(p == 0, 1.0, p)
+            inside &= (p != 0) | (q >= 0)
+            t0 = np.where(p < 0, np.maximum(t0, ratio), t0)
+            t1 = np.where(p > 0, np.minimum(t1, ratio), t1)
+    inside &= t0 < t1
+    return a + t0[:, None] * delta, a + t1[:, None] * delta, inside
+
+
+def _pairs(low, high, seg_low, seg_high, rows=1024):
+    ''' Return (part, segment) index arrays of the part boxes, low to high, that overlap segment boxes.'''
+    parts, segments = [], []
+    for first in range(0, len(low), rows):
+        overlap = np.all(seg_low[None, :, :] <= high[first:first + rows, None, :], axis=2) & \
+            np.all(seg_high[None, :, :] >= low[first:first + rows, None, :], axis=2)
+        part, segment = np.nonzero(overlap)
+        parts.append(part + first)
+        segments.append(segment)
+    return np.concatenate(parts), np.concatenate(segments)
+
+
+def _entersConvex(rings, a, b):
+    ''' Mask of the segments from a to b that cross the inside of their convex clockwise ring, a (k, m, 2) array.'''
+    delta = b - a
+    t0, t1 = np.zeros(len(a)), np.ones(len(a))
+    inside = np.ones(len(a), dtype=bool)
+    edges = np.roll(rings, -1, axis=1) - rings
+    for edge in range(rings.shape[1]):
+        # Inward normals of clockwise ring edges point to the right
+        normal = np.stack([edges[:, edge, 1], -edges[:, edge, 0]], axis=1)
+        p = np.sum(delta * normal, axis=1)
+        q = np.sum((a - rings[:, edge]) * normal, axis=1)
+        # Inside where q + p * t > 0; degenerate edges do not cut
+        degenerate = np.all(normal == 0, axis=1)
+        ratio = -q / np.where(p == 0, 1.0, p)
+        inside &= degenerate | (p != 0) | (q > 0)
+        t0 = np.where(~degenerate & (p > 0), np.maximum(t0, ratio), t0)
+        t1 = np.where(~degenerate & (p < 0), np.minimum(t1, ratio), t1)
+    return inside & (t1 - t0 > 1e-9)
+
+
+def _clipQuad(start, direction, normal, length, distance, a, b):
+    ''' Return a segment's side quad cut back under neighbouring segments that reach into it, from a to b in quad
+    coordinates (along the segment, away from it on the buffered side), as a ring.'''
+    a, b = np.where((a[:, 0] <= b[:, 0])[:, None], a, b), np.where((a[:, 0] <= b[:, 0])[:, None], b, a)
+    slopes = (b[:, 1] - a[:, 1]) / (b[:, 0] - a[:, 0])
+    i, j = np.triu_indices(len(a), 1)
+    crossings = (a[j, 1] - a[i, 1] + slopes[i] * a[i, 0] - slopes[j] * a[j, 0]) / np.where(slopes[i] == slopes[j], 1.0, slopes[i] - slopes[j])
+    breaks = np.unique(np.concatenate([[0.0, length], a[:, 0], b[:, 0], crossings[slopes[i] != slopes[j]]]))
+    breaks = breaks[(breaks >= 0) & (breaks <= length)]
+
+    # Each piece between breaks lies under the lowest neighbour over it, or reaches the full distance
+    middles = (breaks[:-1] + breaks[1:]) / 2
+    covering = (a[None, :, 0] <= middles[:, None]) & (middles[:, None] <= b[None, :, 0])
+    heights = np.where(covering, a[None, :, 1] + slopes[None, :] * (middles[:, None] - a[None, :, 0]), np.inf)
+    lowest = np.argmin(heights, axis=1)
+    blocked = np.isfinite(heights[np.arange(len(middles)), lowest])
+
+    def top(along):
+        return np.minimum(np.where(blocked, a[lowest, 1] + slopes[lowest] * (along - a[lowest, 0]), distance), distance)
+
+    chain = np.stack([np.stack([breaks[:-1], top(breaks[:-1])], axis=1),
+                      np.stack([breaks[1:], top(breaks[1:])], axis=1)], axis=1).reshape(-1, 2)
+    ring = np.concatenate([[[0.0, 0.0], [length, 0.0]], chain[::-1]])
+    return start + ring @ np.stack([direction, normal])
+
+
+def _sideParts(starts, ends, normals, directions, closed, distance, sign, clip):
+    ''' Segment quads and convex join wedges for one side. sign is 1 for left, -1 for right.
+
+    With clip, quads are cut back under neighbouring segments that turn into them. Returns None if any other part of
+    the line reaches into a quad or wedge, or a neighbour ends inside a quad, since those parts would cover the other
+    side of the line.
+    '''
+    offset = sign * distance * normals
+    quads = _clockwise(np.stack([starts, ends, ends + offset, starts + offset], axis=1))
+    wedges = np.empty((0, 2, 2))
+
+    # Joins between consecutive segments (and between the last and first segment of a closed loop)
+    count = len(directions)
+    if closed:
+        incoming = np.arange(count)
+        outgoing = np.roll(incoming, -1)
+    else:
+        incoming = np.arange(count - 1)
+        outgoing = incoming + 1
+
+    if len(incoming):
+        d1, d2 = directions[incoming], directions[outgoing]
+        cross = d1[:, 0] * d2[:, 1] - d1[:, 1] * d2[:, 0]
+        dot = np.sum(d1 * d2, axis=1)
+        sweeps = np.arctan2(cross, dot)
+        # A full reversal wraps around the tip of the line on both sides
+        reversal = (cross == 0) & (dot < 0)
+        sweeps[reversal] = -sign * np.pi
+        gaps = sign * sweeps < 0
+        if np.any(gaps):
+            n1 = sign * normals[incoming[gaps]]
+            wedges = _clockwise(_fans(ends[incoming[gaps]], np.arctan2(n1[:, 1], n1[:, 0]), sweeps[gaps], distance))
+            joins = incoming[gaps]
+
+    if not clip:
+        return [list(quads), list(wedges)]
+
+    seg_low, seg_high = np.minimum(starts, ends), np.maximum(starts, ends)
+    lengths = np.hypot(*(ends - starts).T)
+    previous = np.roll(np.arange(count), 1) if closed else np.arange(count) - 1
+    following = np.roll(np.arange(count), -1) if closed else np.arange(count) + 1
+
+    # Every segment that reaches into a quad, in the quad's coordinates
+    quad, segment = _pairs(quads.min(axis=1), quads.max(axis=1), seg_low, seg_high)
+    keep = segment != quad
+    quad, segment = quad[keep], segment[keep]
+    frame = np.stack([directions[quad], sign * normals[quad]], axis=2)
+    a = np.einsum('ki,kij->kj', starts[segment] - starts[quad], frame)
+    b = np.einsum('ki,kij->kj', ends[segment] - starts[quad], frame)
+    low = np.stack([np.zeros(len(quad)), np.full(len(quad), 1e-9 * distance)], axis=1)
+    high = np.stack([lengths[quad], np.full(len(quad), distance)], axis=1)
+    a, b, inside = _clipSegments(a, b, low, high)
+    quad, segment, a, b, low, high = quad[inside], segment[inside], a[inside], b[inside], low[inside], high[inside]
+
+    neighbour = (segment == previous[quad]) | (segment == following[quad])
+    # A neighbour cuts a quad cleanly when it leaves through the far side or the ends of the quad
+    leaves = np.any(np.isclose(a, low) | np.isclose(a, high), axis=1) & np.any(np.isclose(b, low) | np.isclose(b, high), axis=1)
+    if not np.all(neighbour & leaves):
+        return None
+    # Neighbours running along the perpendiculars block none of them
+    keep = np.abs(b[:, 0] - a[:, 0]) > 1e-9 * lengths[quad]
+    quad, a, b = quad[keep], a[keep], b[keep]
+
+    parts = list(quads)
+    for i in np.unique(quad):
+        parts[i] = _clockwise(_clipQuad(starts[i], directions[i], sign * normals[i], lengths[i], distance,
+                                        a[quad == i], b[quad == i])[None])[0]
+
+    # A wedge only touches its own two segments, at its center
+    if len(wedges):
+        wedge, segment = _pairs(wedges.min(axis=1), wedges.max(axis=1), seg_low, seg_high)
+        keep = (segment != joins[wedge]) & (segment != following[joins[wedge]])
+        wedge, segment = wedge[keep], segment[keep]
+        if np.any(_entersConvex(wedges[wedge], starts[segment], ends[segment])):
+            return None
+        parts += list(wedges)
+    return [parts]
+
+
+def bufferLinePart(vertices, distance, buffer_sides):
+    ''' Return the buffer rings for one polyline part on the side(s) named by a BufferSides value.
+
+    Rings are clockwise (k, 2) vertex arrays that overlap one another; dissolving them gives the buffer polygon.
+    One-sided buffers have flat ends, matching Buffer LEFT/RIGHT, while Both Sides gets round ends.
+    Returns None for a one-sided buffer whose parts would reach across the line, where it zig-zags tighter than the
+    distance or comes back near itself. Those lines are left to Buffer, so the setback matches it exactly.
+    '''
+    if buffer_sides not in BUFFER_SIDES:
+        raise ValueError(f"Unknown BufferSides value: {buffer_sides}")
+
+    vertices = _cleanVertices(vertices)
+    if len(vertices) < 2 or not distance or distance <= 0:
+        return []
+
+    starts, ends = vertices[:-1], vertices[1:]
+    vectors = ends - starts
+    directions = vectors / np.hypot(vectors[:, 0], vectors[:, 1])[:, None]
+    normals = np.stack([-directions[:, 1], directions[:, 0]], axis=1)  # left hand normals
+    closed = len(starts) > 2 and np.array_equal(vertices[0], vertices[-1])
+
+    if buffer_sides == LEFT_SIDE:
+        parts = _sideParts(starts, ends, normals, directions, closed, distance, 1, True)
+    elif buffer_sides == RIGHT_SIDE:
+        parts = _sideParts(starts, ends, normals, directions, closed, distance, -1, True)
+    else:
+        parts = _sideParts(starts, ends, normals, directions, closed, distance, 1, False) + \
+            _sideParts(starts, ends, normals, directions, closed, distance, -1, False)
+    if parts is None:
+        return None
+    if buffer_sides == BOTH_SIDES and not closed:
+        caps = np.stack([vertices[0], vertices[-1]])
+        circles = _fans(caps, np.zeros(2), np.full(2, 2 * np.pi), distance)[:, 1:-1]
+        parts.append(_clockwise(circles))
+
+    return [ring for group in parts for ring in group]
+
+
+def bufferLineSides(lines, skipped=None, tangled=None):
+    ''' Buffer setback lines by BufferSides in a single traversal.
+
+    lines is an iterable of (parts, distance, buffer_sides) where parts is a list of vertex arrays.
+    Returns a dict of BufferSides value to the list of buffer rings for that side. Lines with a missing BufferSides
+    value or one outside the domain are not buffered; their values are appended to skipped, if given. One-sided lines
+    that bufferLinePart leaves to Buffer are not buffered either; they are appended to tangled, if given.
+    '''
+    rings = {side: [] for side in BUFFER_SIDES}
+    for line in lines:
+        parts, distance, buffer_sides = line
+        if buffer_sides not in rings:
+            if skipped is not None:
+                skipped.append(buffer_sides)
+            continue
+        line_rings = []
+        for vertices in parts:
+            part_rings = bufferLinePart(vertices, distance, buffer_sides)
+            if part_rings is None:
+                line_rings = None
+                break
+            line_rings += part_rings
+        if line_rings is None:
+            if tangled is not None:
+                tangled.append(line)
+        else:
+            rings[buffer_sides] += line_rings
+    return rings
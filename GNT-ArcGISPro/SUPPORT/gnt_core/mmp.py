@@ -0,0 +1,500 @@
+from collections import namedtuple
+from contextlib import contextmanager
+from decimal import Decimal
+from functools import lru_cache
+from json import dump, load
+from os import getenv, listdir, makedirs, path, remove, replace, stat
+from tempfile import gettempdir, mkstemp
+
+
+TEMPLATES_DIR = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'templates') #\SUPPORT\templates
+MMP_TEMPLATE = 'template.mmp'
+
+MMP_INSTALL_FOLDER = r'C:\Program Files (x86)\USDA'
+MMP_INDEX_PATH = path.join(getenv('LOCALAPPDATA', gettempdir()), 'GNT', 'mmp_index.json')
+
+# Number of template chunks joined before each write to the output file
+STREAM_BUFFER_SIZE = 64
+
+# Admin_Table fields read for the [PlanInfo] and [Operation] sections, and the template keys they map to
+ADMIN_FIELDS = ['operation_name', 'street', 'city', 'state', 'zip', 'contact_name', 'office_phone', 'home_phone', 'email', 'notes', 'county_code', 'start_year', 'start_month', 'plan_years']
+ADMIN_KEYS = ['Operation', 'Address', 'Town', 'State', 'Zip', 'Contact', 'OffPhone', 'HomePhone', 'EMail', 'Notes', 'CntyCode', 'StartPlnYr', 'StartPlnMo', 'PlanYears']
+
+# GNTFieldLayer fields written to each [Field=N] section of the MMP file
+FIELD_RECORD_FIELDS = ['ID', 'SubID', 'Size', 'SpreadSize', 'SoilKey', 'FarmID', 'FSAFarm', 'FSATract', 'FSAField']
+
+class FieldRecord(namedtuple('FieldRecord', FIELD_RECORD_FIELDS)):
+    ''' GNTFieldLayer row formatted for the MMP template.'''
+    __slots__ = ()
+
+
+def adminData(row):
+    ''' Format an Admin_Table row, read with ADMIN_FIELDS, as the admin_data dict used by the MMP template.'''
+    admin_data = {key: value if value else '' for key, value in zip(ADMIN_KEYS, row)}
+    admin_data['CntyCode'] = str(int(row[10])) if row[10] else '' #str(int()) removes leading zeros
+    return admin_data
+
+
+def fieldRecord(row):
+    ''' Format a GNTFieldLayer row, read with FIELD_RECORD_FIELDS, as a FieldRecord.'''
+    try:
+        size = Decimal(str(row[2]))
+        spread_size = Decimal(str(row[3]))
+    except Exception:
+        raise ValueError('There is a problem with either Size or SpreadSize for one or more Fields.')
+    return FieldRecord(
+        row[0] if row[0] else '',
+        row[1] if row[1] else '',
+        round(size, 1) if row[2] else '',
+        round(spread_size, 1) if row[3] else '', #NOTE: MMP throws error if SpreadSize is 0. It says must be greater than 0.1, but what if entire field is not spreadable?
+        f"{row[4]}_1" if row[4] else '', #NOTE: ArcMap tool is hardcoding _1, but some of the .mms files have other numbers?
+        row[5] if row[5] else '',
+        row[6] if row[6] else '',
+        row[7] if row[7] else '',
+        row[8] if row[8] else ''
+    )
+
+
+def fieldRecords(rows):
+    ''' Lazily yield a FieldRecord for each GNTFieldLayer row, e.g. straight from a SearchCursor.'''
+    for row in rows:
+        yield fieldRecord(row)
+
+
+@lru_cache(maxsize=None)
+def templateEnvironment():
+    ''' Return the session Jinja environment for SUPPORT\\templates.
+
+    The environment keeps compiled templates in memory between calls (reloading them if the file changes), and
+    the bytecode cache in the user temp folder lets new sessions skip compiling the template again. jinja2 is
+    imported here so tools that only read MMP files, or exit early, don't pay for it.
+    '''
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+    return Environment(loader=FileSystemLoader(TEMPLATES_DIR), bytecode_cache=FileSystemBytecodeCache())
+
+
+def getTemplate(name=MMP_TEMPLATE):
+    ''' Return a compiled template from SUPPORT\\templates.'''
+    return templateEnvironment().get_template(name)
+
+
+@contextmanager
+def atomicOutput(output_path, check=None):
+    ''' Open a temp file beside output_path for writing, and replace output_path with it only once complete.
+
+    A failure part way through removes the temp file, so output_path is never left half written. If given, check is
+    called with the completed temp file path and any errors it returns raise a ValueError instead of the replace.
+    '''
+    fd, temp_path = mkstemp(prefix=f"{path.basename(output_path)}.", suffix='.tmp', dir=path.dirname(output_path))
+    try:
+        with open(fd, 'w', encoding='utf-8', errors='surrogateescape', newline='') as f:
+            yield f
+        errors = check(temp_path) if check else None
+        if errors:
+            more = f" (and {len(errors) - 5} more)" if len(errors) > 5 else ''
+            raise ValueError(f"{path.basename(output_path)} would not be accepted by MMP: {'; '.join(errors[:5])}{more}.")
+        replace(temp_path, output_path)
+    except BaseException:
+        try:
+            remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def writeMMPFile(template, output_path, check=None, **context):
+    ''' Stream a rendered MMP template to output_path in buffered chunks, replacing the file atomically.'''
+    with atomicOutput(output_path, check) as f:
+        stream = template.stream(**context)
+        stream.enable_buffering(STREAM_BUFFER_SIZE)
+        stream.dump(f)
+
+
+# Keys GNT writes in each section; everything else in an existing .mmp belongs to the planner and is kept as is
+GNT_SECTION_KEYS = {
+    'PlanInfo': ['Source', 'RevDate', 'RevTime', 'InitLookup', 'InitDate', 'SoilDate', 'PlanYears'],
+    'Operation': ADMIN_KEYS,
+    'Field': FIELD_RECORD_FIELDS
+}
+
+
+class MMPSection:
+    ''' One [Name=Number] section of an MMP file, kept as its raw lines with an index of key line positions.'''
+    __slots__ = ('name', 'number', 'lines', 'keys')
+
+    def __init__(self, name, number, lines):
+        self.name = name
+        self.number = number
+        self.lines = lines
+        self.keys = _indexKeys(lines)
+
+    def get(self, key, default=None):
+        ''' Return the value of key, without its line ending.'''
+        i = self.keys.get(key)
+        return self.lines[i].partition('=')[2].rstrip('\r\n') if i is not None else default
+
+    def set(self, key, value):
+        ''' Set the value of key, keeping the line ending. Returns True if the value changed.'''
+        i = self.keys.get(key)
+        if i is None:
+            newline = _lineEnding(self.lines[0]) if self.lines else '\n'
+            # Add missing keys before any blank lines that close the section
+            i = len(self.lines)
+            while i > 1 and not self.lines[i - 1].strip():
+                i -= 1
+            self.lines.insert(i, f"{key}={value}{newline}")
+            self.keys = _indexKeys(self.lines)
+            return True
+        if self.get(key) == value:
+            return False
+        self.lines[i] = f"{key}={value}{_lineEnding(self.lines[i])}"
+        return True
+
+
+def _indexKeys(lines):
+    keys = {}
+    for i, line in enumerate(lines):
+        key, sep, _ = line.partition('=')
+        if sep and not line.startswith((';', '[')):
+            keys.setdefault(key.strip(), i)
+    return keys
+
+
+def _lineEnding(line):
+    return line[len(line.rstrip('\r\n')):] or '\n'
+
+
+def _chunkLines(chunks):
+    ''' Split a stream of text chunks into lines, keeping line endings.'''
+    pending = ''
+    for chunk in chunks:
+        pending += chunk
+        lines = pending.splitlines(keepends=True)
+        pending = lines.pop() if lines and not lines[-1].endswith(('\n', '\r')) else ''
+        yield from lines
+    if pending:
+        yield pending
+
+
+def readMMPSections(lines):
+    ''' Group MMP file lines into MMPSections. Lines before the first section header have a name of None.'''
+    name, number, section_lines = None, None, []
+    for line in lines:
+        if line.startswith('['):
+            if section_lines:
+                yield MMPSection(name, number, section_lines)
+            header = line.strip().strip('[]')
+            name, _, number = header.partition('=')
+            section_lines = [line]
+        else:
+            section_lines.append(line)
+    if section_lines:
+        yield MMPSection(name, number, section_lines)
+
+
+def _countAdded(fields, stats):
+    for field in fields:
+        stats['added'] += 1
+        yield field
+
+
+def _fieldKey(section):
+    return (section.get('ID', ''), section.get('SubID', ''))
+
+
+def mergeMMPFile(template, output_path, check=None, **context):
+    ''' Update an existing MMP file with newly rendered GNT data, or write it from scratch if it does not exist.
+
+    [Field=N] sections are matched on ID and SubID. Only GNT-owned keys (GNT_SECTION_KEYS) of matched sections are
+    patched; soil tests and any other planner edits are kept. Fields no longer in GNTFieldLayer are removed, new
+    fields are added after the last existing field, and fields are renumbered in order. The file is replaced
+    atomically, after passing check if given (see atomicOutput). Returns counts of unchanged, patched, added and
+    removed fields.
+    '''
+    stats = {'unchanged': 0, 'patched': 0, 'added': 0, 'removed': 0}
+    if not path.isfile(output_path):
+        context['gnt_fields'] = _countAdded(context.get('gnt_fields', []), stats)
+        writeMMPFile(template, output_path, check, **context)
+        return stats
+
+    # Index the rendered sections; field order follows GNTFieldLayer
+    rendered = {}
+    rendered_fields = {}
+    for section in readMMPSections(_chunkLines(template.generate(**context))):
+        if section.name == 'Field':
+            rendered_fields.setdefault(_fieldKey(section), section)
+        elif section.name is not None:
+            rendered[section.name] = section
+
+    with open(output_path, encoding='utf-8', errors='surrogateescape', newline='') as existing, atomicOutput(output_path, check) as f:
+        field_number = 0
+        pending = [] # sections after the most recent field section, written once it is known whether more fields follow
+        newline = None
+
+        def writeField(section):
+            nonlocal field_number
+            field_number += 1
+            section.lines[0] = f"[Field={field_number}]{_lineEnding(section.lines[0])}"
+            f.writelines(section.lines)
+
+        for section in readMMPSections(existing):
+            if newline is None:
+                newline = _lineEnding(section.lines[0])
+            if section.name is None:
+                f.writelines(section.lines)
+                continue
+
+            if section.name != 'Field':
+                new = rendered.get(section.name)
+                if new is not None:
+                    for key in GNT_SECTION_KEYS.get(section.name, []):
+                        if key in new.keys:
+                            section.set(key, new.get(key))
+                if field_number:
+                    pending.append(section)
+                else:
+                    f.writelines(section.lines)
+                continue
+
+            new = rendered_fields.pop(_fieldKey(section), None)
+            if new is None:
+                stats['removed'] += 1
+                continue
+            for pending_section in pending:
+                f.writelines(pending_section.lines)
+            pending = []
+            changed = [section.set(key, new.get(key, '')) for key in GNT_SECTION_KEYS['Field']]
+            stats['patched' if any(changed) else 'unchanged'] += 1
+            writeField(section)
+
+        for new in rendered_fields.values():
+            new.lines = [line.rstrip('\r\n') + (newline or '\n') if line.endswith(('\n', '\r')) else line for line in new.lines]
+            stats['added'] += 1
+            writeField(new)
+        for pending_section in pending:
+            f.writelines(pending_section.lines)
+
+    return stats
+
+
+# MMP refuses fields with a SpreadSize under this many acres
+MMP_MIN_SPREAD_SIZE = Decimal('0.1')
+
+MMPSectionEntry = namedtuple('MMPSectionEntry', ['name', 'number', 'offset', 'size', 'keys', 'values'])
+
+
+def _utf8(value):
+    return value if value.isascii() else value.encode('latin-1').decode('utf-8', 'surrogateescape')
+
+
+def indexMMPFile(mmp_path, value_keys=()):
+    ''' Stream an MMP file into a list of MMPSectionEntry, one per section in file order.
+
+    Each entry has the byte offset and size of its section, keys as a dict of key: byte offset of the key line, and
+    values as a dict of key: value for just the keys in value_keys. Lines before the first section header are an
+    entry with a name of None.
+    '''
+    # latin-1 maps each byte to one character, so string lengths are byte offsets; values are decoded as utf-8 after
+    value_keys = frozenset(value_keys)
+    sections = []
+    name = number = None
+    keys, values = {}, {}
+    start = offset = 0
+    with open(mmp_path, encoding='latin-1', newline='') as f:
+        for line in f:
+            if line[:1] == '[':
+                if offset > start:
+                    sections.append(MMPSectionEntry(name, number, start, offset - start, keys, values))
+                name, _, number = _utf8(line.strip().strip('[]')).partition('=')
+                keys, values = {}, {}
+                start = offset
+            elif line[:1] != ';':
+                key, sep, value = line.partition('=')
+                if sep and key not in keys:
+                    keys[key] = offset
+                    if key in value_keys:
+                        values[key] = _utf8(value.rstrip('\r\n'))
+            offset += len(line)
+    if offset > start:
+        sections.append(MMPSectionEntry(name, number, start, offset - start, keys, values))
+    return sections
+
+
+def readMMPSection(mmp_path, entry):
+    ''' Read just the section for an MMPSectionEntry from an MMP file, as an MMPSection.'''
+    with open(mmp_path, 'rb') as f:
+        f.seek(entry.offset)
+        text = f.read(entry.size).decode('utf-8', 'surrogateescape')
+    return MMPSection(entry.name, entry.number, text.splitlines(keepends=True))
+
+
+def _decimal(value):
+    try:
+        return Decimal(value)
+    except Exception:
+        return None
+
+
+def validateMMPFile(mmp_path, expected_fields=None):
+    ''' Check an MMP file against the constraints MMP enforces on import. Returns a list of error messages.
+
+    If expected_fields, a dict of (ID, SubID): FieldRecord, is given the [Field=N] sections must also match it, so
+    Size and SpreadSize in the file agree with GNTFieldLayer.
+    '''
+    errors = []
+    sections = indexMMPFile(mmp_path, ['ID', 'SubID', 'Size', 'SpreadSize'])
+    names = {entry.name for entry in sections}
+    for required in ('PlanInfo', 'Operation'):
+        if required not in names:
+            errors.append(f"missing [{required}] section")
+
+    seen = set()
+    field_number = 0
+    for entry in sections:
+        if entry.name != 'Field':
+            continue
+        field_number += 1
+        values = entry.values
+        label = f"[Field={entry.number}]"
+        if entry.number != str(field_number):
+            errors.append(f"{label} is out of sequence, expected [Field={field_number}]")
+
+        field_key = (values.get('ID', ''), values.get('SubID', ''))
+        if not field_key[0]:
+            errors.append(f"{label} has no ID")
+        elif field_key in seen:
+            errors.append(f"{label} repeats field {field_key[0]}-{field_key[1]}")
+        seen.add(field_key)
+
+        size = _decimal(values.get('Size', ''))
+        spread_size = _decimal(values.get('SpreadSize', ''))
+        if size is None or size <= 0:
+            errors.append(f"{label} Size must be greater than 0")
+        if spread_size is None or spread_size < MMP_MIN_SPREAD_SIZE:
+            errors.append(f"{label} SpreadSize must be at least {MMP_MIN_SPREAD_SIZE}")
+
+        if expected_fields is not None:
+            expected = expected_fields.get(field_key)
+            if expected is None:
+                errors.append(f"{label} field {field_key[0]}-{field_key[1]} is not in GNTFieldLayer")
+            else:
+                for key, value in (('Size', size), ('SpreadSize', spread_size)):
+                    if value != _decimal(str(getattr(expected, key))):
+                        errors.append(f"{label} {key} does not match GNTFieldLayer")
+
+    if expected_fields is not None:
+        for field_key in expected_fields.keys() - seen:
+            errors.append(f"field {field_key[0]}-{field_key[1]} from GNTFieldLayer is missing")
+    return errors
+
+
+def expectFields(records, expected_fields):
+    ''' Pass FieldRecords through while collecting them into expected_fields by (ID, SubID), for validateMMPFile.'''
+    for record in records:
+        expected_fields[(str(record.ID), str(record.SubID))] = record
+        yield record
+
+
+MMPStateInfo = namedtuple('MMPStateInfo', ['mmp_version', 'mmi_file', 'mms_file', 'mmi_RevDate', 'mms_RevDate'])
+
+
+def _mtime(file_path):
+    try:
+        return stat(file_path).st_mtime
+    except OSError:
+        return None
+
+
+def readRevDate(file_path):
+    ''' Return the RevDate value from an MMP .mmi or .mms file, or None if the file has no RevDate.'''
+    with open(file_path, errors='replace') as f:
+        for line in f:
+            if 'RevDate' in line:
+                return line.split('=', 1)[1].rstrip('\n') if '=' in line else None
+    return None
+
+
+def _lookupEntry(file_path, entry=None):
+    ''' Return the index entry for a lookup file, reusing entry if the file has not changed since it was read.'''
+    mtime = _mtime(file_path)
+    if entry and entry.get('path') == file_path and entry.get('mtime') == mtime:
+        return entry
+    return {'path': file_path, 'mtime': mtime, 'RevDate': readRevDate(file_path) if mtime is not None else None}
+
+
+def _scanInstall(install_folder):
+    ''' Scan the USDA install folder for the MMP folder and the state .mmi and .mms lookup files.'''
+    index = {'install_folder': install_folder, 'install_mtime': _mtime(install_folder), 'mmp_version': None,
+             'mmp_folder': None, 'lookup_mtime': None, 'states': {}}
+    if index['install_mtime'] is None:
+        return index
+
+    for folder in listdir(install_folder):
+        if 'MMP' in folder:
+            index['mmp_version'] = folder
+            index['mmp_folder'] = path.join(install_folder, folder)
+    return index
+
+
+def _scanLookup(index, cached_states):
+    lookup_folder = path.join(index['mmp_folder'], 'Lookup')
+    index['lookup_mtime'] = _mtime(lookup_folder)
+    index['states'] = {}
+    if index['lookup_mtime'] is None:
+        return
+    for file_name in listdir(lookup_folder):
+        state, ext = path.splitext(file_name)
+        ext = ext.lower().lstrip('.')
+        if ext in ('mmi', 'mms'):
+            cached = cached_states.get(state.upper(), {}).get(ext)
+            index['states'].setdefault(state.upper(), {})[ext] = _lookupEntry(path.join(lookup_folder, file_name), cached)
+
+
+def loadMMPIndex(install_folder=MMP_INSTALL_FOLDER, index_path=MMP_INDEX_PATH, states=None):
+    ''' Return the MMP install index: MMP version and folder, and per-state lookup file paths, mtimes and RevDates.
+
+    The index is cached as JSON at index_path. Folders are only rescanned when their mtime changes, and lookup
+    files for the given states (all states if None) are only reread when their own mtime changes.
+    '''
+    try:
+        with open(index_path) as f:
+            cached = load(f)
+    except (OSError, ValueError):
+        cached = {}
+
+    index = cached
+    changed = False
+    if cached.get('install_folder') != install_folder or cached.get('install_mtime') != _mtime(install_folder):
+        index = _scanInstall(install_folder)
+        changed = True
+
+    if index['mmp_folder'] is not None:
+        if changed or index['lookup_mtime'] != _mtime(path.join(index['mmp_folder'], 'Lookup')):
+            _scanLookup(index, cached.get('states', {}))
+            changed = True
+        else:
+            for state in (index['states'] if states is None else [state.upper() for state in states]):
+                entries = index['states'].get(state, {})
+                for ext, entry in entries.items():
+                    refreshed = _lookupEntry(entry['path'], entry)
+                    if refreshed is not entry:
+                        entries[ext] = refreshed
+                        changed = True
+
+    if changed:
+        try:
+            makedirs(path.dirname(index_path), exist_ok=True)
+            with atomicOutput(index_path) as f:
+                dump(index, f, indent=2)
+        except OSError:
+            pass
+    return index
+
+
+def mmpStateInfo(state, install_folder=MMP_INSTALL_FOLDER, index_path=MMP_INDEX_PATH):
+    ''' Return MMPStateInfo for a state postal code. Values are None where the install, files or RevDates are missing.'''
+    index = loadMMPIndex(install_folder, index_path, [state] if state else [])
+    entries = index['states'].get(state.upper(), {}) if state else {}
+    mmi = entries.get('mmi', {})
+    mms = entries.get('mms', {})
+    return MMPStateInfo(index['mmp_version'], mmi.get('path'), mms.get('path'), mmi.get('RevDate'), mms.get('RevDate'))
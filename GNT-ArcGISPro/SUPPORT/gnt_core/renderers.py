@@ -0,0 +1,86 @@
+# Layer definition JSON for the soil map renderers, passed to updateLayerFromJSON. Colors are esri [r, g, b, alpha].
+# Each renderer is built once per (field, values, style) and reused as a JSON string, so every map and session draws
+# a map unit symbol in the same color.
+from colorsys import hsv_to_rgb
+from functools import lru_cache
+from json import dumps
+from zlib import crc32
+
+
+# Outline colors of the simple renderers by name; 'black' and 'white' are swapped as the soil map has always drawn them
+OUTLINE_COLORS = {
+    'black': [255, 255, 255, 255],
+    'yellow': [230, 230, 0, 255],
+    'red': [255, 0, 0, 255],
+    'white': [0, 0, 0, 255]
+}
+NULL_FILL = [255, 255, 255, 255]
+NO_OUTLINE = [0, 0, 0, 0]
+BLACK = [0, 0, 0, 255]
+NOT_RATED = 'Not rated'
+NOT_RATED_COLOR = [178, 178, 178, 255]
+WATER_MUSYM = 'W'
+WATER_OUTLINE = [64, 101, 235, 255]
+WATER_FILL = [151, 219, 255, 125]
+WATER_MUSYM_FILL = [151, 219, 242, 255]
+
+
+def valueColor(value, saturation=0.45, brightness=0.9):
+    ''' Return the palette color of a value: a hue from a stable hash of its text, the same in every session.'''
+    red, green, blue = hsv_to_rgb((crc32(str(value).encode()) % 360) / 360, saturation, brightness)
+    return [round(red * 255), round(green * 255), round(blue * 255), 255]
+
+
+def _fillSymbol(fill, outline, width, style='esriSFSSolid'):
+    return {'type': 'esriSFS', 'style': style, 'color': fill,
+            'outline': {'type': 'esriSLS', 'style': 'esriSLSSolid', 'color': outline, 'width': width}}
+
+
+def _simpleDefinition(symbol):
+    return dumps({'drawingInfo': {'renderer': {'type': 'simple', 'symbol': symbol}}})
+
+
+@lru_cache(maxsize=None)
+def simpleRenderer(width, color='black'):
+    ''' Return the layer definition JSON of unfilled outlines of a width and named color, black if unknown.'''
+    return _simpleDefinition(_fillSymbol(NULL_FILL, OUTLINE_COLORS.get(color, OUTLINE_COLORS['black']), width,
+                                         'esriSFSNull'))
+
+
+@lru_cache(maxsize=None)
+def waterRenderer(width):
+    ''' Return the layer definition JSON of water polygons: cyan fill and dark blue outlines of a width.'''
+    return _simpleDefinition(_fillSymbol(WATER_FILL, WATER_OUTLINE, width))
+
+
+def _valueInfo(value, symbol):
+    return {'value': value, 'description': '', 'label': value, 'symbol': symbol}
+
+
+@lru_cache(maxsize=None)
+def _uniqueValuesRenderer(field, values, draw_outlines):
+    outline = BLACK if draw_outlines else NO_OUTLINE
+    infos = []
+    for value in values:
+        if value == WATER_MUSYM:
+            infos.append(_valueInfo(value, _fillSymbol(WATER_MUSYM_FILL, WATER_OUTLINE, 1.5)))
+        elif value == NOT_RATED:
+            infos.append(_valueInfo(value, _fillSymbol(NOT_RATED_COLOR, outline, 0)))
+        else:
+            infos.append(_valueInfo(value, _fillSymbol(valueColor(value), outline, 0.4)))
+
+    return dumps({
+        'displayField': field,
+        'fields': [{'name': field, 'alias': field + ' alias', 'type': 'esriFieldTypeString'}],
+        'drawingInfo': {'renderer': {
+            'type': 'uniqueValue', 'field1': field, 'field2': None, 'field3': None, 'fieldDelimiter': ', ',
+            'defaultSymbol': None, 'defaultLabel': None, 'uniqueValueInfos': infos
+        }}
+    })
+
+
+def uniqueValuesRenderer(field, values, draw_outlines=True, sort=True):
+    ''' Return the layer definition JSON of a unique value renderer of the text values of a field, in sorted order
+    unless sort is False, with water and not rated symbols and palette colors for the rest.'''
+    values = tuple(str(value) for value in values)
+    return _uniqueValuesRenderer(field, tuple(sorted(values)) if sort else values, draw_outlines)
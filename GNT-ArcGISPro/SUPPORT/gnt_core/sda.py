@@ -0,0 +1,355 @@
+from collections import namedtuple
+from csv import DictReader
+from datetime import datetime
+from json import dumps, loads
+from os import path
+
+from gnt_core.values import quoted
+
+
+SDA_URL = r"https://sdmdataaccess.nrcs.usda.gov"
+SUPPORT_DIR = path.dirname(path.dirname(path.abspath(__file__)))
+
+# Declares, for each tool that queries SDA, the attribute query file and how soil polygon geometry is returned:
+# full resolution, or reduced on the server to REDUCE_TOLERANCE meters. Tools ship with full geometry, a GEOMETRY of
+# reduced opts a tool in to the smaller download.
+SDA_QUERY_SETTINGS = path.join(SUPPORT_DIR, 'SDA_QuerySettings.csv')
+GEOMETRY_MODES = ['full', 'reduced']
+
+# Length of the landunit column of the AOI tables, VARCHAR(20)
+LANDUNIT_LENGTH = 20
+
+# Seconds to wait for Soil Data Access, which is really long. Before metrics it used to be 30 seconds.
+SDA_TIMEOUT = 120
+
+# Output names of the tables returned by the GNT query with the predominant soil of each field, in sequence
+SOIL_MAP_TABLE = 'SoilMap_by_Landunit'
+FIELD_SOILS_TABLE = 'FieldSoils'
+SDA_TABLE_NAMES = {'TABLE': SOIL_MAP_TABLE, 'TABLE1': 'MapunitAcres', 'TABLE2': 'DominantSoils', 'TABLE3': FIELD_SOILS_TABLE}
+
+# The same without the soil map
+ATTRIBUTE_TABLE_NAMES = {'TABLE': 'MapunitAcres', 'TABLE1': 'DominantSoils', 'TABLE2': FIELD_SOILS_TABLE}
+
+# Dictionary: SQL Server to FGDB
+SQL_FIELD_TYPES = {
+    'int': 'long',
+    'bigint': 'long',
+    'smallint': 'short',
+    'tinyint': 'short',
+    'bit': 'short',
+    'varbinary': 'blob',
+    'nvarchar': 'text',
+    'varchar': 'text',
+    'char': 'text',
+    'datetime': 'date',
+    'datetime2': 'date',
+    'smalldatetime': 'date',
+    'decimal': 'double',
+    'float': 'double',
+    'udt': 'text',  # probably geometry or geography data
+    'xml': 'text',
+    'numeric': 'float',  # 4 bytes
+    'real': 'double'  # 8 bytes
+}
+
+# Option for field aliases, Use uppercase physical name as key
+FIELD_ALIASES = {
+    'MU_KFACTOR': 'Kw',
+    'SOIL_SLP_LGTH_FCTR': 'LS',
+    'MU_TFACTOR': 'T',
+    'NA1': 'C',
+    'MU_IFACTOR': 'WEI',
+    'SOIL_LCH_IND': 'LCH',
+    'LONG_LEAF_SUIT_IND': 'LLP',
+    'WESL_IND': 'WESL',
+    'NA2': 'Water EI',
+    'MUKEY': 'mukey',
+    'NA3': 'Wind EI',
+    'NCCPI': 'NCCPI',
+    'NA4': 'RKLS',
+    'CFACTOR': 'CFactor',
+    'RFACTOR': 'RFactor',
+    'NIRRCAPCLASS': 'NIrrCapClass',
+    'POLY_ACRES': 'PolyAcres'
+}
+
+# Columns holding geometry, which become the shape of a feature class rather than a field
+GEOMETRY_COLUMNS = ['WKTGEOM', 'WKBGEOG', 'SOILGEOG']
+
+# Soil map geometry in the attribute query, and the expressions it becomes when reduced
+SOIL_MAP_WKT = 'soilgeog.STAsText() AS wktgeom'
+SOIL_MAP_FROM = 'FROM #AoiSoils3 AS3'
+REDUCED_SOIL_MAP_WKT = 'CASE WHEN R.reducedgeog.STDimension() = 2 THEN R.reducedgeog.STAsText() ELSE soilgeog.STAsText() END AS wktgeom'
+REDUCED_SOIL_MAP_FROM = 'FROM #AoiSoils3 AS3\n   CROSS APPLY (SELECT soilgeog.Reduce({tolerance}) AS reducedgeog) AS R'
+
+# Appended to the attribute query for AOIs of single fields: the musym covering most of each landunit, summed by
+# areasymbol and musym like SoilKey, with ties going to the first areasymbol and musym
+FIELD_SOILS_QUERY = """
+-- Predominant soil map unit of each landunit
+SELECT landunit, areasymbol, musym, mukey, mapunit_acres
+    FROM ( SELECT AS3.landunit, MU.areasymbol, MU.musym, MIN(AS3.mukey) AS mukey, ROUND(SUM(AS3.poly_acres), 3) AS mapunit_acres,
+           ROW_NUMBER() OVER(PARTITION BY AS3.landunit ORDER BY SUM(AS3.poly_acres) DESC, MU.areasymbol, MU.musym) AS soil_rank
+           FROM #AoiSoils3 AS3
+           INNER JOIN #MapunitTbl MU ON AS3.mukey = MU.mukey
+           GROUP BY AS3.landunit, MU.areasymbol, MU.musym ) AS LS
+    WHERE soil_rank = 1
+    ORDER BY landunit
+;
+"""
+
+SDAField = namedtuple('SDAField', ['name', 'type', 'precision', 'scale', 'length', 'alias'])
+QuerySettings = namedtuple('QuerySettings', ['query_file', 'geometry', 'reduce_tolerance'])
+
+
+class SDATable(namedtuple('SDATable', ['name', 'column_names', 'column_info', 'rows'])):
+    ''' Table from a Soil Data Access JSON+COLUMNNAME+METADATA response. Rows are lists of strings.'''
+    __slots__ = ()
+
+    @property
+    def spatial(self):
+        return 'wktgeom' in self.column_names
+
+
+def prefixMusym(areasymbol, musym):
+    ''' Return musym prefixed with the survey area number of areasymbol, e.g. IA141 and 55 give 141_55.'''
+    return f"{str(int(areasymbol[2:]))}_{musym}"
+
+
+def geometryQuery(aois, now=None, skipped=None):
+    '''
+    This is the spatial part of the query for GNT. Some mapunit and landunit attributes are returned
+    Other queries can be appended, but they will need to reference the temporary table names used:
+    AoiTable, AoiAcres, AoiSoils, AoiSoils2, AoiSoils3
+
+    aois are (landunit, WKT polygon) pairs, with the polygon in WGS 1984 (EPSG 4326). Landunits longer than
+    LANDUNIT_LENGTH would be cut short by SQL Server and no longer match their field, so those AOIs are left out and
+    their landunits appended to skipped, if given.
+    '''
+    now = (now or datetime.now()).strftime('%Y-%m-%d T%H:%M:%S')
+
+    # sQuery is the query string that will be incorporated into the SDA request
+    header = """/** SDA Query application="CRP" rule="GNT Soil Map" version="0.1" **/"""
+    sQuery =  header + "\n-- " + now
+    sQuery += """\n-- Declare all variables here
+~DeclareVarchar(@dateStamp,20)~
+~DeclareGeometry(@aoiGeom)~
+~DeclareGeometry(@aoiGeomFixed)~
+
+-- Create AOI table with polygon geometry. Coordinate system must be WGS1984 (EPSG 4326)
+CREATE TABLE #AoiTable
+    ( aoiid INT IDENTITY (1,1),
+    landunit VARCHAR(20),
+    aoigeom GEOMETRY )
+;
+
+-- Insert identifier string and WKT geometry for each AOI polygon after this...
+"""
+
+    for landunit, wkt in aois:
+        if len(str(landunit)) > LANDUNIT_LENGTH:
+            if skipped is not None:
+                skipped.append(landunit)
+            continue
+        landunit = str(landunit).replace('\n', ' ')
+        sQuery += " \nINSERT INTO #AoiTable ( landunit, aoigeom ) "
+        sQuery += " \nVALUES (" + quoted(landunit) + ", geometry::STGeomFromText('" + wkt + "', 4326));"
+
+    sQuery += """
+
+-- End of AOI geometry section
+
+-- #AoiAcres table to contain summary acres for each landunit
+CREATE TABLE #AoiAcres
+    ( aoiid INT,
+    landunit VARCHAR(20),
+    landunit_acres FLOAT )
+;
+
+-- #AoiSoils table contains intersected soil polygon table with geometry
+CREATE TABLE #AoiSoils
+    ( polyid INT IDENTITY (1,1),
+    aoiid INT,
+    landunit VARCHAR(20),
+    musym VARCHAR(6),
+    mukey INT,
+    soilgeom GEOMETRY )
+;
+
+-- #AoiSoils2 table contains Soil geometry with landunits
+CREATE TABLE #AoiSoils2
+    ( aoiid INT,
+    landunit VARCHAR(20),
+    musym VARCHAR(6),
+    mukey INT,
+    soilgeom GEOMETRY )
+;
+
+-- #AoiSoils3 table contains Soil geometry with landunits
+CREATE TABLE #AoiSoils3
+    ( aoiid INT,
+    landunit VARCHAR(20),
+    musym VARCHAR(6),
+    mukey INT,
+    poly_acres FLOAT,
+    soilgeog GEOGRAPHY )
+;
+
+--  #LuMuAcres table contains Soil map unit acres, aggregated by mukey (merges polygons together)
+CREATE TABLE  #LuMuAcres
+    ( aoiid INT,
+    landunit VARCHAR(20),
+    musym VARCHAR(6),
+    mukey INT,
+    mapunit_acres FLOAT )
+;
+
+"""
+    # Return Soil Data Access query string
+    return sQuery
+
+
+def readQuerySettings(tool, csv_path=SDA_QUERY_SETTINGS):
+    ''' Return the QuerySettings declared for a tool, or GNT_Query.txt with full geometry if it has none.'''
+    with open(csv_path, encoding='utf-8-sig', newline='') as f:
+        for row in DictReader(f):
+            if row['TOOL'] == tool:
+                geometry = row['GEOMETRY'].strip().lower() or 'full'
+                if geometry not in GEOMETRY_MODES:
+                    raise ValueError(f"{path.basename(csv_path)} has an unknown GEOMETRY for {tool}: {geometry}")
+                tolerance = float(row['REDUCE_TOLERANCE']) if row['REDUCE_TOLERANCE'] else None
+                if geometry == 'reduced' and not tolerance:
+                    raise ValueError(f"{path.basename(csv_path)} needs a REDUCE_TOLERANCE for {tool}")
+                return QuerySettings(row['QUERY_FILE'] or 'GNT_Query.txt', geometry, tolerance)
+    return QuerySettings('GNT_Query.txt', 'full', None)
+
+
+def reduceGeometry(query, tolerance):
+    ''' Return an attribute query with the soil map polygons reduced to tolerance meters on the server before they
+    are returned as WKT. Acres are still computed from the full resolution polygons, and a polygon the reduction would
+    collapse is returned unreduced. Raises ValueError if the query has no soil map geometry.'''
+    wkt = query.find(SOIL_MAP_WKT)
+    if wkt < 0:
+        raise ValueError('The attribute query does not return soil map geometry to reduce')
+    end = query.find(';', wkt)
+    end = len(query) if end < 0 else end
+    statement = query[wkt:end]
+    if SOIL_MAP_FROM not in statement:
+        raise ValueError('The attribute query does not return soil map geometry to reduce')
+    statement = statement.replace(SOIL_MAP_WKT, REDUCED_SOIL_MAP_WKT, 1) \
+                         .replace(SOIL_MAP_FROM, REDUCED_SOIL_MAP_FROM.format(tolerance=tolerance), 1)
+    return query[:wkt] + statement + query[end:]
+
+
+def withoutSoilMap(query):
+    ''' Return an attribute query that leaves out the soil map polygons, so no geometry is downloaded. Raises
+    ValueError if the query has no soil map geometry.'''
+    wkt = query.find(' AS wktgeom')
+    if wkt < 0:
+        raise ValueError('The attribute query does not return soil map geometry to leave out')
+    start = query.rfind(';', 0, wkt) + 1
+    end = query.find(';', wkt)
+    end = len(query) if end < 0 else end + 1
+    return query[:start] + query[end:]
+
+
+def fieldSoilsQuery(query, soil_map=True):
+    ''' Return an attribute query for AOIs of single fields, which also returns the predominant soil of each field as
+    FieldSoils. Without soil_map the soil map polygons are left out.'''
+    return (query if soil_map else withoutSoilMap(query)) + FIELD_SOILS_QUERY
+
+
+def attributeQuery(settings, support_dir=SUPPORT_DIR):
+    ''' Return the attribute query text for QuerySettings.'''
+    with open(path.join(support_dir, settings.query_file), 'r') as f:
+        query = f.read()
+    if settings.geometry == 'reduced':
+        query = reduceGeometry(query, settings.reduce_tolerance)
+    return query
+
+
+def requestBody(query):
+    ''' Return the JSON body POSTed to the SDA Tabular service for query.'''
+    return dumps({'format': 'JSON+COLUMNNAME+METADATA', 'query': query})
+
+
+def postSDA(query, sda_url=SDA_URL, timeout=SDA_TIMEOUT):
+    ''' POST query to the SDA Tabular service and return the decoded JSON response. Raises ValueError on an HTTP error.'''
+    # urllib keeps the engine free of third party packages on batch servers
+    from urllib.error import HTTPError
+    from urllib.request import Request, urlopen
+    request = Request(f"{sda_url}/Tabular/post.rest", data=requestBody(query).encode(), method='POST',
+                      headers={'Content-Type': 'application/json'})
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            return loads(response.read())
+    except HTTPError as e:
+        raise ValueError(f"SDA query request returned status: {e.code}")
+
+
+def sdaTables(data, table_names=SDA_TABLE_NAMES):
+    ''' Return an SDATable for each table in a decoded SDA response, in table order, named from table_names.
+    Raises ValueError if there are none.'''
+    if 'Table' not in data:
+        raise ValueError('No soils data returned for this AOI request')
+
+    tables = []
+    for key in sorted(data.keys()):
+        # Data as a list of lists. Service returns everything as string.
+        column_names, column_info, *rows = data[key]
+
+        # Get sequence number for table
+        table_num = 1 if key.upper() == 'TABLE' else int(key.upper().replace('TABLE', '')) + 1
+        name = table_names.get(key.upper(), f"UnknownTable{str(table_num)}")
+
+        # Hack to increase field length of 'musym' in output feature class
+        column_info = list(column_info)
+        if 'musym' in column_names:
+            musym = column_names.index('musym')
+            column_info[musym] = column_info[musym].replace('ColumnSize=6', 'ColumnSize=12')
+        tables.append(SDATable(name, list(column_names), column_info, rows))
+    return tables
+
+
+def describeResponse(size, tables):
+    ''' Return a summary of an SDA response of size bytes decoded to SDATables: its size, and the soil polygons,
+    vertices and WKT bytes of its spatial tables.'''
+    polygons = vertices = wkt_bytes = 0
+    for table in tables:
+        if table.spatial:
+            wkt = table.column_names.index('wktgeom')
+            for row in table.rows:
+                polygons += 1
+                vertices += row[wkt].count(',') + 1
+                wkt_bytes += len(row[wkt])
+    return f"{size / 1024:,.0f} KB: {polygons} soil polygons with {vertices:,} vertices in {wkt_bytes / 1024:,.0f} KB of WKT"
+
+
+def sdaFields(column_names, column_info):
+    ''' Return the SDAField definitions for the columns of an SDA table, leaving out geometry columns.
+
+    column_names and column_info come from the first two rows of the table. Raises ValueError for an empty column name.
+    '''
+    fields = []
+    for i, fldName in enumerate(column_names):
+        if fldName is None or fldName == '':
+            raise ValueError(f"Query returned an empty fieldname ({str(column_names)})")
+        if fldName.upper() in GEOMETRY_COLUMNS:
+            continue
+
+        vals = column_info[i].split(',')
+        length = int(vals[1].split('=')[1])
+        precision = int(vals[2].split('=')[1])
+        scale = int(vals[3].split('=')[1])
+        dataType = SQL_FIELD_TYPES[vals[4].lower().split('=')[1]]
+        alias = FIELD_ALIASES.get(fldName.upper(), fldName)
+
+        if fldName.upper() == 'MUKEY':
+            # switch to SSURGO standard TEXT 30 chars
+            dataType, length, precision, scale = 'text', 30, '', ''
+
+        if fldName.upper() == 'MU_IFACTOR':
+            # switch to integer so that map legend sorts numerically instead of alphabetically
+            dataType, length, precision, scale = 'short', 0, '', ''
+
+        fields.append(SDAField(fldName, dataType, precision, scale, length, alias))
+    return fields
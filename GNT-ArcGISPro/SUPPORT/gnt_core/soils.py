@@ -0,0 +1,69 @@
+from gnt_core.sda import ATTRIBUTE_TABLE_NAMES, FIELD_SOILS_TABLE, fieldSoilsQuery, geometryQuery, postSDA, prefixMusym, \
+    SDA_TABLE_NAMES, SDA_URL, sdaFields, sdaTables, SOIL_MAP_TABLE
+
+
+# GNTFieldLayer fields read to build the AOIs, one per field identified by SubID
+AOI_FIELDS = ['SHAPE@WKT', 'SubID']
+
+
+def fieldSoilKeys(table, sub_ids=()):
+    ''' Return a dict of landunit: prefixed musym from the FieldSoils table of an SDA response, with None for each of
+    sub_ids it has no soil for, so a SoilKey left from an earlier download is cleared.'''
+    names = [name.lower() for name in table.column_names]
+    landunit, areasymbol, musym = (names.index(name) for name in ('landunit', 'areasymbol', 'musym'))
+    soil_keys = dict.fromkeys(sub_ids)
+    soil_keys.update({rec[landunit]: prefixMusym(rec[areasymbol], rec[musym]) for rec in table.rows})
+    return soil_keys
+
+
+def sdaRows(table, wkid=None, backend=None):
+    ''' Yield the rows of an SDATable ordered as its sdaFields, with prefixed musym values and, for a spatial table,
+    the geometry projected to wkid last.'''
+    names = [name.lower() for name in table.column_names]
+    indexes = [names.index(field.name.lower()) for field in sdaFields(table.column_names, table.column_info)]
+    musym = names.index('musym') if 'musym' in names and 'areasymbol' in names else None
+    for rec in table.rows:
+        row = [rec[i] for i in indexes]
+        if musym is not None and table.name == SOIL_MAP_TABLE:
+            row[indexes.index(musym)] = prefixMusym(rec[names.index('areasymbol')], rec[musym])
+        if table.spatial:
+            row.append(backend.projectWKT(rec[names.index('wktgeom')], 4326, wkid))
+        yield row
+
+
+def writeSDATable(backend, workspace, table, wkid):
+    ''' Write an SDATable to workspace, as a feature class in wkid if it has geometry. Returns the new dataset.'''
+    fields = sdaFields(table.column_names, table.column_info)
+    dataset = backend.createTable(workspace, table.name, fields, wkid if table.spatial else None)
+    backend.insertRows(dataset, [field.name for field in fields] + (['SHAPE@WKT'] if table.spatial else []),
+                       sdaRows(table, wkid, backend))
+    return dataset
+
+
+def downloadSoilData(backend, gnt_dataset, workspace, attribute_query, post=postSDA, sda_url=SDA_URL, soil_map=True,
+                     skipped=None):
+    ''' Run Download Soil Data without a map: query SDA for the fields in gnt_dataset, write the tables it returns to
+    workspace and assign each field its predominant SoilKey.
+
+    attribute_query is the SQL of GNT_Query.txt, and post sends a query to sda_url and returns the decoded response.
+    Each field is sent as its own AOI, keyed by SubID, in a single request, and SDA returns the predominant soil of
+    each field as FieldSoils, so nothing is dissolved or overlaid locally. Without soil_map only tables are returned,
+    so no geometry is downloaded or projected either. Fields whose SubID is too long to be a landunit are not sent,
+    are appended to skipped, if given, and have their SoilKey cleared like any field SDA returns no soil for.
+    Returns a dict of table name: dataset written.
+    '''
+    wkid = backend.spatialReference(gnt_dataset)
+    rows = list(backend.readRows(gnt_dataset, AOI_FIELDS))
+    if not rows:
+        raise ValueError(f"{gnt_dataset} has no fields")
+
+    aois = [(sub_id, backend.projectWKT(wkt, wkid, 4326)) for wkt, sub_id in rows]
+    data = post(f"{geometryQuery(aois, skipped=skipped)}\n{fieldSoilsQuery(attribute_query, soil_map)}", sda_url)
+    tables = sdaTables(data, SDA_TABLE_NAMES if soil_map else ATTRIBUTE_TABLE_NAMES)
+
+    datasets = {table.name: writeSDATable(backend, workspace, table, wkid) for table in tables}
+    field_soils = [table for table in tables if table.name == FIELD_SOILS_TABLE]
+    if not field_soils:
+        raise ValueError('No field soils returned for this AOI request')
+    backend.updateRows(gnt_dataset, 'SubID', 'SoilKey', fieldSoilKeys(field_soils[0], [sub_id for _, sub_id in rows]))
+    return datasets
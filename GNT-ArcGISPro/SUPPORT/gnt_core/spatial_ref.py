@@ -0,0 +1,28 @@
+# EPSG codes of GCS WGS 1984 and the WGS 1984 UTM zones, e.g. 32615 is Zone 15N and 32715 is Zone 15S
+WGS84_WKID = 4326
+UTM_NORTH_WKID = 32600
+UTM_SOUTH_WKID = 32700
+UTM_ZONES = 60
+
+
+def utmZone(longitude):
+    ''' Return the UTM zone number, 1 to 60, of a longitude in decimal degrees. 180 degrees is in zone 60.'''
+    return min(max(int((longitude + 180) // 6) + 1, 1), UTM_ZONES)
+
+
+def utmWKID(longitude, latitude):
+    ''' Return the EPSG code of the WGS 1984 UTM zone of a point in decimal degrees, north of the equator or on it
+    in a northern zone.'''
+    return (UTM_NORTH_WKID if latitude >= 0 else UTM_SOUTH_WKID) + utmZone(longitude)
+
+
+def isWGS84UTM(wkid):
+    ''' True if wkid is the EPSG code of a WGS 1984 UTM zone.'''
+    return any(base < wkid <= base + UTM_ZONES for base in (UTM_NORTH_WKID, UTM_SOUTH_WKID))
+
+
+def extentUTMWKID(extent):
+    ''' Return the EPSG code of the WGS 1984 UTM zone at the center of an (xmin, ymin, xmax, ymax) extent in decimal
+    degrees.'''
+    xmin, ymin, xmax, ymax = extent
+    return utmWKID((xmin + xmax) / 2, (ymin + ymax) / 2)
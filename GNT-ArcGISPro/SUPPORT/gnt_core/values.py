@@ -0,0 +1,32 @@
+# Most values in one IN list. Larger lists are split into several IN lists joined with OR, which keeps where clauses
+# and definition queries under the SQL length limits of file geodatabases and SQL Server.
+MAX_IN_VALUES = 1000
+
+
+def uniqueValues(values):
+    ''' Return the distinct values as strings in the order first seen, leaving out None and empty values.'''
+    return list(dict.fromkeys(str(value) for value in values if value is not None and value != ''))
+
+
+def chunks(values, size=MAX_IN_VALUES):
+    ''' Return a list of values split into lists of at most size values.'''
+    return [values[i:i + size] for i in range(0, len(values), size)]
+
+
+def inClauses(field, values, size=MAX_IN_VALUES):
+    ''' Return a field IN ('value', ...) clause for each chunk of at most size text values.'''
+    return [f"{field} IN ({', '.join(quoted(value) for value in chunk)})" for chunk in chunks(list(values), size)]
+
+
+def inQuery(field, values, size=MAX_IN_VALUES):
+    ''' Return a where clause matching field to any of the text values, split into IN lists of at most size values.
+    Raises ValueError if there are no values.'''
+    clauses = inClauses(field, values, size)
+    if not clauses:
+        raise ValueError(f"No {field} values to match")
+    return clauses[0] if len(clauses) == 1 else ' OR '.join(f"({clause})" for clause in clauses)
+
+
+def quoted(value):
+    ''' Return a text value as a SQL string literal.'''
+    return "'" + str(value).replace("'", "''") + "'"
@@ -0,0 +1,59 @@
+from os import path
+
+from arcpy import Describe
+from arcpy.da import SearchCursor
+
+
+GNT_WORKSPACE = r'C:\GNT'
+
+# Admin_Table fields written when a project is created
+ADMIN_TABLE_FIELDS = ['state_code', 'state', 'state_name', 'county_code', 'county_name', 'farm_number', 'operation_name', 'street', 'city',
+                      'zip', 'contact_name', 'office_phone', 'home_phone', 'email', 'notes', 'start_year', 'start_month', 'plan_years']
+
+
+def projectFolderName(postal, county_code, farm, date):
+    ''' Return the project folder name for a farm, e.g. ia141_0001234_2024_03, with the farm number and month zero padded.'''
+    return f"{postal.lower()}{county_code}_{str(farm):0>7}_{date.year}_{date.month:02}"
+
+
+class GNTProject:
+    ''' GNT project geodatabase paths, with cached Admin_Table reads and streamed GNTFieldLayer reads.
+
+    admin() only reads the columns asked for, and a column is read at most once per project.
+    '''
+
+    def __init__(self, gntdataGDB_path, gnt_layer=None):
+        self.gdb_path = gntdataGDB_path
+        self.gdb_name = path.basename(gntdataGDB_path)
+        self.fd_path = path.join(gntdataGDB_path, 'Layers')
+        self.admin_table = path.join(gntdataGDB_path, 'Admin_Table')
+        self.gnt_layer = gnt_layer if gnt_layer else path.join(self.fd_path, 'GNTFieldLayer')
+        self.folder = path.dirname(gntdataGDB_path)
+        self.name = path.basename(self.folder).replace(' ', '_')
+        self.log_path = path.join(self.folder, f"{self.name}_log.txt")
+        self.reports_folder = path.join(self.folder, 'CNMP_Reports')
+        self._admin = {}
+
+    @classmethod
+    def fromLayer(cls, gnt_layer):
+        ''' Open the project a GNTFieldLayer layer belongs to. Raises ValueError if it is not from a GNT project.'''
+        gnt_layer_path = Describe(gnt_layer).CatalogPath
+        if gnt_layer_path.find('.gdb') > 0 and gnt_layer_path.find('GNT') > 0 and gnt_layer_path.find('GNTFieldLayer') > 0:
+            return cls(gnt_layer_path[:gnt_layer_path.find('.gdb')+4], gnt_layer)
+        raise ValueError(f"{gnt_layer} is not from a GNT project folder")
+
+    def admin(self, fields):
+        ''' Return the Admin_Table values for fields, as a tuple in the same order. Raises ValueError if the table is empty.'''
+        missing = [field for field in fields if field not in self._admin]
+        if missing:
+            with SearchCursor(self.admin_table, missing) as cursor:
+                row = next(cursor, None)
+            if row is None:
+                raise ValueError('Admin_Table has no rows')
+            self._admin.update(zip(missing, row))
+        return tuple(self._admin[field] for field in fields)
+
+    def iterFieldRows(self, fields):
+        ''' Yield GNTFieldLayer rows for fields, streamed from a cursor.'''
+        with SearchCursor(self.gnt_layer, fields) as cursor:
+            yield from cursor
@@ -0,0 +1,112 @@
+from json import dump, load
+from os import getenv, listdir, makedirs, path, rename, stat
+from shutil import copytree, ignore_patterns, rmtree
+from tempfile import gettempdir, mkdtemp
+
+from arcpy import SpatialReference
+from arcpy.conversion import FeatureClassToFeatureClass
+from arcpy.management import Compact, CreateFeatureDataset, CreateFileGDB, CreateTable, DefineProjection, \
+    ImportContingentValues
+
+from gnt_core.spatial_ref import isWGS84UTM, UTM_NORTH_WKID, UTM_SOUTH_WKID
+
+
+SUPPORT_DIR = path.dirname(path.abspath(__file__))
+SUPPORT_GDB = path.join(SUPPORT_DIR, 'SUPPORT.gdb')
+FEATURE_TYPES_DIR = path.join(SUPPORT_DIR, 'SetbackFeatureTypes')
+SEED_FOLDER = path.join(getenv('LOCALAPPDATA', gettempdir()), 'GNT', 'project_seed')
+SEED_GDB_NAME = 'Project_Seed.gdb'
+
+# Placeholder UTM zone of the seed Layers dataset. The WGS 1984 UTM zones of one hemisphere share the same XY domain,
+# so copies only need the projection redefined for their zone. Southern zones have a false northing of 10,000,000 m
+# and a different domain, so each hemisphere has its own seed: Zone 15N (32615) and Zone 15S (32715).
+SEED_ZONE = 15
+
+# Bump when the seed contents change in a way the source files do not show
+SEED_VERSION = 1
+
+# (feature class, template in SUPPORT.gdb, contingent value CSV prefix or None)
+SEED_FEATURE_CLASSES = [
+    ('Setback_Point', 'Setback_Point_Template', 'Point'),
+    ('Setback_Line', 'Setback_Line_Template', 'Line'),
+    ('Setback_Polygon', 'Setback_Polygon_Template', 'Polygon'),
+    ('GNTFieldLayer', 'GNTFieldLayer_Template', None)
+]
+
+
+def seedSources():
+    ''' Return a dict of source file: mtime for everything the project seed is built from.'''
+    sources = {'version': SEED_VERSION}
+    for folder in (SUPPORT_GDB, FEATURE_TYPES_DIR):
+        for file_name in listdir(folder):
+            if not file_name.endswith('.lock'):
+                sources[path.join(path.basename(folder), file_name)] = stat(path.join(folder, file_name)).st_mtime
+    return sources
+
+
+def seedWKID(wkid):
+    ''' Return the EPSG code of the seed for projects in a WGS 1984 UTM zone: Zone 15 of the same hemisphere.
+    Raises ValueError if wkid is not a WGS 1984 UTM zone.'''
+    if not isWGS84UTM(wkid):
+        raise ValueError(f"{wkid} is not a WGS 1984 UTM zone")
+    return (UTM_SOUTH_WKID if wkid > UTM_SOUTH_WKID else UTM_NORTH_WKID) + SEED_ZONE
+
+
+def buildProjectSeed(seed_gdb, seed_wkid):
+    ''' Build the project seed geodatabase: the Layers dataset in seed_wkid with empty GNT and setback feature
+    classes, their contingent values and an empty Admin_Table. It is built beside seed_gdb and renamed into place
+    when complete.'''
+    seed_folder = path.dirname(seed_gdb)
+    makedirs(seed_folder, exist_ok=True)
+    build_folder = mkdtemp(prefix='build_', dir=seed_folder)
+    try:
+        CreateFileGDB(build_folder, SEED_GDB_NAME)
+        build_gdb = path.join(build_folder, SEED_GDB_NAME)
+        layers = path.join(build_gdb, 'Layers')
+        CreateFeatureDataset(build_gdb, 'Layers', SpatialReference(seed_wkid))
+        CreateTable(build_gdb, 'Admin_Table', path.join(SUPPORT_GDB, 'Admin_Table_Template'))
+        for name, template, feature_type in SEED_FEATURE_CLASSES:
+            FeatureClassToFeatureClass(path.join(SUPPORT_GDB, template), layers, name)
+            if feature_type:
+                ImportContingentValues(path.join(layers, name), path.join(FEATURE_TYPES_DIR, f"{feature_type}_FieldGroup.csv"),
+                                       path.join(FEATURE_TYPES_DIR, f"{feature_type}_ContingentValue.csv"), 'REPLACE')
+        Compact(build_gdb)
+
+        if path.exists(seed_gdb):
+            rmtree(seed_gdb, ignore_errors=True)
+        try:
+            rename(build_gdb, seed_gdb)
+        except OSError:
+            # Another process finished building the seed first
+            if not path.exists(seed_gdb):
+                raise
+    finally:
+        rmtree(build_folder, ignore_errors=True)
+
+
+def projectSeed(wkid, seed_folder=SEED_FOLDER):
+    ''' Return the path to the project seed geodatabase for a WGS 1984 UTM zone, building it first if it is missing
+    or its sources changed. Raises ValueError if wkid is not a WGS 1984 UTM zone.'''
+    seed_wkid = seedWKID(wkid)
+    seed_folder = path.join(seed_folder, str(seed_wkid))
+    seed_gdb = path.join(seed_folder, SEED_GDB_NAME)
+    sources_path = path.join(seed_folder, 'seed_sources.json')
+    sources = seedSources()
+    try:
+        with open(sources_path) as f:
+            current = load(f) == sources and path.exists(seed_gdb)
+    except (OSError, ValueError):
+        current = False
+
+    if not current:
+        buildProjectSeed(seed_gdb, seed_wkid)
+        with open(sources_path, 'w') as f:
+            dump(sources, f, indent=2)
+    return seed_gdb
+
+
+def copyProjectSeed(gntdataGDB_path, sr, seed_folder=SEED_FOLDER):
+    ''' Create a project geodatabase as a file copy of the project seed, with the Layers dataset set to sr, a WGS 1984
+    UTM SpatialReference. Raises ValueError for any other spatial reference.'''
+    copytree(projectSeed(sr.factoryCode, seed_folder), gntdataGDB_path, ignore=ignore_patterns('*.lock'))
+    DefineProjection(path.join(gntdataGDB_path, 'Layers'), sr)
@@ -0,0 +1,136 @@
+from os import path
+
+from arcpy import Array, Describe, Point, Polygon, Polyline
+from arcpy.analysis import Buffer, Erase, Union
+from arcpy.da import InsertCursor, SearchCursor, UpdateCursor
+from arcpy.management import AddField, Append, CalculateGeometryAttributes, CreateFeatureclass, Delete, Dissolve, \
+    MakeFeatureLayer
+
+from gnt_core.buffers import BUFFER_UNIT_SR_NAMES, bufferText, planLineBuffers
+
+
+def syncBufferField(setback_fc):
+    ''' Write "{BufferDistance} Feet" to BufferField only for rows where it is stale. Returns the number of rows written.'''
+    fields = ['BufferDistance', 'BufferField']
+    stale = False
+    with SearchCursor(setback_fc, fields) as cursor:
+        for row in cursor:
+            if row[1] != bufferText(row[0]):
+                stale = True
+                break
+
+    if not stale:
+        return 0
+
+    updated = 0
+    with UpdateCursor(setback_fc, fields) as cursor:
+        for row in cursor:
+            buffer_text = bufferText(row[0])
+            if row[1] != buffer_text:
+                row[1] = buffer_text
+                cursor.updateRow(row)
+                updated += 1
+    return updated
+
+
+def bufferDistanceField(setback_fc):
+    ''' Return the field Buffer should read setback distances from.
+
+    Buffer reads a numeric distance field in the linear unit of the input, so BufferDistance is used directly
+    when the feature class is in feet. Otherwise the text BufferField is synced and used instead.
+    '''
+    if Describe(setback_fc).spatialReference.linearUnitName in BUFFER_UNIT_SR_NAMES:
+        return 'BufferDistance'
+    syncBufferField(setback_fc)
+    return 'BufferField'
+
+
+def bufferSetbackFeatures(setback_fc, output_fc):
+    ''' Buffer Setback_Point or Setback_Polygon features by BufferDistance and dissolve them into one polygon.'''
+    Buffer(setback_fc, output_fc, bufferDistanceField(setback_fc), dissolve_option='ALL')
+
+
+def readSetbackLines(setback_line, spatial_reference):
+    ''' Yield (vertex arrays, distance in spatial reference units, BufferSides) for each buffered Setback_Line feature.'''
+    fields = ['SHAPE@', 'BufferDistance', 'BufferSides']
+    with SearchCursor(setback_line, fields, spatial_reference=spatial_reference) as cursor:
+        lines = (([[(pnt.X, pnt.Y) for pnt in part if pnt] for part in shape] if shape else None, distance, buffer_sides)
+                 for shape, distance, buffer_sides in cursor)
+        yield from planLineBuffers(lines, spatial_reference.metersPerUnit)
+
+
+def appendBufferedLines(lines, parts_fc, spatial_reference, workspace='memory'):
+    ''' Buffer one-sided lines with Buffer LEFT or RIGHT, as the per side buffers always were, and append the buffers
+    to parts_fc. lines are (vertex arrays, distance in spatial reference units, BufferSides) rows.'''
+    from gnt_core.line_buffer import LEFT_SIDE, RIGHT_SIDE
+    lines_fc = path.join(workspace, 'tangled_setback_lines')
+    CreateFeatureclass(workspace, path.basename(lines_fc), 'POLYLINE', spatial_reference=spatial_reference)
+    AddField(lines_fc, 'BufferDistance', 'DOUBLE')
+    AddField(lines_fc, 'BufferSides', 'TEXT', field_length=20)
+    with InsertCursor(lines_fc, ['SHAPE@', 'BufferDistance', 'BufferSides']) as cursor:
+        for parts, distance, buffer_sides in lines:
+            shape = Polyline(Array([Array([Point(x, y) for x, y in part]) for part in parts]), spatial_reference)
+            cursor.insertRow([shape, distance, buffer_sides])
+
+    for buffer_sides, line_side in ((LEFT_SIDE, 'LEFT'), (RIGHT_SIDE, 'RIGHT')):
+        side_layer = MakeFeatureLayer(lines_fc, f"tangled_{line_side.lower()}", f"BufferSides = '{buffer_sides}'")
+        side_fc = path.join(workspace, f"tangled_{line_side.lower()}_buffer")
+        Buffer(side_layer, side_fc, 'BufferDistance', line_side)
+        Append(side_fc, parts_fc, 'NO_TEST')
+        Delete([side_layer, side_fc])
+    Delete(lines_fc)
+
+
+def bufferSetbackLines(setback_line, parts_fc, output_fc, spatial_reference, skipped=None):
+    ''' Buffer Setback_Line features on their BufferSides in one pass and dissolve into one polygon per side.
+    Missing BufferSides values and values outside the domain are not buffered and are appended to skipped, if given.
+    One-sided lines that reach across themselves within their distance are buffered by Buffer instead.'''
+    # line_buffer (and numpy) are only imported when there are lines to buffer
+    from gnt_core.line_buffer import bufferLineSides
+    tangled = []
+    rings = bufferLineSides(readSetbackLines(setback_line, spatial_reference), skipped, tangled)
+
+    CreateFeatureclass(path.dirname(parts_fc), path.basename(parts_fc), 'POLYGON', spatial_reference=spatial_reference)
+    AddField(parts_fc, 'BufferSides', 'TEXT', field_length=20)
+    with InsertCursor(parts_fc, ['SHAPE@', 'BufferSides']) as cursor:
+        for buffer_sides, side_rings in rings.items():
+            for ring in side_rings:
+                polygon = Polygon(Array([Point(x, y) for x, y in ring]), spatial_reference)
+                cursor.insertRow([polygon, buffer_sides])
+    if tangled:
+        appendBufferedLines(tangled, parts_fc, spatial_reference)
+
+    Dissolve(parts_fc, output_fc, 'BufferSides')
+    return {buffer_sides: len(side_rings) for buffer_sides, side_rings in rings.items()}
+
+
+def mergeSetbackBuffers(buffer_fcs, union_fc, setback_buffer):
+    ''' Union the point, line and polygon buffers and dissolve them into the final Setback_Buffer layer.'''
+    Union(buffer_fcs, union_fc)
+    Dissolve(union_fc, setback_buffer)
+
+
+def eraseSetbackBuffers(gnt_layer, setback_buffer, erased_fields):
+    ''' Erase the final setback buffer from the GNT fields.'''
+    Erase(gnt_layer, setback_buffer, erased_fields)
+
+
+def calculateSpreadableAcres(erased_fields):
+    ''' Calculate geodesic acres of the erased fields. Returns a dict of LandIDGUID to spreadable acres.'''
+    CalculateGeometryAttributes(erased_fields, [['SpreadSize', 'AREA_GEODESIC']], area_unit='ACRES')
+    spreadable = {}
+    with SearchCursor(erased_fields, ['LandIDGUID', 'SpreadSize']) as cursor:
+        for row in cursor:
+            spreadable[row[0]] = row[1] #round(row[1], 1)
+    return spreadable
+
+
+def writeSpreadableAcres(gnt_layer, spreadable):
+    ''' Write spreadable acres to SpreadSize of the GNT fields, using 0 for fields entirely within setbacks.'''
+    with UpdateCursor(gnt_layer, ['LandIDGUID', 'SpreadSize']) as cursor:
+        for row in cursor:
+            try:
+                row[1] = spreadable[row[0]]
+            except KeyError:
+                row[1] = 0.0
+            cursor.updateRow(row)
@@ -1,23 +1,129 @@
+from os import path, stat
 from sys import exc_info
 from traceback import format_exception
 
-from arcpy import AddError, AddMessage, AddWarning
+from arcpy import AddError, AddMessage, AddWarning, Describe, SpatialReference
 from arcpy.management import Delete
 
+from gnt_core.spatial_ref import extentUTMWKID, WGS84_WKID
+
+
+LAYER_FILES_DIR = path.join(path.dirname(path.abspath(__file__)), 'LayerFiles')
+
+_lyrx_layers = {}
+
+def lyrxLayer(file_name, folder=LAYER_FILES_DIR):
+    ''' Return the first layer of a .lyrx file, parsed on first use and reused for the rest of the session.'''
+    # arcpy.mp is only imported by tools that add layers to a map
+    from arcpy.mp import LayerFile
+    lyrx_path = path.join(folder, file_name)
+    mtime = stat(lyrx_path).st_mtime
+    if lyrx_path not in _lyrx_layers or _lyrx_layers[lyrx_path][0] != mtime:
+        _lyrx_layers[lyrx_path] = (mtime, LayerFile(lyrx_path).listLayers()[0])
+    return _lyrx_layers[lyrx_path][1]
+
+
+_spatial_references = {}
+
+def spatialReference(factory_code):
+    ''' Return the SpatialReference of a factory code, created on first use and shared for the rest of the session,
+    so it must not be modified.'''
+    if factory_code not in _spatial_references:
+        _spatial_references[factory_code] = SpatialReference(factory_code)
+    return _spatial_references[factory_code]
+
+
+def layerExtent(layer, factory_code=WGS84_WKID):
+    ''' Return the (xmin, ymin, xmax, ymax) extent of a layer in the spatial reference of factory_code, projected
+    from the extent in its description without reading features.'''
+    extent = Describe(layer).extent.projectAs(spatialReference(factory_code))
+    return extent.XMin, extent.YMin, extent.XMax, extent.YMax
+
+
+def utmSpatialReference(layer):
+    ''' Return the WGS 1984 UTM SpatialReference of the zone at the center of a layer.'''
+    return spatialReference(extentUTMWKID(layerExtent(layer)))
+
+
+def _setConnection(lyrx_layer, gdb_path):
+    lyrx_cp = lyrx_layer.connectionProperties
+    lyrx_cp['connection_info']['database'] = gdb_path
+    lyrx_cp['dataset'] = lyrx_layer.name
+    lyrx_layer.updateConnectionProperties(lyrx_layer.connectionProperties, lyrx_cp)
+
 
 def addLyrxByConnectionProperties(map, lyr_name_list, lyrx_layer, gdb_path, visible=True):
     ''' Add a layer to a map by setting the lyrx file connection properties.'''
     if lyrx_layer.name not in lyr_name_list:
-        lyrx_cp = lyrx_layer.connectionProperties
-        lyrx_cp['connection_info']['database'] = gdb_path
-        lyrx_cp['dataset'] = lyrx_layer.name
-        lyrx_layer.updateConnectionProperties(lyrx_layer.connectionProperties, lyrx_cp)
-        map.addLayer(lyrx_layer)
-
-    lyr_list = map.listLayers()
-    for lyr in lyr_list:
-        if lyr.longName == lyrx_layer.name:
+        _setConnection(lyrx_layer, gdb_path)
+        for lyr in map.addLayer(lyrx_layer):
             lyr.visible = visible
+        lyr_name_list.append(lyrx_layer.name)
+    else:
+        for lyr in map.listLayers(lyrx_layer.name):
+            if lyr.longName == lyrx_layer.name:
+                lyr.visible = visible
+
+
+class MapLayers:
+    ''' Index of a map's layers by name, listed once, with removes, adds and visibility changes applied in one batch.'''
+
+    def __init__(self, map):
+        self.map = map
+        self._layers = {}
+        for lyr in map.listLayers():
+            self._layers.setdefault(lyr.longName, []).append(lyr)
+        self._removes = []
+        self._adds = []
+        self._visibility = {}
+
+    def __contains__(self, name):
+        return name in self._layers
+
+    def names(self):
+        ''' Return the names of the layers in the map, as of the last apply.'''
+        return list(self._layers)
+
+    def remove(self, name):
+        ''' Queue removing the layers named name.'''
+        self._removes.append(name)
+
+    def addLyrx(self, lyrx_layer, gdb_path, visible=True):
+        ''' Queue adding a lyrx layer connected to its dataset in gdb_path, unless a layer of that name is in the map.'''
+        self._adds.append((lyrx_layer, gdb_path))
+        self._visibility[lyrx_layer.name] = visible
+
+    def addData(self, data_path, visible=True):
+        ''' Queue adding a dataset to the map by path.'''
+        self._adds.append((data_path, None))
+        self._visibility[path.basename(data_path)] = visible
+
+    def setVisible(self, name, visible):
+        ''' Queue setting the visibility of the layers named name.'''
+        self._visibility[name] = visible
+
+    def apply(self):
+        ''' Apply the queued changes: removes, then adds, then visibility.'''
+        for name in self._removes:
+            for lyr in self._layers.pop(name, []):
+                self.map.removeLayer(lyr)
+
+        for layer, gdb_path in self._adds:
+            if gdb_path is None:
+                added = [self.map.addDataFromPath(layer)]
+            elif layer.name not in self._layers:
+                _setConnection(layer, gdb_path)
+                added = self.map.addLayer(layer)
+            else:
+                continue
+            for lyr in added:
+                self._layers.setdefault(lyr.longName, []).append(lyr)
+
+        for name, visible in self._visibility.items():
+            for lyr in self._layers.get(name, []):
+                lyr.visible = visible
+
+        self._removes, self._adds, self._visibility = [], [], {}
 
 
 def AddMsgAndPrint(msg, severity=0, textFilePath=None):
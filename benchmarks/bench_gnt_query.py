@@ -0,0 +1,128 @@
+''' Run GNT_Query.txt and GNT_Query_Optimized.txt against a synthetic SSURGO fixture in SQLite, check they return the
+same tables and record their run times as JSON.
+
+Runs on any platform without ArcGIS Pro or Soil Data Access:
+    python benchmarks/bench_gnt_query.py [--polygons 100 1000 10000] [--restrictions 1] [--repeat 3]
+
+Each run builds a fresh in-memory fixture, then times the attribute query statements only. The geometry statements
+that need SQL Server are left out and the fixture supplies their #AoiSoils and #AoiSoils3 results. GNT_Query.txt
+repeats a component once per corestrictions row in soil_acres, so with --restrictions above 1 DominantSoils is
+expected to differ and differences are reported rather than failing the run.
+'''
+from argparse import ArgumentParser
+from datetime import datetime
+from json import dump
+from os import makedirs, path
+from platform import python_version
+from sqlite3 import connect, sqlite_version
+from statistics import median
+from sys import path as sys_path
+from time import perf_counter
+
+from synthetic_farm import SUPPORT_DIR
+from synthetic_ssurgo import createSSURGO, returnsRows, toSQLite
+
+sys_path.insert(0, SUPPORT_DIR)
+
+from gnt_core.sda import geometryQuery, SDA_TABLE_NAMES
+
+
+VARIANTS = {'original': 'GNT_Query.txt', 'optimized': 'GNT_Query_Optimized.txt'}
+RESULTS_DIR = path.join(path.dirname(path.abspath(__file__)), 'results')
+
+
+def runVariant(sql_path, polygons, mapunits, restrictions, seed):
+    ''' Run one query variant on a fresh fixture. Returns (seconds, list of returned tables as lists of rows).'''
+    with open(sql_path) as f:
+        statements = toSQLite(f.read())
+
+    connection = connect(':memory:')
+    for statement in toSQLite(geometryQuery([])):
+        connection.execute(statement)
+    createSSURGO(connection, mapunits, polygons, restrictions=restrictions, seed=seed)
+
+    tables = []
+    start = perf_counter()
+    for statement in statements:
+        cursor = connection.execute(statement)
+        if returnsRows(statement):
+            tables.append(cursor.fetchall())
+    seconds = perf_counter() - start
+    connection.close()
+    return seconds, tables
+
+
+def compareTables(original, optimized):
+    ''' Return a dict of table name: description of how the optimized rows differ, for tables that differ.'''
+    names = list(SDA_TABLE_NAMES.values())
+    differences = {}
+    for i, (expected, actual) in enumerate(zip(original, optimized)):
+        name = names[i] if i < len(names) else f"UnknownTable{i + 1}"
+        if expected == actual:
+            continue
+        if sorted(expected, key=repr) == sorted(actual, key=repr):
+            differences[name] = 'same rows in a different order'
+        else:
+            missing = len(set(expected) - set(actual))
+            extra = len(set(actual) - set(expected))
+            differences[name] = f"{missing} rows missing and {extra} rows not in the original ({len(expected)} vs {len(actual)} rows)"
+    if len(original) != len(optimized):
+        differences['tables'] = f"{len(original)} tables vs {len(optimized)}"
+    return differences
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--polygons', type=int, nargs='+', default=[100, 1000, 10000], help='Soil polygons in the AOI')
+    parser.add_argument('--mapunits', type=int, help='Mapunits in the fixture (default 1 per 5 polygons, at least 20)')
+    parser.add_argument('--restrictions', type=int, default=1, help='Most corestrictions rows per component (default 1)')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size and variant; the median is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/gnt_query_<timestamp>.json)')
+    args = parser.parse_args()
+
+    runs = []
+    failed = []
+    for polygons in args.polygons:
+        mapunits = args.mapunits or max(polygons // 5, 20)
+        seconds = {}
+        outputs = {}
+        for variant, file_name in VARIANTS.items():
+            times = []
+            for _ in range(args.repeat):
+                elapsed, outputs[variant] = runVariant(path.join(SUPPORT_DIR, file_name), polygons, mapunits, args.restrictions, args.seed)
+                times.append(elapsed)
+            seconds[variant] = round(median(times), 4)
+
+        differences = compareTables(outputs['original'], outputs['optimized'])
+        speedup = round(seconds['original'] / seconds['optimized'], 2) if seconds['optimized'] else None
+        runs.append({'polygons': polygons, 'mapunits': mapunits, 'seconds': seconds, 'speedup': speedup,
+                     'rows': [len(table) for table in outputs['original']], 'identical': not differences,
+                     'differences': differences})
+        print(f"polygons={polygons:<7} original {seconds['original']:.4f}s   optimized {seconds['optimized']:.4f}s   "
+              f"speedup {speedup}x   {'identical' if not differences else differences}")
+        if differences and args.restrictions <= 1:
+            failed.append(polygons)
+
+    results = {
+        'benchmark': 'gnt_query',
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': python_version(),
+        'sqlite': sqlite_version,
+        'repeat': args.repeat,
+        'restrictions': args.restrictions,
+        'seed': args.seed,
+        'runs': runs
+    }
+    output = args.output or path.join(RESULTS_DIR, f"gnt_query_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    makedirs(path.dirname(path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+    if failed:
+        raise SystemExit(f"Optimized query output differs for polygons: {', '.join(map(str, failed))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+''' Time building the soil map unique value renderer JSON for each map against the cached renderers, and record the
+results as JSON.
+
+Runs on any platform without ArcGIS Pro; legends are synthetic musym lists:
+    python benchmarks/bench_renderers.py [--musyms 50 500 5000] [--maps 20] [--repeat 3]
+
+Each run symbolizes --maps soil maps of the same legend, as the tool does for every soil map layer of a farm.
+'''
+from argparse import ArgumentParser
+from datetime import datetime
+from json import dump, dumps
+from os import makedirs, path
+from platform import python_version
+from random import randint
+from statistics import median
+from sys import path as sys_path
+from time import perf_counter
+
+from synthetic_farm import SUPPORT_DIR
+
+sys_path.insert(0, SUPPORT_DIR)
+
+from gnt_core import renderers
+from gnt_core.renderers import uniqueValuesRenderer
+
+
+RESULTS_DIR = path.join(path.dirname(path.abspath(__file__)), 'results')
+
+
+def legacyUniqueValues(legendList, ratingField):
+    ''' The UniqueValuesJSON build before it was cached: a new dictionary of random colors for every map.'''
+    legendList.sort()
+    infos = []
+    for rating in legendList:
+        rgb = [randint(0, 255), randint(0, 255), randint(0, 255), 255]
+        infos.append({'value': rating, 'description': '', 'label': rating,
+                      'symbol': {'type': 'esriSFS', 'style': 'esriSFSSolid', 'color': rgb,
+                                 'outline': {'color': [0, 0, 0, 255], 'width': 0.4, 'style': 'esriSLSSolid',
+                                             'type': 'esriSLS'}}})
+    return dumps({'displayField': ratingField, 'fields': [],
+                  'drawingInfo': {'renderer': {'type': 'uniqueValue', 'field1': ratingField,
+                                               'uniqueValueInfos': infos}}})
+
+
+def timeRuns(function, repeat):
+    ''' Return the median seconds of calling function repeat times.'''
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        function()
+        times.append(perf_counter() - start)
+    return median(times)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--musyms', type=int, nargs='+', default=[50, 500, 5000], help='Map unit symbols in the legend')
+    parser.add_argument('--maps', type=int, default=20, help='Soil maps symbolized with the legend per run')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size; the median is reported')
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/renderers_<timestamp>.json)')
+    args = parser.parse_args()
+
+    runs = []
+    for count in args.musyms:
+        legend = [f"{i}{'ABCDE'[i % 5]}" for i in range(count)] + ['W']
+
+        legacy = timeRuns(lambda: [legacyUniqueValues(list(legend), 'musym') for _ in range(args.maps)], args.repeat)
+        renderers._uniqueValuesRenderer.cache_clear()
+        first = timeRuns(lambda: uniqueValuesRenderer('musym', legend), 1)
+        cached = timeRuns(lambda: [uniqueValuesRenderer('musym', legend) for _ in range(args.maps)], args.repeat)
+        if uniqueValuesRenderer('musym', reversed(legend)) != uniqueValuesRenderer('musym', legend):
+            raise SystemExit(f"Renderer of {count} musyms depends on legend order")
+
+        runs.append({'musyms': count, 'maps': args.maps, 'legacy_seconds': round(legacy, 5),
+                     'first_build_seconds': round(first, 5), 'cached_seconds': round(cached, 5),
+                     'speedup': round(legacy / cached, 1)})
+        print(f"musyms={count:<6} legacy {legacy:.5f}s   first build {first:.5f}s   cached {cached:.5f}s   "
+              f"for {args.maps} maps")
+
+    results = {
+        'benchmark': 'renderers',
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': python_version(),
+        'repeat': args.repeat,
+        'runs': runs
+    }
+    output = args.output or path.join(RESULTS_DIR, f"renderers_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    makedirs(path.dirname(path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+''' Time each stage of Create Setback Buffers on synthetic farms and record the results as JSON.
+
+Run from the ArcGIS Pro Python environment:
+    python benchmarks/bench_setbacks.py --fields 10 100 1000 --engines arcpy memory
+
+The arcpy engine writes intermediate outputs to a scratch file geodatabase like the tool does, the memory engine
+writes them to the arcpy memory workspace. Setback counts scale with the number of fields unless given explicitly.
+'''
+from argparse import ArgumentParser
+from datetime import datetime
+from json import dump
+from os import makedirs, path
+from platform import python_version
+from sys import path as sys_path
+from tempfile import mkdtemp
+from time import perf_counter
+
+from synthetic_farm import generateFarm, SUPPORT_DIR
+
+sys_path.insert(0, SUPPORT_DIR)
+
+from arcpy import Array, env, Exists, GetInstallInfo, Point, Polygon, Polyline, SpatialReference
+from arcpy.da import InsertCursor
+from arcpy.management import CreateFeatureclass, CreateFeatureDataset, CreateFileGDB, Delete
+
+from setbacks import bufferSetbackFeatures, bufferSetbackLines, calculateSpreadableAcres, eraseSetbackBuffers, \
+    mergeSetbackBuffers, writeSpreadableAcres
+
+
+UTM_SR = 32615 # WGS 1984 UTM Zone 15N, matches synthetic_farm.UTM_ORIGIN
+ENGINES = ['arcpy', 'memory']
+RESULTS_DIR = path.join(path.dirname(path.abspath(__file__)), 'results')
+
+
+def loadFarm(farm, folder, sr):
+    ''' Write a synthetic farm into a new GNT style project geodatabase. Returns the Layers feature dataset path.'''
+    support_gdb = path.join(SUPPORT_DIR, 'SUPPORT.gdb')
+    gdb = path.join(folder, 'Bench_GNTData.gdb')
+    CreateFileGDB(folder, path.basename(gdb))
+    CreateFeatureDataset(gdb, 'Layers', sr)
+    layers = path.join(gdb, 'Layers')
+
+    sources = [
+        ('GNTFieldLayer', 'POLYGON', farm['fields'], ['LandIDGUID', 'ID', 'SubID', 'Size']),
+        ('Setback_Point', 'POINT', farm['points'], ['FeatureCategory', 'FeatureType', 'BufferDistance']),
+        ('Setback_Line', 'POLYLINE', farm['lines'], ['FeatureCategory', 'FeatureType', 'BufferDistance', 'BufferSides']),
+        ('Setback_Polygon', 'POLYGON', farm['polygons'], ['FeatureCategory', 'FeatureType', 'BufferDistance'])
+    ]
+    for name, geometry_type, features, fields in sources:
+        CreateFeatureclass(layers, name, geometry_type, path.join(support_gdb, f"{name}_Template"), spatial_reference=sr)
+        with InsertCursor(path.join(layers, name), ['SHAPE@'] + fields) as cursor:
+            for feature in features:
+                if geometry_type == 'POINT':
+                    shape = Point(*feature['geometry'])
+                elif geometry_type == 'POLYLINE':
+                    shape = Polyline(Array([Point(x, y) for x, y in feature['geometry']]), sr)
+                else:
+                    shape = Polygon(Array([Point(x, y) for x, y in feature['geometry']]), sr)
+                cursor.insertRow([shape] + [feature[field] for field in fields])
+    return layers
+
+
+def runStages(layers, workspace, sr):
+    ''' Run the Create Setback Buffers stages against a loaded farm. Returns elapsed seconds by stage.'''
+    gnt_layer = path.join(layers, 'GNTFieldLayer')
+    temp = {name: path.join(workspace, name) for name in ['point_buffer_temp', 'line_buffer_parts', 'line_buffer_temp',
+                                                          'polygon_buffer_temp', 'final_buffer_temp', 'Setback_Buffer', 'GNTField_Erase']}
+    for temp_path in temp.values():
+        if Exists(temp_path):
+            Delete(temp_path)
+
+    timings = {}
+    def timed(stage, func, *args):
+        start = perf_counter()
+        result = func(*args)
+        timings[stage] = round(perf_counter() - start, 4)
+        return result
+
+    timed('buffer_points', bufferSetbackFeatures, path.join(layers, 'Setback_Point'), temp['point_buffer_temp'])
+    timed('buffer_lines', bufferSetbackLines, path.join(layers, 'Setback_Line'), temp['line_buffer_parts'], temp['line_buffer_temp'], sr)
+    timed('buffer_polygons', bufferSetbackFeatures, path.join(layers, 'Setback_Polygon'), temp['polygon_buffer_temp'])
+    timed('union_dissolve', mergeSetbackBuffers, [temp['point_buffer_temp'], temp['line_buffer_temp'], temp['polygon_buffer_temp']],
+          temp['final_buffer_temp'], temp['Setback_Buffer'])
+    timed('erase', eraseSetbackBuffers, gnt_layer, temp['Setback_Buffer'], temp['GNTField_Erase'])
+    spreadable = timed('area_calc', calculateSpreadableAcres, temp['GNTField_Erase'])
+    timed('write_back', writeSpreadableAcres, gnt_layer, spreadable)
+    timings['total'] = round(sum(timings.values()), 4)
+
+    for temp_path in temp.values():
+        if Exists(temp_path):
+            Delete(temp_path)
+    return timings
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fields', type=int, nargs='+', default=[10, 100, 1000], help='Farm sizes to run, in number of fields')
+    parser.add_argument('--points', type=int, help='Setback points per farm (default 2 per field)')
+    parser.add_argument('--lines', type=int, help='Setback lines per farm (default 1 per field)')
+    parser.add_argument('--polygons', type=int, help='Setback polygons per farm (default 1 per 2 fields)')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=ENGINES)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per farm size and engine')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/setbacks_<timestamp>.json)')
+    args = parser.parse_args()
+
+    sr = SpatialReference(UTM_SR)
+    env.overwriteOutput = True
+    env.outputCoordinateSystem = sr
+    folder = mkdtemp(prefix='gnt_bench_')
+
+    runs = []
+    for fields in args.fields:
+        points = args.points if args.points is not None else fields * 2
+        lines = args.lines if args.lines is not None else fields
+        polygons = args.polygons if args.polygons is not None else max(fields // 2, 1)
+        farm = generateFarm(fields, points, lines, polygons, args.seed)
+
+        farm_folder = path.join(folder, f"farm_{fields}")
+        makedirs(farm_folder)
+        layers = loadFarm(farm, farm_folder, sr)
+        scratch_gdb = path.join(farm_folder, 'scratch.gdb')
+        CreateFileGDB(farm_folder, 'scratch.gdb')
+
+        for engine in args.engines:
+            workspace = scratch_gdb if engine == 'arcpy' else 'memory'
+            for i in range(args.repeat):
+                timings = runStages(layers, workspace, sr)
+                runs.append({'engine': engine, 'run': i + 1, 'fields': fields, 'points': points, 'lines': lines,
+                             'polygons': polygons, 'stages': timings})
+                print(f"{engine:>7} fields={fields:<6} run={i + 1} total={timings['total']:.3f}s")
+
+    results = {
+        'benchmark': 'Create_Setback_Buffers',
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': python_version(),
+        'arcpy': GetInstallInfo().get('Version'),
+        'seed': args.seed,
+        'runs': runs
+    }
+    output = args.output or path.join(RESULTS_DIR, f"setbacks_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    makedirs(path.dirname(path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,225 @@
+''' Compare the two Download Soil Data paths on synthetic farms and record the results as JSON: the full path, which
+also downloads the soil map, and the attribute only path, which only gets tables back. Both send each field as its
+own AOI and get its predominant soil back as a table.
+
+Runs on any platform without ArcGIS Pro or Soil Data Access, with the GeoPackage backend (shapely and pyproj):
+    python benchmarks/bench_soil_download.py [--fields 10 100 400] [--cell 150] [--segment 5] [--repeat 3]
+
+Soil Data Access is emulated: the AOIs in each query are intersected with a grid of synthetic soil polygons in
+shapely, which fills #AoiSoils and #AoiSoils3, then the rest of the query runs against the synthetic SSURGO fixture
+in SQLite and the result is encoded as an SDA JSON response. The emulated server time is reported on its own and
+left out of the client time, which covers decoding the response, writing the tables and feature class, projecting
+the soil map and writing SoilKey.
+'''
+from argparse import ArgumentParser
+from datetime import datetime
+from json import dump, dumps, loads
+from os import makedirs, path
+from platform import python_version
+from random import Random
+from re import compile
+from sqlite3 import connect
+from statistics import median
+from sys import path as sys_path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import shapely
+from pyproj import Transformer
+
+from synthetic_farm import FIELD_SIZE, generateFarm, SQ_METERS_PER_ACRE, SUPPORT_DIR, UTM_ORIGIN
+from synthetic_ssurgo import createSSURGO, returnsRows, toSQLite
+
+sys_path.insert(0, SUPPORT_DIR)
+
+from gnt_core.backends import getBackend
+from gnt_core.sda import attributeQuery, geometryQuery, readQuerySettings, SDAField
+from gnt_core.soils import downloadSoilData
+
+
+UTM_SR = 32615 # WGS 1984 UTM Zone 15N, matches synthetic_farm.UTM_ORIGIN
+PATHS = {'full': True, 'attributes': False}
+RESULTS_DIR = path.join(path.dirname(path.abspath(__file__)), 'results')
+
+GNT_FIELDS = [SDAField('SubID', 'text', '', '', 5, 'SubID'), SDAField('FSATract', 'text', '', '', 10, 'FSATract'),
+              SDAField('FSAFarm', 'text', '', '', 10, 'FSAFarm'), SDAField('SoilKey', 'text', '', '', 20, 'SoilKey')]
+AOI_INSERT = compile(r"VALUES \('([^']*)', geometry::STGeomFromText\('([^']*)', 4326\)\)")
+
+
+def columnInfo(ordinal, values):
+    ''' Return SDA column metadata for a column of Python values returned by SQLite.'''
+    values = [value for value in values if value is not None]
+    if values and all(isinstance(value, int) for value in values):
+        return f"ColumnOrdinal={ordinal},ColumnSize=4,NumericPrecision=10,NumericScale=255,ProviderType=Int"
+    if values and all(isinstance(value, (int, float)) for value in values):
+        return f"ColumnOrdinal={ordinal},ColumnSize=8,NumericPrecision=15,NumericScale=255,ProviderType=Float"
+    size = max([len(str(value)) for value in values] + [1])
+    return f"ColumnOrdinal={ordinal},ColumnSize={size},NumericPrecision=255,NumericScale=255,ProviderType=VarChar"
+
+
+class EmulatedSDA:
+    ''' Answers GNT queries like the SDA Tabular service, from a grid of soil polygons in UTM and a synthetic SSURGO
+    fixture. seconds and bytes accumulate the server time and response size of every request.'''
+
+    def __init__(self, soil_polygons, mukeys, mapunits, seed):
+        self.soil_polygons = soil_polygons
+        self.mukeys = mukeys
+        self.mapunits = mapunits
+        self.seed = seed
+        self.tree = shapely.STRtree(soil_polygons)
+        self.to_utm = Transformer.from_crs(4326, UTM_SR, always_xy=True)
+        self.to_gcs = Transformer.from_crs(UTM_SR, 4326, always_xy=True)
+        self.seconds = 0.0
+        self.bytes = 0
+
+    def respond(self, query):
+        ''' Return the JSON response body for query.'''
+        start = perf_counter()
+        connection = connect(':memory:')
+        # The geometry part of the query creates the AOI tables, filled here in place of its geometry statements
+        statements = toSQLite(query)
+        aoi_tables = len(toSQLite(geometryQuery([])))
+        for statement in statements[:aoi_tables]:
+            connection.execute(statement)
+        createSSURGO(connection, self.mapunits, polygons=0, landunits=0, seed=self.seed)
+        musyms = dict(connection.execute('SELECT mukey, musym FROM mapunit'))
+
+        for aoiid, (landunit, wkt) in enumerate(AOI_INSERT.findall(query), 1):
+            connection.execute('INSERT INTO tmp_AoiTable (aoiid, landunit) VALUES (?, ?)', [aoiid, landunit])
+            aoi = shapely.transform(shapely.from_wkt(wkt), self.to_utm.transform, interleaved=False)
+            for i in sorted(self.tree.query(aoi, predicate='intersects')):
+                mukey = self.mukeys[i]
+                connection.execute('INSERT INTO tmp_AoiSoils (aoiid, landunit, musym, mukey) VALUES (?, ?, ?, ?)',
+                                   [aoiid, landunit, musyms[mukey], mukey])
+                for part in shapely.get_parts(shapely.intersection(aoi, self.soil_polygons[i])):
+                    if part.area == 0:
+                        continue
+                    soil = shapely.transform(part, self.to_gcs.transform, interleaved=False)
+                    connection.execute('INSERT INTO tmp_AoiSoils3 VALUES (?, ?, ?, ?, ?, ?)',
+                                       [aoiid, landunit, musyms[mukey], mukey, round(part.area / SQ_METERS_PER_ACRE, 3), soil.wkt])
+
+        data = {}
+        for statement in statements[aoi_tables:]:
+            cursor = connection.execute(statement)
+            if returnsRows(statement):
+                rows = cursor.fetchall()
+                columns = [column[0] for column in cursor.description]
+                info = [columnInfo(i, [row[i] for row in rows]) for i in range(len(columns))]
+                key = 'Table' if not data else f"Table{len(data)}"
+                data[key] = [columns, info] + [[None if value is None else str(value) for value in row] for row in rows]
+        connection.close()
+
+        body = dumps(data)
+        self.seconds += perf_counter() - start
+        self.bytes += len(body)
+        return body
+
+
+def soilGrid(fields, cell, segment, mukeys, seed):
+    ''' Return (soil polygons, mukey of each) tiling the synthetic farm with rectangular soil polygons of random
+    sizes about cell meters across, with a vertex every segment meters along their edges like digitized soil lines.'''
+    rng = Random(seed)
+    xs = [x for field in fields for x, _ in field['geometry']]
+    ys = [y for field in fields for _, y in field['geometry']]
+
+    def edges(low, high):
+        values = [low - rng.uniform(0, cell)]
+        while values[-1] < high:
+            values.append(values[-1] + rng.uniform(cell / 2, cell * 3 / 2))
+        return values
+
+    columns, rows = edges(min(xs), max(xs)), edges(min(ys), max(ys))
+    polygons = [shapely.segmentize(shapely.box(x1, y1, x2, y2), segment)
+                for x1, x2 in zip(columns, columns[1:]) for y1, y2 in zip(rows, rows[1:])]
+    return polygons, [rng.choice(mukeys) for _ in polygons]
+
+
+def writeFields(backend, workspace, fields):
+    ''' Write synthetic fields to a GNTFieldLayer feature class. Returns the dataset.'''
+    dataset = backend.createTable(workspace, 'GNTFieldLayer', GNT_FIELDS, UTM_SR)
+    rows = [[shapely.Polygon(field['geometry']).wkt, str(i + 1), '1234', '567', None] for i, field in enumerate(fields)]
+    backend.insertRows(dataset, ['SHAPE@WKT'] + [field.name for field in GNT_FIELDS], rows)
+    return dataset
+
+
+def runPath(soil_map, fields, server, attribute_query):
+    ''' Run one Download Soil Data path on a fresh GeoPackage. Returns (seconds, server seconds, response bytes,
+    dict of SubID: SoilKey).'''
+    backend = getBackend('geo')
+    server.seconds, server.bytes = 0.0, 0
+    with TemporaryDirectory() as folder:
+        workspace = path.join(folder, 'Bench_GNTData.gpkg')
+        gnt_dataset = writeFields(backend, workspace, fields)
+        start = perf_counter()
+        downloadSoilData(backend, gnt_dataset, workspace, attribute_query,
+                         post=lambda query, sda_url: loads(server.respond(query)), soil_map=soil_map)
+        seconds = perf_counter() - start
+        soil_keys = dict(backend.readRows(gnt_dataset, ['SubID', 'SoilKey']))
+    return seconds, server.seconds, server.bytes, soil_keys
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fields', type=int, nargs='+', default=[10, 100, 400], help='Fields in the synthetic farm')
+    parser.add_argument('--mapunits', type=int, default=40, help='Mapunits in the SSURGO fixture')
+    parser.add_argument('--cell', type=float, default=150.0, help='Width of the square soil polygons in meters')
+    parser.add_argument('--segment', type=float, default=5.0, help='Meters between soil polygon vertices')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size and path; the median is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/soil_download_<timestamp>.json)')
+    args = parser.parse_args()
+
+    # The full path uses the configured query; the attribute only path leaves its soil map out either way
+    settings = readQuerySettings('Download_Soil_Data')._replace(geometry='full', reduce_tolerance=None)
+    attribute_query = attributeQuery(settings)
+
+    runs = []
+    for count in args.fields:
+        fields = generateFarm(count, 0, 0, 0, seed=args.seed)['fields']
+        mukeys = list(range(100001, 100001 + args.mapunits))
+        soil_polygons, soil_mukeys = soilGrid(fields, args.cell, args.segment, mukeys, args.seed)
+        server = EmulatedSDA(soil_polygons, soil_mukeys, args.mapunits, args.seed)
+
+        results = {}
+        soil_keys = {}
+        for name, soil_map in PATHS.items():
+            timings = [runPath(soil_map, fields, server, attribute_query) for _ in range(args.repeat)]
+            total = median(seconds for seconds, _, _, _ in timings)
+            server_seconds = median(seconds for _, seconds, _, _ in timings)
+            results[name] = {'seconds': round(total, 4), 'server_seconds': round(server_seconds, 4),
+                             'client_seconds': round(total - server_seconds, 4), 'response_bytes': timings[-1][2]}
+            soil_keys[name] = timings[-1][3]
+
+        matching = sum(soil_keys['full'][key] == soil_keys['attributes'].get(key) for key in soil_keys['full'])
+        speedup = round(results['full']['client_seconds'] / results['attributes']['client_seconds'], 2) \
+            if results['attributes']['client_seconds'] > 0 else None
+        runs.append({'fields': count, 'soil_polygons': len(soil_polygons), 'paths': results, 'client_speedup': speedup,
+                     'matching_soil_keys': matching})
+        print(f"fields={count:<5} full client {results['full']['client_seconds']:.4f}s "
+              f"{results['full']['response_bytes'] / 1024:,.0f} KB   attributes client "
+              f"{results['attributes']['client_seconds']:.4f}s {results['attributes']['response_bytes'] / 1024:,.0f} KB   "
+              f"client speedup {speedup}x   matching SoilKey {matching}/{count}")
+
+    results = {
+        'benchmark': 'soil_download',
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': python_version(),
+        'shapely': shapely.__version__,
+        'cell': args.cell,
+        'segment': args.segment,
+        'mapunits': args.mapunits,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'farm_origin': UTM_ORIGIN,
+        'field_size': FIELD_SIZE,
+        'runs': runs
+    }
+    output = args.output or path.join(RESULTS_DIR, f"soil_download_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    makedirs(path.dirname(path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+''' Measure import time and time to first message for each GNT toolbox script, with arcpy stubbed, and record the results as JSON.
+
+Runs on any platform without ArcGIS Pro:
+    python benchmarks/bench_startup.py [--tools Create_MMP_File ...] [--repeat 5] [--budget-ms 500]
+
+Each tool script is run in a fresh interpreter with -X importtime against a stub arcpy package written to a temp
+folder. The stub accepts any call, and its message functions (AddMessage, AddWarning, AddError, SetProgressorLabel)
+record the time and stop the script, so the time to the first message the user would see covers interpreter
+start, imports and module-level work up to that point. The stub only exists for this benchmark.
+'''
+from argparse import ArgumentParser
+from datetime import datetime
+from json import dump
+from os import environ, makedirs, path, pathsep
+from platform import python_version
+from statistics import median
+from subprocess import run
+from sys import executable
+from tempfile import mkdtemp
+from time import time
+
+from synthetic_farm import SUPPORT_DIR
+
+
+TOOLS = ['Create_GNT_Project', 'Create_MMP_File', 'Create_Setback_Buffers', 'Download_Soil_Data']
+ARCPY_MODULES = ['arcpy', 'arcpy.analysis', 'arcpy.conversion', 'arcpy.da', 'arcpy.management', 'arcpy.mp']
+RESULTS_DIR = path.join(path.dirname(path.abspath(__file__)), 'results')
+FIRST_MESSAGE = 'GNT_FIRST_MESSAGE'
+
+STUB_SOURCE = f"""from sys import stderr
+from time import time
+
+
+class Stub:
+    ''' Accepts any call, attribute or item and returns another Stub; empty, falsy and unequal to everything.'''
+    def __init__(self, *args, **kwargs):
+        pass
+    def __call__(self, *args, **kwargs):
+        return Stub()
+    def __getattr__(self, name):
+        return Stub()
+    def __getitem__(self, key):
+        return Stub()
+    def __iter__(self):
+        return iter(())
+    def __len__(self):
+        return 0
+    def __bool__(self):
+        return False
+    def __str__(self):
+        return ''
+    def __lt__(self, other):
+        return False
+    __le__ = __gt__ = __ge__ = __lt__
+    def __enter__(self):
+        return self
+    def __exit__(self, *args):
+        return False
+
+
+def _message(*args, **kwargs):
+    stderr.write(f"{FIRST_MESSAGE} {{time()!r}}\\n")
+    stderr.flush()
+    raise SystemExit(0)
+
+
+AddMessage = AddWarning = AddError = SetProgressorLabel = _message
+
+
+def __getattr__(name):
+    return Stub
+"""
+
+
+def writeArcpyStub(folder):
+    ''' Write the stub arcpy package into folder.'''
+    package = path.join(folder, 'arcpy')
+    makedirs(package)
+    for module in ARCPY_MODULES:
+        file_name = '__init__.py' if module == 'arcpy' else f"{module.split('.')[1]}.py"
+        with open(path.join(package, file_name), 'w') as f:
+            f.write(STUB_SOURCE)
+
+
+def parseImportTime(stderr):
+    ''' Return {module: (self us, cumulative us)} from -X importtime output.'''
+    imports = {}
+    for line in stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            self_us, cumulative_us, module = line[len('import time:'):].split('|')
+            # Nested imports keep their indent after the single separating space
+            if self_us.strip().isdigit():
+                imports[module[1:].rstrip()] = (int(self_us), int(cumulative_us))
+    return imports
+
+
+def runTool(tool, stub_folder):
+    ''' Run one tool script against the arcpy stub. Returns the run measurements.'''
+    env = dict(environ, PYTHONPATH=pathsep.join([stub_folder, SUPPORT_DIR]))
+    start = time()
+    process = run([executable, '-X', 'importtime', path.join(SUPPORT_DIR, f"{tool}.py")], env=env, cwd=SUPPORT_DIR,
+                  capture_output=True, text=True)
+    end = time()
+
+    first_message = None
+    for line in process.stderr.splitlines():
+        if line.startswith(FIRST_MESSAGE):
+            first_message = float(line.split()[1])
+            break
+    imports = parseImportTime(process.stderr)
+    # Only top level imports (no leading spaces) count toward the total
+    top_level = {module: times for module, times in imports.items() if not module.startswith(' ')}
+    return {
+        'first_message_ms': round((first_message - start) * 1000, 1) if first_message else None,
+        'exit_ms': round((end - start) * 1000, 1),
+        'import_ms': round(sum(cumulative for _, cumulative in top_level.values()) / 1000, 1),
+        'slowest_imports': [(module.strip(), round(cumulative / 1000, 1)) for module, (_, cumulative) in
+                            sorted(imports.items(), key=lambda item: -item[1][1])[:10]],
+        'error': None if first_message else process.stderr.strip().splitlines()[-1] if process.stderr.strip() else 'No message'
+    }
+
+
+def interpreterStartup():
+    ''' Return the milliseconds to start and exit an interpreter that does nothing.'''
+    start = time()
+    run([executable, '-c', 'pass'], capture_output=True)
+    return round((time() - start) * 1000, 1)
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tools', nargs='+', choices=TOOLS, default=TOOLS)
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per tool; the median is reported')
+    parser.add_argument('--budget-ms', type=float, help='Exit with an error if any tool takes longer than this to its first message')
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/startup_<timestamp>.json)')
+    args = parser.parse_args()
+
+    stub_folder = mkdtemp(prefix='gnt_arcpy_stub_')
+    writeArcpyStub(stub_folder)
+
+    # Interpreter start up alone, for reference
+    baseline = median(interpreterStartup() for _ in range(args.repeat))
+
+    tools = {}
+    over_budget = []
+    for tool in args.tools:
+        runs = [runTool(tool, stub_folder) for _ in range(args.repeat)]
+        times = [run['first_message_ms'] for run in runs if run['first_message_ms'] is not None]
+        first_message_ms = median(times) if times else None
+        tools[tool] = {
+            'first_message_ms': first_message_ms,
+            'import_ms': median(run['import_ms'] for run in runs),
+            'slowest_imports': runs[-1]['slowest_imports'],
+            'error': runs[-1]['error']
+        }
+        if first_message_ms is None:
+            print(f"{tool:<24} no message: {runs[-1]['error']}")
+            over_budget.append(tool)
+        else:
+            print(f"{tool:<24} first message {first_message_ms:>7.1f} ms   imports {tools[tool]['import_ms']:>7.1f} ms")
+            if args.budget_ms is not None and first_message_ms > args.budget_ms:
+                over_budget.append(tool)
+
+    results = {
+        'benchmark': 'tool_startup',
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': python_version(),
+        'repeat': args.repeat,
+        'interpreter_ms': baseline,
+        'tools': tools
+    }
+    output = args.output or path.join(RESULTS_DIR, f"startup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    makedirs(path.dirname(path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        dump(results, f, indent=2)
+    print(f"Interpreter start up {baseline:.1f} ms. Results written to {output}")
+
+    if over_budget:
+        raise SystemExit(f"Over budget or no message: {', '.join(over_budget)}")
+
+
+if __name__ == '__main__':
+    main()
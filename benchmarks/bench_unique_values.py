@@ -0,0 +1,99 @@
+''' Time the unique mukey extraction of GetUniqueValues and IdentifyWater against the list based loops they replaced,
+and the IN list where clauses built from the result, and record the results as JSON.
+
+Runs on any platform without ArcGIS Pro; cursor rows are simulated as a shuffled list of mukeys:
+    python benchmarks/bench_unique_values.py [--mukeys 10000 30000 100000] [--polygons-per-mukey 3] [--repeat 3]
+
+The list based loops are quadratic, so above --legacy-max mukeys they are left out and reported as null.
+'''
+from argparse import ArgumentParser
+from datetime import datetime
+from json import dump
+from os import makedirs, path
+from platform import python_version
+from random import Random
+from statistics import median
+from sys import path as sys_path
+from time import perf_counter
+
+from synthetic_farm import SUPPORT_DIR
+
+sys_path.insert(0, SUPPORT_DIR)
+
+from gnt_core.values import inClauses, MAX_IN_VALUES, uniqueValues
+
+
+RESULTS_DIR = path.join(path.dirname(path.abspath(__file__)), 'results')
+
+
+def legacyUniqueValues(rows):
+    ''' The GetUniqueValues loop before it was set based: a list membership test for every row.'''
+    valList = list()
+    for rec in rows:
+        val = str(rec[0])
+        if not val == '' and not val in valList:
+            valList.append(val)
+    return valList
+
+
+def timeRuns(function, rows, repeat):
+    ''' Return (median seconds, result) of calling function on rows repeat times.'''
+    times = []
+    for _ in range(repeat):
+        start = perf_counter()
+        result = function(rows)
+        times.append(perf_counter() - start)
+    return median(times), result
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--mukeys', type=int, nargs='+', default=[10000, 30000, 100000], help='Distinct mukeys')
+    parser.add_argument('--polygons-per-mukey', type=int, default=3, help='Cursor rows per mukey')
+    parser.add_argument('--legacy-max', type=int, default=10000, help='Most mukeys to time the list based loop with')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per size; the median is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='JSON results path (default benchmarks/results/unique_values_<timestamp>.json)')
+    args = parser.parse_args()
+
+    rng = Random(args.seed)
+    runs = []
+    for count in args.mukeys:
+        rows = [(mukey,) for mukey in range(100001, 100001 + count) for _ in range(args.polygons_per_mukey)]
+        rng.shuffle(rows)
+
+        seconds, values = timeRuns(lambda rows: uniqueValues(rec[0] for rec in rows), rows, args.repeat)
+        legacy = None
+        if count <= args.legacy_max:
+            legacy, legacy_values = timeRuns(legacyUniqueValues, rows, args.repeat)
+            if legacy_values != values:
+                raise SystemExit(f"Unique values differ from the list based loop for {count} mukeys")
+
+        clause_seconds, clauses = timeRuns(lambda values: inClauses('mukey', values), values, args.repeat)
+        runs.append({'mukeys': count, 'rows': len(rows), 'seconds': round(seconds, 5),
+                     'legacy_seconds': None if legacy is None else round(legacy, 5),
+                     'speedup': None if legacy is None else round(legacy / seconds, 1),
+                     'in_clause_seconds': round(clause_seconds, 5), 'in_clauses': len(clauses),
+                     'longest_in_clause': max(len(clause) for clause in clauses)})
+        print(f"mukeys={count:<7} set {seconds:.5f}s   list " + ('skipped' if legacy is None else f"{legacy:.5f}s") +
+              f"   IN lists {len(clauses)} in {clause_seconds:.5f}s, longest {runs[-1]['longest_in_clause']:,} characters")
+
+    results = {
+        'benchmark': 'unique_values',
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'python': python_version(),
+        'polygons_per_mukey': args.polygons_per_mukey,
+        'max_in_values': MAX_IN_VALUES,
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'runs': runs
+    }
+    output = args.output or path.join(RESULTS_DIR, f"unique_values_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    makedirs(path.dirname(path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+''' Synthetic GNT farm generator for benchmarking. Geometry is plain UTM coordinates (meters) so it does not need arcpy.'''
+from csv import DictReader
+from math import ceil, cos, pi, sin, sqrt
+from os import path
+from random import Random
+
+
+SUPPORT_DIR = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'GNT-ArcGISPro', 'SUPPORT')
+FEATURE_TYPES_DIR = path.join(SUPPORT_DIR, 'SetbackFeatureTypes')
+
+# Typical setback distances in feet; each feature type is assigned one of these per generated farm
+SETBACK_DISTANCES = [35, 50, 100, 150, 200, 300]
+BUFFER_SIDES = ['Left Side', 'Right Side', 'Both Sides']
+
+UTM_ORIGIN = (500000.0, 4400000.0)
+FIELD_SIZE = 400.0 # meters, about 40 acres
+SQ_METERS_PER_ACRE = 4046.8564224
+
+
+def readFeatureTypes(geometry_type):
+    ''' Return (FeatureCategory, FeatureType) pairs from the contingent values for Point, Line or Polygon setbacks.'''
+    csv_path = path.join(FEATURE_TYPES_DIR, f"{geometry_type}_ContingentValue.csv")
+    with open(csv_path, encoding='utf-8-sig', newline='') as f:
+        return [(row['CV_VALUE1'], row['CV_VALUE2']) for row in DictReader(f)]
+
+
+def _setbackAttributes(rng, feature_types, distances):
+    category, feature_type = rng.choice(feature_types)
+    return {'FeatureCategory': category, 'FeatureType': feature_type, 'BufferDistance': distances[feature_type]}
+
+
+def generateFarm(fields, points, lines, polygons, seed=0):
+    ''' Generate a farm of fields tiled on a UTM grid with setback points, lines and polygons scattered over it.
+
+    Returns a dict of 'fields', 'points', 'lines' and 'polygons' lists of attribute dicts, each with a 'geometry'
+    of an (x, y) tuple for points or a list of (x, y) vertices for lines and polygon rings.
+    '''
+    rng = Random(seed)
+    columns = max(ceil(sqrt(fields)), 1)
+    x0, y0 = UTM_ORIGIN
+    width = columns * FIELD_SIZE
+    height = ceil(fields / columns) * FIELD_SIZE
+
+    farm = {'fields': [], 'points': [], 'lines': [], 'polygons': []}
+    for i in range(fields):
+        x = x0 + (i % columns) * FIELD_SIZE
+        y = y0 + (i // columns) * FIELD_SIZE
+        farm['fields'].append({
+            'LandIDGUID': f"{{{seed:08X}-0000-0000-0000-{i:012X}}}",
+            'ID': str(1000 + i // 10),
+            'SubID': str(i % 10 + 1),
+            'Size': round(FIELD_SIZE * FIELD_SIZE / SQ_METERS_PER_ACRE, 2),
+            'geometry': [(x, y), (x, y + FIELD_SIZE), (x + FIELD_SIZE, y + FIELD_SIZE), (x + FIELD_SIZE, y)]
+        })
+
+    def randomXY():
+        return (x0 + rng.uniform(0, width), y0 + rng.uniform(0, height))
+
+    for geometry_type, count in (('Point', points), ('Line', lines), ('Polygon', polygons)):
+        feature_types = readFeatureTypes(geometry_type)
+        distances = {feature_type: rng.choice(SETBACK_DISTANCES) for _, feature_type in feature_types}
+        for _ in range(count):
+            feature = _setbackAttributes(rng, feature_types, distances)
+            if geometry_type == 'Point':
+                feature['geometry'] = randomXY()
+                farm['points'].append(feature)
+
+            elif geometry_type == 'Line':
+                # Meandering stream or ditch as a random walk
+                x, y = randomXY()
+                heading = rng.uniform(0, 2 * pi)
+                vertices = [(x, y)]
+                for _ in range(rng.randint(5, 30)):
+                    heading += rng.uniform(-pi / 4, pi / 4)
+                    step = rng.uniform(20, 80)
+                    x, y = x + step * cos(heading), y + step * sin(heading)
+                    vertices.append((x, y))
+                feature['geometry'] = vertices
+                feature['BufferSides'] = rng.choice(BUFFER_SIDES)
+                farm['lines'].append(feature)
+
+            else:
+                # Irregular star-shaped polygon, listed clockwise
+                cx, cy = randomXY()
+                radius = rng.uniform(10, 60)
+                sides = rng.randint(5, 12)
+                feature['geometry'] = [(cx + radius * rng.uniform(0.6, 1.0) * cos(-2 * pi * k / sides),
+                                        cy + radius * rng.uniform(0.6, 1.0) * sin(-2 * pi * k / sides)) for k in range(sides)]
+                farm['polygons'].append(feature)
+
+    return farm
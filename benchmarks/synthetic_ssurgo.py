@@ -0,0 +1,125 @@
+''' Synthetic SSURGO fixture in SQLite for running the GNT Soil Data Access queries locally.
+
+The fixture holds the SSURGO tables GNT_Query.txt reads (legend, saspatialver, mapunit, component, corestrictions,
+chorizon, chtexturegrp), keyed and indexed like Soil Data Access, and the #AoiTable, #AoiSoils and #AoiSoils3
+temporary tables the geometry part of the query would fill. toSQLite translates the T-SQL of the queries.
+'''
+from random import Random
+from re import compile, IGNORECASE, MULTILINE
+
+
+SURVEY_AREAS = ['IA141', 'IA035', 'IA021']
+COMPONENT_NAMES = ['Clarion', 'Nicollet', 'Webster', 'Canisteo', 'Harps', 'Okoboji', 'Storden', 'Coland', 'Spillville',
+                   'Wadena', 'Estherville', 'Hanlon']
+PHASES = [None, 'eroded', 'depressional', 'overwash']
+RESTRICTION_KINDS = ['Lithic bedrock', 'Paralithic bedrock', 'Densic material', 'Duripan']
+TEXTURES = ['Loam', 'Clay loam', 'Silty clay loam', 'Sandy loam', 'Loamy sand', 'Mucky silty clay loam']
+RUNOFF = ['Negligible', 'Very low', 'Low', 'Medium', 'High']
+DRAINAGE = ['Well drained', 'Moderately well drained', 'Somewhat poorly drained', 'Poorly drained']
+
+SSURGO_SCHEMA = """
+CREATE TABLE legend (lkey INT PRIMARY KEY, areasymbol VARCHAR(20));
+CREATE TABLE saspatialver (areasymbol VARCHAR(20) PRIMARY KEY, spatialversion INT);
+CREATE TABLE mapunit (mukey INT PRIMARY KEY, lkey INT, musym VARCHAR(6), muname VARCHAR(240), mukind VARCHAR(254));
+CREATE TABLE component (cokey INT PRIMARY KEY, mukey INT, compname VARCHAR(60), comppct_r INT, majcompflag VARCHAR(3),
+    otherph VARCHAR(40), localphase VARCHAR(40), compkind VARCHAR(40), slope_l FLOAT, slope_h FLOAT, runoff VARCHAR(30),
+    tfact INT, drainagecl VARCHAR(30));
+CREATE TABLE corestrictions (corestrictkey INT PRIMARY KEY, cokey INT, reskind VARCHAR(254), resdept_r INT);
+CREATE TABLE chorizon (chkey INT PRIMARY KEY, cokey INT, hzdept_r INT, om_l FLOAT, om_h FLOAT);
+CREATE TABLE chtexturegrp (chtgkey INT PRIMARY KEY, chkey INT, texture VARCHAR(30), rvindicator VARCHAR(3));
+CREATE INDEX mapunit_lkey ON mapunit (lkey);
+CREATE INDEX component_mukey ON component (mukey);
+CREATE INDEX corestrictions_cokey ON corestrictions (cokey);
+CREATE INDEX chorizon_cokey ON chorizon (cokey);
+CREATE INDEX chtexturegrp_chkey ON chtexturegrp (chkey);
+"""
+
+# T-SQL rewrites for SQLite, applied in order. Neither query uses + for arithmetic, so it is always concatenation.
+TSQL_REWRITES = [
+    (compile(r'^~.*~$', MULTILINE), ''),                                    # SDA macros
+    (compile(r'#(\w+)'), r'tmp_\1'),                                        # temporary tables
+    (compile(r'\bINT IDENTITY \(1,1\)', IGNORECASE), 'INTEGER PRIMARY KEY'),
+    (compile(r',(\s*)\)'), r'\1)'),                                         # trailing comma in a column list
+    (compile(r'\(SELECT TOP (\d+) ([^()]*)\)', IGNORECASE), r'(SELECT \2 LIMIT \1)'),
+    (compile(r'\bRIGHT\s*\(\s*([\w.]+)\s*,\s*(\d+)\s*\)', IGNORECASE), r'substr(\1, -\2)'),
+    (compile(r'\.STAsText\(\)'), ''),                                       # geometry is held as WKT text
+    (compile(r'ORDER BY areasymbol, mukey\b'), 'ORDER BY L.areasymbol, mu.mukey'),  # SQL Server resolves these from the select list
+    (compile(r' \+ '), ' || ')
+]
+
+# Statements that only SQL Server geometry can run; the fixture holds their results
+GEOMETRY_STATEMENT = compile(r'\.ST\w+\(|::STGeom|\bNumbers\b')
+
+
+def toSQLite(sql):
+    ''' Return the statements of a T-SQL query translated for SQLite, leaving out those that need SQL Server geometry.'''
+    for pattern, replacement in TSQL_REWRITES:
+        sql = pattern.sub(replacement, sql)
+    statements = []
+    for statement in sql.split(';'):
+        code = '\n'.join(line for line in statement.splitlines() if not line.strip().startswith('--')).strip()
+        if code and not GEOMETRY_STATEMENT.search(statement):
+            statements.append(statement)
+    return statements
+
+
+def returnsRows(statement):
+    ''' True for a statement that returns a table to the client, i.e. a SELECT that is not part of an INSERT.'''
+    code = ' '.join(line for line in statement.splitlines() if not line.strip().startswith('--')).strip().upper()
+    return code.startswith('SELECT') or code.startswith('WITH')
+
+
+def createSSURGO(connection, mapunits=60, polygons=400, landunits=1, restrictions=1, seed=0):
+    ''' Fill an SQLite connection with synthetic SSURGO tables and AOI soil polygons.
+
+    Each component has up to restrictions corestrictions rows; GNT_Query.txt repeats a component once per row.
+    Call after the geometry part of the query has created the AOI temporary tables.
+    '''
+    rng = Random(seed)
+    connection.executescript(SSURGO_SCHEMA)
+
+    for lkey, areasymbol in enumerate(SURVEY_AREAS, 1):
+        connection.execute('INSERT INTO legend VALUES (?, ?)', [lkey, areasymbol])
+        connection.execute('INSERT INTO saspatialver VALUES (?, ?)', [areasymbol, rng.randint(1, 12)])
+
+    cokey = chkey = chtgkey = corestrictkey = 0
+    for mukey in range(100001, 100001 + mapunits):
+        musym = f"{rng.randint(1, 999)}{rng.choice(['', 'B', 'C2', 'D'])}"
+        connection.execute('INSERT INTO mapunit VALUES (?, ?, ?, ?, ?)',
+                           [mukey, rng.randint(1, len(SURVEY_AREAS)), musym, f"Mapunit {musym}", 'Consociation'])
+        for _ in range(rng.randint(1, 4)):
+            cokey += 1
+            slope_l = rng.choice([0, 1, 2, 5, 9, 14])
+            connection.execute('INSERT INTO component VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                               [cokey, mukey, rng.choice(COMPONENT_NAMES), rng.choice([5, 10, 15, 30, 45, 60, 85]),
+                                rng.choice(['Yes', 'Yes', 'No']), rng.choice(PHASES), rng.choice(PHASES), 'Series',
+                                slope_l, slope_l + rng.choice([2, 3, 4, 5]), rng.choice(RUNOFF), rng.randint(1, 5),
+                                rng.choice(DRAINAGE)])
+            for _ in range(rng.randint(0, restrictions)):
+                corestrictkey += 1
+                depth = None if rng.random() < 0.1 else rng.randint(20, 200)
+                connection.execute('INSERT INTO corestrictions VALUES (?, ?, ?, ?)',
+                                   [corestrictkey, cokey, rng.choice(RESTRICTION_KINDS), depth])
+            for depth in (0, 20, 50):
+                chkey += 1
+                om = rng.choice([0.5, 1, 2, 3, 4])
+                connection.execute('INSERT INTO chorizon VALUES (?, ?, ?, ?, ?)', [chkey, cokey, depth, om, om + 2])
+                chtgkey += 1
+                connection.execute('INSERT INTO chtexturegrp VALUES (?, ?, ?, ?)', [chtgkey, chkey, rng.choice(TEXTURES), 'Yes'])
+
+    musyms = dict(connection.execute('SELECT mukey, musym FROM mapunit'))
+    for aoiid in range(1, landunits + 1):
+        connection.execute('INSERT INTO tmp_AoiTable (aoiid, landunit) VALUES (?, ?)', [aoiid, f"T{1000 + aoiid} F{aoiid}"])
+    for _ in range(polygons):
+        aoiid = rng.randint(1, landunits)
+        landunit = f"T{1000 + aoiid} F{aoiid}"
+        mukey = rng.choice(list(musyms))
+        connection.execute('INSERT INTO tmp_AoiSoils (aoiid, landunit, musym, mukey) VALUES (?, ?, ?, ?)',
+                           [aoiid, landunit, musyms[mukey], mukey])
+        # Single part polygons of the intersection
+        for _ in range(rng.randint(1, 2)):
+            x, y = rng.uniform(-94, -93), rng.uniform(42, 43)
+            connection.execute('INSERT INTO tmp_AoiSoils3 VALUES (?, ?, ?, ?, ?, ?)',
+                               [aoiid, landunit, musyms[mukey], mukey, round(rng.uniform(0.01, 40), 3),
+                                f"POLYGON (({x} {y}, {x + 0.001} {y}, {x + 0.001} {y + 0.001}, {x} {y}))"])
+    connection.commit()
@@ -0,0 +1,7 @@
+from os import path
+from sys import path as sys_path
+
+
+SUPPORT_DIR = path.join(path.dirname(path.dirname(path.abspath(__file__))), 'GNT-ArcGISPro', 'SUPPORT')
+
+sys_path.insert(0, SUPPORT_DIR)
@@ -0,0 +1,125 @@
+''' The GeoPackage backend, and Download Soil Data run on it against a canned Soil Data Access response.'''
+from sqlite3 import connect
+from struct import unpack
+
+import pytest
+
+shapely = pytest.importorskip('shapely')
+pytest.importorskip('pyproj')
+
+from gnt_core.backends import getBackend
+from gnt_core.backends.geo_backend import GeoBackend, gpkgGeometry, readGpkgGeometry
+from gnt_core.sda import SDAField
+from gnt_core.soils import downloadSoilData
+
+
+UTM_WKID = 32615
+FIELD_FIELDS = [SDAField('SubID', 'text', '', '', 20, 'SubID'), SDAField('Size', 'double', 15, 2, 0, 'Size'),
+                SDAField('SoilKey', 'text', '', '', 20, 'SoilKey')]
+FIELDS = [
+    ('POLYGON ((500000 4650000, 500400 4650000, 500400 4650400, 500000 4650400, 500000 4650000))', '1', 39.5, None),
+    ('POLYGON ((500400 4650000, 500800 4650000, 500800 4650400, 500400 4650400, 500400 4650000))', '2', 39.5, 'stale'),
+]
+TEXT = 'ColumnOrdinal={},ColumnSize=20,NumericPrecision=255,NumericScale=255,ProviderType=VarChar'
+FLOAT = 'ColumnOrdinal={},ColumnSize=8,NumericPrecision=15,NumericScale=255,ProviderType=Float'
+
+
+def sdaTable(columns, rows):
+    ''' Return an SDA response table of (name, TEXT or FLOAT) columns and rows of strings.'''
+    return [[name for name, _ in columns], [info.format(i) for i, (_, info) in enumerate(columns)]] + rows
+
+
+SOIL_MAP_WKT = 'POLYGON ((-93 42, -92.999 42, -92.999 42.001, -93 42.001, -93 42))'
+SDA_RESPONSE = {
+    'Table': sdaTable([('landunit', TEXT), ('areasymbol', TEXT), ('musym', TEXT), ('mukey', TEXT),
+                       ('poly_acres', FLOAT), ('wktgeom', TEXT)],
+                      [['1', 'IA141', '55', '411', '39.5', SOIL_MAP_WKT]]),
+    'Table1': sdaTable([('landunit', TEXT), ('musym', TEXT), ('mapunit_acres', FLOAT)], [['1', '55', '39.5']]),
+    'Table2': sdaTable([('landunit', TEXT), ('musym', TEXT)], [['1', '55']]),
+    'Table3': sdaTable([('landunit', TEXT), ('areasymbol', TEXT), ('musym', TEXT), ('mukey', TEXT),
+                        ('mapunit_acres', FLOAT)], [['1', 'IA141', '55', '411', '39.5']])
+}
+
+
+@pytest.fixture
+def gpkg(tmp_path):
+    return str(tmp_path / 'farm.gpkg')
+
+
+@pytest.fixture
+def fields(gpkg):
+    backend = GeoBackend()
+    dataset = backend.createTable(gpkg, 'GNTFieldLayer', FIELD_FIELDS, UTM_WKID)
+    backend.insertRows(dataset, ['SHAPE@WKT', 'SubID', 'Size', 'SoilKey'], FIELDS)
+    return dataset
+
+
+def test_get_backend():
+    assert isinstance(getBackend('geo'), GeoBackend)
+    with pytest.raises(ValueError, match='Unknown GIS backend qgis'):
+        getBackend('qgis')
+
+
+def test_gpkg_geometry_round_trip():
+    polygon = shapely.from_wkt(FIELDS[0][0])
+    blob = gpkgGeometry(polygon, UTM_WKID)
+    assert blob[:2] == b'GP'
+    assert unpack('<i4d', blob[4:40]) == (UTM_WKID, 500000, 500400, 4650000, 4650400)
+    assert readGpkgGeometry(blob).equals(polygon)
+    assert readGpkgGeometry(gpkgGeometry(shapely.Polygon(), UTM_WKID)).is_empty
+
+
+def test_feature_table_round_trip(gpkg, fields):
+    backend = GeoBackend()
+    assert backend.spatialReference(fields) == UTM_WKID
+    rows = list(backend.readRows(fields, ['SubID', 'Size', 'SHAPE@WKT']))
+    assert [row[:2] for row in rows] == [['1', 39.5], ['2', 39.5]]
+    assert shapely.from_wkt(rows[0][2]).equals(shapely.from_wkt(FIELDS[0][0]))
+
+    with connect(gpkg) as connection:
+        assert connection.execute('PRAGMA application_id').fetchone() == (0x47504B47,)
+        assert connection.execute("SELECT data_type, srs_id FROM gpkg_contents WHERE table_name = 'GNTFieldLayer'").fetchone() == \
+            ('features', UTM_WKID)
+    connection.close()
+
+
+def test_create_table_replaces_existing(gpkg, fields):
+    backend = GeoBackend()
+    dataset = backend.createTable(gpkg, 'GNTFieldLayer', FIELD_FIELDS[:1])
+    assert list(backend.readRows(dataset, ['SubID'])) == []
+    with pytest.raises(ValueError, match='GNTFieldLayer is not a feature table'):
+        backend.spatialReference(dataset)
+
+
+def test_update_rows(fields):
+    backend = GeoBackend()
+    assert backend.updateRows(fields, 'SubID', 'SoilKey', {'2': '141_55', '9': '141_56'}) == 1
+    assert list(backend.readRows(fields, ['SubID', 'SoilKey'])) == [['1', None], ['2', '141_55']]
+
+
+def test_project_wkt():
+    point = shapely.from_wkt(GeoBackend().projectWKT('POINT (-93 42)', 4326, UTM_WKID))
+    assert point.x == pytest.approx(500000, abs=1e-3)
+    back = shapely.from_wkt(GeoBackend().projectWKT(point.wkt, UTM_WKID, 4326))
+    assert (back.x, back.y) == pytest.approx((-93, 42))
+
+
+def test_download_soil_data(gpkg, fields):
+    queries = []
+    def post(query, sda_url):
+        queries.append(query)
+        return SDA_RESPONSE
+
+    backend = GeoBackend()
+    datasets = downloadSoilData(backend, fields, gpkg, 'SELECT 1;', post=post)
+    assert sorted(datasets) == ['DominantSoils', 'FieldSoils', 'MapunitAcres', 'SoilMap_by_Landunit']
+    assert "VALUES ('1', geometry::STGeomFromText('POLYGON ((" in queries[0]
+    assert "VALUES ('2', geometry::STGeomFromText('POLYGON ((" in queries[0]
+
+    # Field 2 had no soil returned, so its SoilKey from an earlier download is cleared
+    assert list(backend.readRows(fields, ['SubID', 'SoilKey'])) == [['1', '141_55'], ['2', None]]
+    soil_map = datasets['SoilMap_by_Landunit']
+    assert backend.spatialReference(soil_map) == UTM_WKID
+    (musym, wkt), = backend.readRows(soil_map, ['musym', 'SHAPE@WKT'])
+    assert musym == '141_55'
+    assert shapely.from_wkt(wkt).centroid.x == pytest.approx(500041, abs=1)
@@ -0,0 +1,141 @@
+''' Areas of line_buffer setback rings on synthetic polylines, dissolved with shapely, against exact or sampled
+true buffers, and the lines left to Buffer.'''
+from math import pi
+
+import numpy as np
+import pytest
+
+from gnt_core.buffers import planLineBuffers
+from gnt_core.line_buffer import BOTH_SIDES, bufferLinePart, bufferLineSides, LEFT_SIDE, RIGHT_SIDE
+
+shapely_geometry = pytest.importorskip('shapely.geometry')
+shapely_ops = pytest.importorskip('shapely.ops')
+
+
+STRAIGHT = [(0, 0), (100, 0)]
+REVERSAL = [(0, 0), (100, 0), (50, 0)]
+SQUARE_RING = [(0, 0), (100, 0), (100, 100), (0, 100), (0, 0)]  # counterclockwise, so the left side is inside
+SELF_TOUCHING = [(0, 0), (100, 0), (100, 50), (50, 50), (50, 0), (50, -50)]  # comes back through (50, 0)
+HAIRPIN = [(0, 0), (100, 0), (100, 5), (0, 5)]  # comes back 5 m from itself
+TIGHT_ZIGZAG = [(i * 5, (i % 2) * 10) for i in range(21)]  # 5 m steps, 10 m high
+WIDE_ZIGZAG = [(i * 40, (i % 2) * 40) for i in range(8)]  # right angle turns
+SHARP_TURN = [(0, 0), (100, 0), (0, 30)]
+STREAM = [(x, 20 * np.sin(x / 30)) for x in np.linspace(0, 60 * pi, 60)]
+ARC = [(50 * np.cos(t), 50 * np.sin(t)) for t in np.linspace(0, pi, 40)]
+
+# Round joins and ends are drawn with chords, so areas are a little under the exact circular ones
+CHORD_TOLERANCE = 1e-3
+
+
+def bufferArea(vertices, distance, buffer_sides):
+    ''' Return the area of the dissolved buffer rings of a polyline.'''
+    rings = bufferLinePart(vertices, distance, buffer_sides)
+    return shapely_ops.unary_union([shapely_geometry.Polygon(ring) for ring in rings]).area
+
+
+def sampledSideArea(vertices, distance, sign, step=0.2):
+    ''' Return the area of the exact flat-ended one-sided buffer of an open line, sampled on a grid: points within
+    distance of the line whose nearest point is on the left (sign 1) or right (sign -1) of it. A point nearest an
+    inner vertex is on the outside of the turn there, and points past the ends are left out.'''
+    vertices = np.asarray(vertices, dtype=float)
+    low, high = vertices.min(axis=0) - distance, vertices.max(axis=0) + distance
+    xs, ys = np.meshgrid(np.arange(low[0], high[0], step) + step / 2, np.arange(low[1], high[1], step) + step / 2)
+    points = np.stack([xs.ravel(), ys.ravel()], axis=1)
+    directions = np.diff(vertices, axis=0)
+    turns = np.sign(directions[:-1, 0] * directions[1:, 1] - directions[:-1, 1] * directions[1:, 0])
+
+    nearest = np.full(len(points), np.inf)
+    side = np.zeros(len(points))
+    past_end = np.zeros(len(points), dtype=bool)
+    last = len(directions) - 1
+    for i, (start, vector) in enumerate(zip(vertices[:-1], directions)):
+        along = (points - start) @ vector / (vector @ vector)
+        closest = start + np.clip(along, 0, 1)[:, None] * vector
+        dist = np.hypot(*(points - closest).T)
+        point_side = np.sign(vector[0] * (points[:, 1] - start[1]) - vector[1] * (points[:, 0] - start[0]))
+        if i > 0:
+            point_side = np.where(along <= 0, -turns[i - 1], point_side)
+        if i < last:
+            point_side = np.where(along >= 1, -turns[i], point_side)
+        nearer = dist < nearest - 1e-9
+        nearest = np.where(nearer, dist, nearest)
+        side = np.where(nearer, point_side, side)
+        past_end = np.where(nearer, ((i == 0) & (along < 0)) | ((i == last) & (along > 1)), past_end)
+    return np.count_nonzero((nearest <= distance) & (side == sign) & ~past_end) * step * step
+
+
+@pytest.mark.parametrize('buffer_sides, expected', [
+    (LEFT_SIDE, 1000.0),
+    (RIGHT_SIDE, 1000.0),
+    (BOTH_SIDES, 2000.0 + 100 * pi),
+])
+def test_straight_line(buffer_sides, expected):
+    assert bufferArea(STRAIGHT, 10, buffer_sides) == pytest.approx(expected, rel=CHORD_TOLERANCE)
+
+
+@pytest.mark.parametrize('buffer_sides, expected', [
+    (LEFT_SIDE, 1500.0 + 50 * pi),   # both segments plus the half circle around the tip
+    (RIGHT_SIDE, 1500.0 + 50 * pi),
+    (BOTH_SIDES, 2000.0 + 100 * pi),
+])
+def test_reversal(buffer_sides, expected):
+    assert bufferArea(REVERSAL, 10, buffer_sides) == pytest.approx(expected, rel=CHORD_TOLERANCE)
+
+
+@pytest.mark.parametrize('buffer_sides, expected', [
+    (LEFT_SIDE, 100 ** 2 - 80 ** 2),
+    (RIGHT_SIDE, 4 * 100 * 10 + 100 * pi),
+    (BOTH_SIDES, 100 ** 2 - 80 ** 2 + 4 * 100 * 10 + 100 * pi),
+])
+def test_closed_ring(buffer_sides, expected):
+    assert bufferArea(SQUARE_RING, 10, buffer_sides) == pytest.approx(expected, rel=CHORD_TOLERANCE)
+
+
+def test_both_sides_matches_round_buffer():
+    for vertices in (SELF_TOUCHING, TIGHT_ZIGZAG, HAIRPIN):
+        expected = shapely_geometry.LineString(vertices).buffer(10, quad_segs=16).area
+        assert bufferArea(vertices, 10, BOTH_SIDES) == pytest.approx(expected, rel=CHORD_TOLERANCE)
+
+
+@pytest.mark.parametrize('vertices, distance', [
+    (STREAM, 10),
+    (ARC, 10),
+    (WIDE_ZIGZAG, 10),
+    (SHARP_TURN, 10),
+])
+@pytest.mark.parametrize('buffer_sides, sign', [(LEFT_SIDE, 1), (RIGHT_SIDE, -1)])
+def test_one_sided_matches_exact_buffer(vertices, distance, buffer_sides, sign):
+    assert bufferArea(vertices, distance, buffer_sides) == pytest.approx(sampledSideArea(vertices, distance, sign), rel=0.005)
+
+
+@pytest.mark.parametrize('vertices, distance', [(TIGHT_ZIGZAG, 15), (SELF_TOUCHING, 10), (HAIRPIN, 10)])
+def test_lines_reaching_across_themselves_are_left_to_buffer(vertices, distance):
+    # A one-sided buffer built from parts would cover the other side of these lines, so Buffer builds it instead
+    assert bufferLinePart(vertices, distance, LEFT_SIDE) is None
+    tangled = []
+    rings = bufferLineSides([([vertices], distance, LEFT_SIDE), ([STRAIGHT], distance, LEFT_SIDE)], tangled=tangled)
+    assert tangled == [([vertices], distance, LEFT_SIDE)]
+    assert len(rings[LEFT_SIDE]) == 1
+    assert bufferLinePart(vertices, distance, BOTH_SIDES) is not None
+
+
+def test_unknown_buffer_sides_are_skipped():
+    skipped = []
+    rings = bufferLineSides([([STRAIGHT], 10, LEFT_SIDE), ([STRAIGHT], 10, 'Upstream'), ([STRAIGHT], 10, None)],
+                            skipped)
+    assert skipped == ['Upstream', None]
+    assert len(rings[LEFT_SIDE]) == 1
+    assert rings[RIGHT_SIDE] == rings[BOTH_SIDES] == []
+
+
+def test_unknown_buffer_sides_raise_for_one_part():
+    with pytest.raises(ValueError):
+        bufferLinePart(STRAIGHT, 10, 'Upstream')
+
+
+def test_missing_buffer_sides_are_skipped():
+    skipped = []
+    lines = [([STRAIGHT], 100, LEFT_SIDE), ([STRAIGHT], 100, None), ([STRAIGHT], 100, ''), ([STRAIGHT], None, LEFT_SIDE)]
+    rings = bufferLineSides(planLineBuffers(lines, 1.0), skipped)
+    assert skipped == [None, '']
+    assert len(rings[LEFT_SIDE]) == 1
@@ -0,0 +1,268 @@
+''' Writing, merging and checking MMP files rendered from the SUPPORT template.'''
+from os import listdir, stat, utime
+
+import pytest
+
+pytest.importorskip('jinja2')
+
+from gnt_core import mmp
+from gnt_core.mmp import adminData, FieldRecord, fieldRecords, getTemplate, indexMMPFile, loadMMPIndex, mergeMMPFile, mmpStateInfo, \
+    MMPStateInfo, readMMPSections, readRevDate, validateMMPFile
+
+
+ADMIN_ROW = ['Bench Farm', '1 Main St', 'Ames', 'IA', '50010', 'Pat Doe', '', '', '', '', '169', '2026', '10', '5']
+FIELD_ROWS = [
+    ['1', 'A', 40.25, 38.5, '141_55', '', '1234', '567', '1'],
+    ['2', 'B', 12.0, 11.0, '41_138B', '', '1234', '567', '2']
+]
+
+
+def mmpContext(field_rows=FIELD_ROWS, run_date='10/18/2026'):
+    ''' Return the template context Create MMP File renders for an Admin_Table row and GNTFieldLayer rows.'''
+    return {'mmp_version': 'MMP 2.0', 'run_date': run_date, 'run_time': '12:00:00', 'mmi_RevDate': '06/01/2026',
+            'mms_RevDate': '06/01/2026', 'admin_data': adminData(ADMIN_ROW), 'gnt_fields': fieldRecords(field_rows)}
+
+
+def readSections(mmp_path):
+    with open(mmp_path, encoding='utf-8', newline='') as f:
+        return list(readMMPSections(f))
+
+
+def fieldSection(mmp_path, number):
+    return next(section for section in readSections(mmp_path) if section.name == 'Field' and section.number == str(number))
+
+
+def editFile(mmp_path, edit):
+    ''' Apply a planner's edit, edit(sections), to an MMP file and save it.'''
+    sections = readSections(mmp_path)
+    edit(sections)
+    with open(mmp_path, 'w', encoding='utf-8', newline='') as f:
+        for section in sections:
+            f.writelines(section.lines)
+
+
+@pytest.fixture
+def mmp_path(tmp_path):
+    mmp_path = tmp_path / 'farm.mmp'
+    mergeMMPFile(getTemplate(), str(mmp_path), **mmpContext())
+    return mmp_path
+
+
+def test_new_file_is_written(tmp_path):
+    mmp_path = tmp_path / 'farm.mmp'
+    stats = mergeMMPFile(getTemplate(), str(mmp_path), **mmpContext())
+    assert stats == {'unchanged': 0, 'patched': 0, 'added': 2, 'removed': 0}
+    assert fieldSection(mmp_path, 1).get('Size') == '40.2'
+    assert fieldSection(mmp_path, 2).get('SubID') == 'B'
+
+
+def test_merge_patches_only_gnt_keys(mmp_path):
+    def plannerEdits(sections):
+        for section in sections:
+            if section.name == 'PlanInfo':
+                section.set('Title', 'Nutrient plan')
+            elif section.name == 'Field' and section.number == '1':
+                section.set('EC', '0.4')
+                section.set('Slope', '3')
+                section.set('Size', '99.9')
+    editFile(mmp_path, plannerEdits)
+
+    field_rows = [FIELD_ROWS[0][:4] + ['141_56'] + FIELD_ROWS[0][5:], FIELD_ROWS[1]]
+    stats = mergeMMPFile(getTemplate(), str(mmp_path), **mmpContext(field_rows, run_date='10/19/2026'))
+
+    assert stats == {'unchanged': 1, 'patched': 1, 'added': 0, 'removed': 0}
+    plan_info = next(section for section in readSections(mmp_path) if section.name == 'PlanInfo')
+    assert plan_info.get('RevDate') == '10/19/2026'
+    assert plan_info.get('Title') == 'Nutrient plan'
+    field = fieldSection(mmp_path, 1)
+    assert field.get('SoilKey') == '141_56_1'
+    assert field.get('Size') == '40.2'
+    assert field.get('EC') == '0.4'
+    assert field.get('Slope') == '3'
+
+
+def test_merge_keeps_untouched_sections(mmp_path):
+    crop = ['[Crop=1]\n', 'Field=2\n', 'Crop=Corn grain\n', '\n']
+    editFile(mmp_path, lambda sections: sections[-1].lines.extend(crop))
+    before = mmp_path.read_bytes()
+
+    stats = mergeMMPFile(getTemplate(), str(mmp_path), **mmpContext())
+    assert stats == {'unchanged': 2, 'patched': 0, 'added': 0, 'removed': 0}
+    assert mmp_path.read_bytes() == before
+
+    # Removing the first field renumbers the second and keeps the planner's section after it
+    stats = mergeMMPFile(getTemplate(), str(mmp_path), **mmpContext(FIELD_ROWS[1:]))
+    assert stats == {'unchanged': 1, 'patched': 0, 'added': 0, 'removed': 1}
+    sections = readSections(mmp_path)
+    assert [(section.name, section.number) for section in sections if section.name in ('Field', 'Crop')] == \
+        [('Field', '1'), ('Crop', '1')]
+    assert sections[-1].lines == crop
+    assert fieldSection(mmp_path, 1).get('SubID') == 'B'
+
+
+def test_failed_check_keeps_the_existing_file(mmp_path):
+    before = mmp_path.read_bytes()
+    with pytest.raises(ValueError, match='would not be accepted by MMP: SpreadSize is wrong'):
+        mergeMMPFile(getTemplate(), str(mmp_path), check=lambda temp_path: ['SpreadSize is wrong'], **mmpContext())
+    assert mmp_path.read_bytes() == before
+    assert listdir(mmp_path.parent) == ['farm.mmp']
+
+
+def test_failed_write_keeps_the_existing_file(mmp_path):
+    before = mmp_path.read_bytes()
+    field_rows = FIELD_ROWS + [['3', 'C', 'not a size', 1.0, '', '', '', '', '']]
+    with pytest.raises(ValueError, match='Size or SpreadSize'):
+        mergeMMPFile(getTemplate(), str(mmp_path), **mmpContext(field_rows))
+    assert mmp_path.read_bytes() == before
+    assert listdir(mmp_path.parent) == ['farm.mmp']
+
+
+def test_failed_write_leaves_no_new_file(tmp_path):
+    # The bad row fails part way through streaming the template to the temp file
+    field_rows = FIELD_ROWS + [['3', 'C', 'not a size', 1.0, '', '', '', '', '']]
+    with pytest.raises(ValueError, match='Size or SpreadSize'):
+        mergeMMPFile(getTemplate(), str(tmp_path / 'farm.mmp'), **mmpContext(field_rows))
+    assert listdir(tmp_path) == []
+
+
+def writeFields(tmp_path, fields):
+    ''' Write an MMP file with [PlanInfo], [Operation] and a [Field=N] section for each (N, ID, SubID, Size, SpreadSize).'''
+    mmp_path = tmp_path / 'farm.mmp'
+    lines = ['; Manure Management Plan file - do not modify.\n', '[PlanInfo]\n', 'FileVers=1\n', '[Operation]\n',
+             'Operation=Bench Farm\n']
+    for number, field_id, sub_id, size, spread_size in fields:
+        lines += [f"[Field={number}]\n", f"ID={field_id}\n", f"SubID={sub_id}\n", f"Size={size}\n",
+                  f"SpreadSize={spread_size}\n", 'SoilKey=141_55_1\n']
+    mmp_path.write_text(''.join(lines), encoding='utf-8')
+    return mmp_path
+
+
+def test_index_finds_sections_and_values(tmp_path):
+    mmp_path = writeFields(tmp_path, [(1, '1', 'A', '40.2', '38.5'), (2, '2', 'B', '12.0', '11.0')])
+    sections = indexMMPFile(mmp_path, ['Size'])
+    assert [(entry.name, entry.number) for entry in sections] == \
+        [(None, None), ('PlanInfo', ''), ('Operation', ''), ('Field', '1'), ('Field', '2')]
+    assert sections[4].values == {'Size': '12.0'}
+    with open(mmp_path, 'rb') as f:
+        f.seek(sections[4].keys['SubID'])
+        assert f.readline() == b'SubID=B\n'
+
+
+def test_valid_file_has_no_errors(tmp_path):
+    assert validateMMPFile(writeFields(tmp_path, [(1, '1', 'A', '40.2', '38.5'), (2, '2', 'B', '12.0', '0.1')])) == []
+
+
+def test_spread_size_over_size_is_allowed(tmp_path):
+    # MMP accepts a SpreadSize larger than Size, so no error is raised for it
+    assert validateMMPFile(writeFields(tmp_path, [(1, '1', 'A', '10.0', '12.5')])) == []
+
+
+def test_missing_sections(tmp_path):
+    mmp_path = tmp_path / 'farm.mmp'
+    mmp_path.write_text('[Field=1]\nID=1\nSubID=A\nSize=1\nSpreadSize=1\n', encoding='utf-8')
+    assert validateMMPFile(mmp_path) == ['missing [PlanInfo] section', 'missing [Operation] section']
+
+
+@pytest.mark.parametrize('spread_size', ['0.09', '0', '', 'none'])
+def test_spread_size_under_minimum(tmp_path, spread_size):
+    errors = validateMMPFile(writeFields(tmp_path, [(1, '1', 'A', '10.0', spread_size)]))
+    assert errors == ['[Field=1] SpreadSize must be at least 0.1']
+
+
+@pytest.mark.parametrize('size', ['0', '-1.5', '', 'none'])
+def test_size_not_over_zero(tmp_path, size):
+    errors = validateMMPFile(writeFields(tmp_path, [(1, '1', 'A', size, '0.5')]))
+    assert errors == ['[Field=1] Size must be greater than 0']
+
+
+def test_sequence_gaps(tmp_path):
+    errors = validateMMPFile(writeFields(tmp_path, [(1, '1', 'A', '1', '1'), (3, '2', 'B', '1', '1'),
+                                                    (4, '3', 'C', '1', '1')]))
+    assert errors == ['[Field=3] is out of sequence, expected [Field=2]', '[Field=4] is out of sequence, expected [Field=3]']
+
+
+def test_duplicate_and_missing_field_ids(tmp_path):
+    errors = validateMMPFile(writeFields(tmp_path, [(1, '1', 'A', '1', '1'), (2, '1', 'A', '1', '1'),
+                                                    (3, '', 'C', '1', '1')]))
+    assert errors == ['[Field=2] repeats field 1-A', '[Field=3] has no ID']
+
+
+def test_expected_fields_mismatches(tmp_path):
+    mmp_path = writeFields(tmp_path, [(1, '1', 'A', '40.2', '38.5'), (2, '2', 'B', '12.0', '11.0'),
+                                      (3, '4', 'D', '5.0', '5.0')])
+    expected_fields = {key: FieldRecord(*key, *sizes, '', '', '', '', '') for key, sizes in [
+        (('1', 'A'), ('40.2', '38.5')), (('2', 'B'), ('12.5', '11.0')), (('3', 'C'), ('7.0', '7.0'))]}
+    assert validateMMPFile(mmp_path, expected_fields) == [
+        '[Field=2] Size does not match GNTFieldLayer',
+        '[Field=3] field 4-D is not in GNTFieldLayer',
+        'field 3-C from GNTFieldLayer is missing'
+    ]
+
+
+def writeLookup(file_path, rev_date):
+    ''' Write an MMP lookup file with a RevDate, moving its mtime on so the change is seen at any mtime resolution.'''
+    mtime = stat(file_path).st_mtime + 10 if file_path.exists() else None
+    file_path.write_text(f"[Lookup]\nVersion=2\nRevDate={rev_date}\n")
+    if mtime is not None:
+        utime(file_path, (mtime, mtime))
+
+
+@pytest.fixture
+def install(tmp_path):
+    ''' A fake USDA install folder with MMP and the Iowa lookup files.'''
+    lookup = tmp_path / 'USDA' / 'MMP 2.0' / 'Lookup'
+    lookup.mkdir(parents=True)
+    writeLookup(lookup / 'IA.mmi', '06/01/2026')
+    writeLookup(lookup / 'IA.mms', '05/15/2026')
+    return tmp_path / 'USDA'
+
+
+def test_read_rev_date(tmp_path):
+    writeLookup(tmp_path / 'IA.mmi', '06/01/2026')
+    (tmp_path / 'MN.mmi').write_text('[Lookup]\nVersion=2\n')
+    assert readRevDate(tmp_path / 'IA.mmi') == '06/01/2026'
+    assert readRevDate(tmp_path / 'MN.mmi') is None
+
+
+def test_state_info_from_install(install, tmp_path):
+    index_path = tmp_path / 'cache' / 'mmp_index.json'
+    info = mmpStateInfo('ia', str(install), str(index_path))
+    lookup = install / 'MMP 2.0' / 'Lookup'
+    assert info == MMPStateInfo('MMP 2.0', str(lookup / 'IA.mmi'), str(lookup / 'IA.mms'), '06/01/2026', '05/15/2026')
+    assert index_path.is_file()
+    assert mmpStateInfo('MN', str(install), str(index_path)) == MMPStateInfo('MMP 2.0', None, None, None, None)
+
+
+def test_missing_install(tmp_path):
+    info = mmpStateInfo('IA', str(tmp_path / 'USDA'), str(tmp_path / 'mmp_index.json'))
+    assert info == MMPStateInfo(None, None, None, None, None)
+
+
+def test_cached_index_is_reused_until_lookup_files_change(install, tmp_path, monkeypatch):
+    index_path = str(tmp_path / 'mmp_index.json')
+    loadMMPIndex(str(install), index_path)
+
+    def readAgain(file_path):
+        raise AssertionError(f"{file_path} read again")
+    with monkeypatch.context() as patch:
+        patch.setattr(mmp, 'readRevDate', readAgain)
+        assert mmpStateInfo('IA', str(install), index_path).mms_RevDate == '05/15/2026'
+
+    lookup = install / 'MMP 2.0' / 'Lookup'
+    writeLookup(lookup / 'IA.mms', '09/30/2026')
+    read = []
+    monkeypatch.setattr(mmp, 'readRevDate', lambda file_path: read.append(file_path) or readRevDate(file_path))
+    info = mmpStateInfo('IA', str(install), index_path)
+    assert (info.mmi_RevDate, info.mms_RevDate) == ('06/01/2026', '09/30/2026')
+    assert read == [str(lookup / 'IA.mms')]
+
+
+def test_new_lookup_files_are_found(install, tmp_path):
+    index_path = str(tmp_path / 'mmp_index.json')
+    assert mmpStateInfo('MN', str(install), index_path).mmi_RevDate is None
+
+    lookup = install / 'MMP 2.0' / 'Lookup'
+    writeLookup(lookup / 'MN.mmi', '07/04/2026')
+    mtime = stat(lookup).st_mtime + 10
+    utime(lookup, (mtime, mtime))
+    assert mmpStateInfo('MN', str(install), index_path).mmi_RevDate == '07/04/2026'
@@ -0,0 +1,43 @@
+''' Soil map renderer JSON, which must not depend on the session or the order of the legend.'''
+from json import loads
+
+from gnt_core.renderers import NOT_RATED, NOT_RATED_COLOR, simpleRenderer, uniqueValuesRenderer, valueColor, \
+    WATER_MUSYM, WATER_MUSYM_FILL
+
+
+LEGEND = ['55', '138B', WATER_MUSYM, NOT_RATED, '11B']
+
+
+def uniqueValueInfos(definition):
+    return loads(definition)['drawingInfo']['renderer']['uniqueValueInfos']
+
+
+def test_value_colors_are_stable():
+    # crc32 hues, unlike hash(), are the same in every Python session
+    assert valueColor('55') == valueColor('55') == [230, 126, 164, 255]
+    assert valueColor(55) == valueColor('55')
+    assert valueColor('138B') != valueColor('55')
+
+
+def test_renderer_does_not_depend_on_legend_order():
+    definition = uniqueValuesRenderer('musym', LEGEND)
+    assert uniqueValuesRenderer('musym', reversed(LEGEND)) == definition
+    assert [info['value'] for info in uniqueValueInfos(definition)] == sorted(LEGEND)
+
+
+def test_unsorted_renderer_keeps_legend_order():
+    infos = uniqueValueInfos(uniqueValuesRenderer('musym', LEGEND, sort=False))
+    assert [info['value'] for info in infos] == LEGEND
+
+
+def test_renderer_symbols():
+    infos = {info['value']: info['symbol'] for info in uniqueValueInfos(uniqueValuesRenderer('musym', LEGEND, False))}
+    assert infos[WATER_MUSYM]['color'] == WATER_MUSYM_FILL
+    assert infos[NOT_RATED]['color'] == NOT_RATED_COLOR
+    assert infos['55']['color'] == valueColor('55')
+    assert infos['55']['outline']['color'] == [0, 0, 0, 0]
+
+
+def test_simple_renderer_falls_back_to_black():
+    assert simpleRenderer(1.5, 'purple') == simpleRenderer(1.5, 'black')
+    assert loads(simpleRenderer(1.5, 'red'))['drawingInfo']['renderer']['symbol']['outline']['width'] == 1.5
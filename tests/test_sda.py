@@ -0,0 +1,98 @@
+''' Soil Data Access query building and the SoilKeys of its responses, without a connection to SDA.'''
+from os import path
+
+import pytest
+
+from gnt_core.sda import attributeQuery, geometryQuery, LANDUNIT_LENGTH, QuerySettings, readQuerySettings, \
+    REDUCED_SOIL_MAP_WKT, reduceGeometry, SDATable, SOIL_MAP_WKT, SUPPORT_DIR, withoutSoilMap
+from gnt_core.soils import fieldSoilKeys
+
+
+with open(path.join(SUPPORT_DIR, 'GNT_Query.txt')) as f:
+    GNT_QUERY = f.read()
+NO_GEOMETRY_QUERY = 'SELECT landunit, musym FROM #AoiSoils3 AS3;\nSELECT mukey FROM #MapunitTbl;'
+SQUARE_WKT = 'POLYGON ((-93 42, -92.99 42, -92.99 42.01, -93 42.01, -93 42))'
+
+
+def test_landunits_are_quoted():
+    query = geometryQuery([("O'Brien 1", SQUARE_WKT)])
+    assert "VALUES ('O''Brien 1', geometry::STGeomFromText(" in query
+
+
+def test_long_landunits_are_skipped():
+    long_sub_id = 'X' * (LANDUNIT_LENGTH + 1)
+    skipped = []
+    query = geometryQuery([('1', SQUARE_WKT), (long_sub_id, SQUARE_WKT), ('X' * LANDUNIT_LENGTH, SQUARE_WKT)],
+                          skipped=skipped)
+    assert skipped == [long_sub_id]
+    assert long_sub_id not in query
+    assert query.count('INSERT INTO #AoiTable') == 2
+
+
+def test_field_soil_keys_clear_fields_without_soil():
+    table = SDATable('FieldSoils', ['landunit', 'areasymbol', 'musym', 'mukey', 'mapunit_acres'], [],
+                     [['1', 'IA141', '55', '411', '20.5'], ['2', 'IA041', '138B', '412', '8.1']])
+    assert fieldSoilKeys(table) == {'1': '141_55', '2': '41_138B'}
+    assert fieldSoilKeys(table, ['1', '2', '3']) == {'1': '141_55', '2': '41_138B', '3': None}
+
+
+def writeSettings(tmp_path, rows):
+    csv_path = tmp_path / 'SDA_QuerySettings.csv'
+    csv_path.write_text('TOOL,QUERY_FILE,GEOMETRY,REDUCE_TOLERANCE\n' + ''.join(f"{row}\n" for row in rows))
+    return str(csv_path)
+
+
+def test_shipped_query_settings_are_full_geometry():
+    assert readQuerySettings('Download_Soil_Data') == QuerySettings('GNT_Query.txt', 'full', 1.0)
+    assert readQuerySettings('SDA_CreateGNT_SoilMaps3_py3') == QuerySettings('GNT_Query.txt', 'full', None)
+
+
+def test_query_settings(tmp_path):
+    csv_path = writeSettings(tmp_path, ['Download_Soil_Data,Small_Query.txt, Reduced ,2.5', 'Other,,,'])
+    assert readQuerySettings('Download_Soil_Data', csv_path) == QuerySettings('Small_Query.txt', 'reduced', 2.5)
+    assert readQuerySettings('Other', csv_path) == QuerySettings('GNT_Query.txt', 'full', None)
+    assert readQuerySettings('Missing', csv_path) == QuerySettings('GNT_Query.txt', 'full', None)
+
+
+@pytest.mark.parametrize('row, message', [
+    ('Download_Soil_Data,GNT_Query.txt,simplified,1', 'unknown GEOMETRY for Download_Soil_Data: simplified'),
+    ('Download_Soil_Data,GNT_Query.txt,reduced,', 'needs a REDUCE_TOLERANCE for Download_Soil_Data'),
+    ('Download_Soil_Data,GNT_Query.txt,reduced,0', 'needs a REDUCE_TOLERANCE for Download_Soil_Data')
+])
+def test_bad_query_settings(tmp_path, row, message):
+    with pytest.raises(ValueError, match=message):
+        readQuerySettings('Download_Soil_Data', writeSettings(tmp_path, [row]))
+
+
+def test_reduce_geometry():
+    query = reduceGeometry(GNT_QUERY, 1.5)
+    assert SOIL_MAP_WKT not in query
+    assert query.count(REDUCED_SOIL_MAP_WKT) == 1
+    assert 'CROSS APPLY (SELECT soilgeog.Reduce(1.5) AS reducedgeog) AS R' in query
+    # Only the soil map statement changes
+    assert query.count(';') == GNT_QUERY.count(';')
+    assert query.count('FROM #AoiSoils3 AS3') == GNT_QUERY.count('FROM #AoiSoils3 AS3')
+
+
+def test_reduced_attribute_query():
+    assert attributeQuery(QuerySettings('GNT_Query.txt', 'full', 1.0)) == GNT_QUERY
+    assert attributeQuery(QuerySettings('GNT_Query.txt', 'reduced', 1.0)) == reduceGeometry(GNT_QUERY, 1.0)
+
+
+def test_without_soil_map():
+    query = withoutSoilMap(GNT_QUERY)
+    assert 'wktgeom' not in query
+    assert query.count(';') == GNT_QUERY.count(';') - 1
+    assert 'SUM(poly_acres) AS mapunit_acres' in query
+
+
+@pytest.mark.parametrize('function', [lambda query: reduceGeometry(query, 1), withoutSoilMap])
+def test_queries_without_soil_map_geometry(function):
+    with pytest.raises(ValueError, match='does not return soil map geometry'):
+        function(NO_GEOMETRY_QUERY)
+
+
+def test_reduce_geometry_needs_the_soil_map_table():
+    query = 'SELECT soilgeog.STAsText() AS wktgeom FROM #Other;\nSELECT landunit FROM #AoiSoils3 AS3;'
+    with pytest.raises(ValueError, match='does not return soil map geometry'):
+        reduceGeometry(query, 1)
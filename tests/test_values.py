@@ -0,0 +1,39 @@
+''' Where clauses of text values split into IN lists.'''
+import pytest
+
+from gnt_core.values import chunks, inClauses, inQuery, MAX_IN_VALUES, quoted, uniqueValues
+
+
+def test_quoted():
+    assert quoted("O'Brien") == "'O''Brien'"
+    assert quoted(55) == "'55'"
+
+
+def test_unique_values_keep_first_seen_order():
+    assert uniqueValues(['55', 55, None, '', '138B', '55', 0]) == ['55', '138B', '0']
+
+
+def test_chunks():
+    assert chunks(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+    assert chunks([], 2) == []
+
+
+def test_single_in_list():
+    assert inQuery('musym', ['55', "O'B"]) == "musym IN ('55', 'O''B')"
+
+
+def test_in_lists_are_chunked():
+    values = [str(i) for i in range(5)]
+    assert inClauses('musym', values, 2) == ["musym IN ('0', '1')", "musym IN ('2', '3')", "musym IN ('4')"]
+    assert inQuery('musym', values, 2) == "(musym IN ('0', '1')) OR (musym IN ('2', '3')) OR (musym IN ('4'))"
+
+
+def test_default_chunk_size():
+    query = inQuery('mukey', range(MAX_IN_VALUES + 1))
+    assert query.count(' IN (') == 2
+    assert query.endswith(f"(mukey IN ('{MAX_IN_VALUES}'))")
+
+
+def test_no_values():
+    with pytest.raises(ValueError, match='No musym values to match'):
+        inQuery('musym', [])